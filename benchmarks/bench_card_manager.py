@@ -0,0 +1,88 @@
+"""Microbenchmarks for `CardManager` at growing history sizes."""
+
+import itertools
+import tempfile
+from datetime import datetime
+
+from benchmarks.fakes import fake_card
+from benchmarks.harness import BenchResult, measure
+from src.card_manager import CardManager, WordHistoryEntry, format_card
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+
+
+def _populated_manager(data_dir: str, size: int) -> CardManager:
+    """Create a manager with `size` English history entries already saved."""
+    manager = CardManager(data_dir=data_dir)
+    now = datetime.now().isoformat()
+    manager._store("english").history = {
+        f"word{i}": WordHistoryEntry(word=f"word{i}", added_at=now, definition=f"Definition {i}")
+        for i in range(size)
+    }
+    manager._save_history("english")
+    manager._rebuild_history_keys("english")
+    manager._index_missing_history("english")
+    return manager
+
+
+def run_card_manager_benchmarks(sizes: tuple[int, ...] = DEFAULT_SIZES) -> list[BenchResult]:
+    """Run CardManager microbenchmarks for every history size."""
+    results = []
+    card = fake_card("benchmark")
+    results.append(measure("card_manager.format_definition", lambda: format_card(card), 20_000))
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            manager = _populated_manager(data_dir, size)
+
+            results.append(
+                measure(
+                    f"card_manager.has_duplicate.hit.{size}",
+                    lambda: manager.has_duplicate(f"word{size - 1}", "english"),
+                    2_000,
+                )
+            )
+            results.append(
+                measure(
+                    f"card_manager.has_duplicate.miss.{size}",
+                    lambda: manager.has_duplicate("not-a-word", "english"),
+                    2_000,
+                )
+            )
+            results.append(
+                measure(f"card_manager.save_history.{size}", lambda: manager._save_history("english"), 200)
+            )
+            results.append(
+                measure(f"card_manager.load_history.{size}", lambda: manager._load_history("english"), 200)
+            )
+            results.append(
+                measure(
+                    f"card_manager.load_language.{size}",
+                    # Unload, then reload on first use (history, keys and index check)
+                    lambda: (manager.unload_idle(0, now=float("inf")), manager._store("english")),
+                    20,
+                )
+            )
+
+            for label, query in (
+                ("term", f"word{size - 1}"),
+                ("prefix", f"word{size // 2}"[:-1]),
+                ("common", "definition"),
+            ):
+                results.append(
+                    measure(
+                        f"card_manager.search.{label}.{size}",
+                        lambda: manager.search(query, "english"),
+                        200,
+                    )
+                )
+
+            counter = itertools.count()
+            results.append(
+                measure(
+                    f"card_manager.add_card.{size}",
+                    lambda: manager.add_card(f"new{next(counter)}", card, "english"),
+                    200,
+                )
+            )
+    return results
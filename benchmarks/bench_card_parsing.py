@@ -0,0 +1,54 @@
+"""Microbenchmarks for building the structured-output request and validating responses."""
+
+import json
+
+from openai import NOT_GIVEN
+from openai.lib._parsing._completions import parse_chat_completion, type_to_response_format_param
+from openai.types.chat import ChatCompletion
+
+from benchmarks.fakes import fake_card
+from benchmarks.harness import BenchResult, measure
+from src.card_parser import card_response_format, parse_card
+from src.schemas import Card
+
+
+def run_card_parsing_benchmarks() -> list[BenchResult]:
+    """Compare the per-call SDK parse path with the precompiled one."""
+    card = fake_card("benchmark").model_dump()
+    content = json.dumps(card)
+    extra_collocation = json.dumps(
+        {**card, "collocations": card["collocations"] + ["a third _____", "a fourth _____"]}
+    )
+
+    completion = ChatCompletion.model_validate(
+        {
+            "id": "benchmark",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "benchmark",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }
+            ],
+        }
+    )
+
+    def sdk_parse() -> Card:
+        # The SDK helpers `beta.chat.completions.parse` runs around the HTTP
+        # request: build the response format from the model, then parse the completion
+        type_to_response_format_param(Card)
+        parsed = parse_chat_completion(response_format=Card, input_tools=NOT_GIVEN, chat_completion=completion)
+        return parsed.choices[0].message.parsed
+
+    def fast_parse() -> Card:
+        card_response_format()
+        return parse_card(completion.choices[0].message.content, "benchmark")
+
+    return [
+        measure("card_parsing.sdk_parse", sdk_parse, 5_000),
+        measure("card_parsing.fast_parse", fast_parse, 20_000),
+        measure("card_parsing.salvage_trim", lambda: parse_card(extra_collocation, "benchmark"), 5_000),
+    ]
@@ -0,0 +1,124 @@
+"""Benchmarks for exporting the card buffer and history."""
+
+import tempfile
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+from benchmarks.fakes import fake_card
+from benchmarks.harness import BenchResult, measure
+from src.card_manager import CardManager, format_card
+from src.exporters import (
+    EXPORTERS,
+    FLUSH_EVERY_RECORDS,
+    BufferedSink,
+    Exporter,
+    ExportRecord,
+    QuizletExporter,
+    export_cards,
+)
+from src.search_index import IndexDocument
+
+DEFAULT_SIZES = (1_000, 10_000)
+
+
+def _write_quizlet_per_card(cards: list[tuple[str, str]], path: str) -> None:
+    """The former `dump_txt` loop: one formatted write call per card and separator."""
+    with open(path, "w", encoding="utf-8") as f:
+        for i, (term, definition) in enumerate(cards):
+            f.write(f"{term}\t{definition}")
+            if i < len(cards) - 1:
+                f.write("\n####")
+
+
+class _PerRecordQuizletExporter(QuizletExporter):
+    """Quizlet format written one record at a time by the base `Exporter.write_many` loop."""
+
+    def write(self, record: ExportRecord) -> None:
+        separator = "\n####" if self.count else ""
+        self.sink.write(f"{separator}{record.term}\t{record.definition}")
+        self.count += 1
+
+    write_many = Exporter.write_many
+
+
+def _write_batches(exporter_type: type[Exporter], cards: list[tuple[str, str]], path: str) -> None:
+    """Write cards in `export_cards` batches with one exporter, leaving out the file rename."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        sink = BufferedSink(f)
+        exporter = exporter_type(sink)
+        source = (ExportRecord(*card) for card in cards)
+        while batch := list(islice(source, FLUSH_EVERY_RECORDS)):
+            exporter.write_many(batch)
+            sink.flush()
+
+
+def _populated_manager(data_dir: str, size: int) -> CardManager:
+    """Create a manager with `size` indexed English cards."""
+    manager = CardManager(data_dir=data_dir)
+    now = datetime.now().isoformat()
+    manager._index().add_many(
+        IndexDocument.from_card(f"word{i}", "english", now, fake_card(f"word{i}")) for i in range(size)
+    )
+    return manager
+
+
+def run_export_benchmarks(sizes: tuple[int, ...] = DEFAULT_SIZES) -> list[BenchResult]:
+    """Compare single-pass multi-format exports with one pass per format."""
+    results = []
+    formats = list(EXPORTERS)
+    with tempfile.TemporaryDirectory() as data_dir:
+        for size in sizes:
+            manager = _populated_manager(f"{data_dir}/{size}", size)
+            cards = [
+                (f"word{i}", format_card(fake_card(f"word{i}"))) for i in range(size)
+            ]
+            path = str(Path(data_dir) / "buffer.txt")
+
+            results.append(
+                measure(f"export.buffer.per_card_writes.{size}", lambda: _write_quizlet_per_card(cards, path), 50)
+            )
+            results.append(
+                measure(
+                    f"export.buffer.quizlet.{size}",
+                    lambda: export_cards((ExportRecord(*card) for card in cards), {"quizlet": path}),
+                    50,
+                )
+            )
+            results.append(
+                measure(
+                    f"export.buffer.quizlet.write_many.{size}",
+                    lambda: _write_batches(QuizletExporter, cards, path),
+                    50,
+                )
+            )
+            results.append(
+                measure(
+                    f"export.buffer.quizlet.per_record.{size}",
+                    lambda: _write_batches(_PerRecordQuizletExporter, cards, path),
+                    50,
+                )
+            )
+            results.append(
+                measure(
+                    f"export.history.quizlet.{size}",
+                    lambda: manager.export_history("english", ["quizlet"]),
+                    20,
+                )
+            )
+            results.append(
+                measure(
+                    f"export.history.all_formats.one_pass.{size}",
+                    lambda: manager.export_history("english", formats),
+                    20,
+                )
+            )
+            results.append(
+                measure(
+                    f"export.history.all_formats.pass_per_format.{size}",
+                    lambda: [manager.export_history("english", [name]) for name in formats],
+                    20,
+                )
+            )
+            manager._index().close()
+    return results
@@ -0,0 +1,24 @@
+"""Microbenchmarks for the lemmatizer that keys duplicate and cache lookups."""
+
+import itertools
+
+from benchmarks.harness import BenchResult, measure
+from src.languages import lemma_key
+
+ENGLISH_WORDS = ("went", "children", "studies", "boxes", "running", "to give up", "bank (river)")
+GERMAN_WORDS = ("Häuser", "Hunde", "ging", "der Hund", "Lehrerinnen", "Zeitungen", "aufgeben")
+
+
+def run_lemmatizer_benchmarks() -> list[BenchResult]:
+    """Time `lemma_key` with and without its memo cache."""
+    results = []
+    uncached = lemma_key.__wrapped__
+    for language, words in (("english", ENGLISH_WORDS), ("german", GERMAN_WORDS)):
+        cycle = itertools.cycle(words)
+        results.append(
+            measure(f"lemmatizer.{language}.uncached", lambda: uncached(next(cycle), language), 50_000)
+        )
+        results.append(
+            measure(f"lemmatizer.{language}.cached", lambda: lemma_key(next(cycle), language), 50_000)
+        )
+    return results
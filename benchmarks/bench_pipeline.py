@@ -0,0 +1,131 @@
+"""End-to-end benchmarks of `VocabularyBot` handlers against fake Telegram and LLM.
+
+Handlers only queue generation jobs, so sequential word and callback timings
+include waiting for `bot.jobs` to finish the card.
+"""
+
+import asyncio
+import tempfile
+import time
+
+from aiogram.filters import CommandObject
+
+from benchmarks.fakes import (
+    FakeCallbackQuery,
+    FakeInlineQuery,
+    FakeMessage,
+    FakeTelegramAPI,
+    button_data,
+    fake_llm,
+    make_bot,
+    word_command,
+)
+from benchmarks.harness import BenchResult, summarize
+from src.bot import VocabularyBot
+
+
+async def _bench_process_word(bot: VocabularyBot, api: FakeTelegramAPI, count: int) -> BenchResult:
+    samples = []
+    for i in range(count):
+        message = FakeMessage(api, f"/en word{i}")
+        t0 = time.perf_counter()
+        await bot._process_word(message, word_command(f"word{i}", "english"), "english")
+        await bot.jobs.join()
+        samples.append(time.perf_counter() - t0)
+    return summarize("pipeline.process_word", samples)
+
+
+async def _bench_process_word_concurrent(
+    bot: VocabularyBot, api: FakeTelegramAPI, count: int, concurrency: int
+) -> BenchResult:
+    samples: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            message = FakeMessage(api, f"/de wort{i}")
+            t0 = time.perf_counter()
+            await bot._process_word(message, word_command(f"wort{i}", "german"), "german")
+            samples.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    await bot.jobs.join()
+    return summarize(
+        f"pipeline.process_word.concurrent{concurrency}", samples, time.perf_counter() - started
+    )
+
+
+async def _bench_callback(
+    bot: VocabularyBot, api: FakeTelegramAPI, action: str, count: int
+) -> BenchResult:
+    samples = []
+    for i in range(count):
+        message = FakeMessage(api, f"/en {action}{i}")
+        await bot._process_word(message, word_command(f"{action}{i}", "english"), "english")
+        await bot.jobs.join()
+        callback = FakeCallbackQuery(api, button_data(api, action), FakeMessage(api))
+        handler = getattr(bot, f"_handle_{action}")
+        t0 = time.perf_counter()
+        await handler(callback)
+        await bot.jobs.join()
+        samples.append(time.perf_counter() - t0)
+    return summarize(f"pipeline.handle_{action}", samples)
+
+
+async def _bench_dump(bot: VocabularyBot, api: FakeTelegramAPI, count: int) -> BenchResult:
+    samples = []
+    for _ in range(count):
+        for i in range(20):
+            message = FakeMessage(api)
+            await bot._process_word(message, word_command(f"dump{i}", "english"), "english")
+            await bot.jobs.join()
+            callback = FakeCallbackQuery(api, button_data(api, "accept"), FakeMessage(api))
+            await bot._handle_accept(callback)
+        t0 = time.perf_counter()
+        await bot._handle_dump(FakeMessage(api, "/dump_english"), CommandObject(prefix="/", command="dump_english"))
+        samples.append(time.perf_counter() - t0)
+    return summarize("pipeline.dump_english.20cards", samples)
+
+
+async def _bench_inline_query(bot: VocabularyBot, api: FakeTelegramAPI, count: int) -> BenchResult:
+    samples = []
+    for i in range(count):
+        # Alternate cached exact words and history prefixes
+        query = f"word{i}" if i % 2 else f"dump{i % 10}"[:-1]
+        t0 = time.perf_counter()
+        await bot._handle_inline_query(FakeInlineQuery(api, query))
+        samples.append(time.perf_counter() - t0)
+    return summarize("pipeline.inline_query", samples)
+
+
+async def run_pipeline_benchmarks(
+    iterations: int = 200, llm_latency: float = 0.0, api_latency: float = 0.0
+) -> list[BenchResult]:
+    """
+    Run handler-level benchmarks.
+
+    Args:
+        iterations: Number of words per benchmark.
+        llm_latency: Simulated LLM latency in seconds.
+        api_latency: Simulated Telegram round-trip latency in seconds.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as data_dir, fake_llm(llm_latency):
+        api = FakeTelegramAPI(latency_seconds=api_latency)
+        bot = make_bot(data_dir, api)
+        await bot.jobs.start()
+
+        try:
+            results.append(await _bench_process_word(bot, api, iterations))
+            results.append(await _bench_process_word_concurrent(bot, api, iterations, 16))
+            for action in ("accept", "decline", "regenerate"):
+                results.append(await _bench_callback(bot, api, action, iterations))
+            results.append(await _bench_dump(bot, api, max(1, iterations // 20)))
+            results.append(await _bench_inline_query(bot, api, iterations))
+        finally:
+            await bot.jobs.stop()
+
+        calls_per_card = api.total_calls / max(1, iterations * 5)
+        print(f"Telegram API calls: {api.total_calls} (~{calls_per_card:.1f} per card)")
+    return results
@@ -0,0 +1,193 @@
+"""In-process fakes for the Telegram API and the LLM used by benchmarks."""
+
+import asyncio
+import itertools
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from aiogram.filters import CommandObject
+
+import src.bot
+from src.bot import VocabularyBot
+from src.config import Settings
+from src.languages import get_language
+from src.schemas import Card, Language
+
+FAKE_USER_ID = 424242
+FAKE_CHAT_ID = 424242
+
+_message_ids = itertools.count(1)
+
+
+@dataclass
+class FakeUser:
+    """Minimal stand-in for `aiogram.types.User`."""
+
+    id: int = FAKE_USER_ID
+
+
+@dataclass
+class FakeChat:
+    """Minimal stand-in for `aiogram.types.Chat`."""
+
+    id: int = FAKE_CHAT_ID
+
+
+@dataclass
+class FakeTelegramAPI:
+    """Records Bot API calls and optionally simulates network latency."""
+
+    latency_seconds: float = 0.0
+    calls: dict[str, int] = field(default_factory=dict)
+    last_reply_markup: Any = None
+
+    async def call(self, method: str) -> None:
+        """Account for one API round trip."""
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+
+    @property
+    def total_calls(self) -> int:
+        """Total number of API calls made so far."""
+        return sum(self.calls.values())
+
+
+class FakeMessage:
+    """Stand-in for `aiogram.types.Message` supporting the methods the bot uses."""
+
+    def __init__(self, api: FakeTelegramAPI, text: str = "", user_id: int = FAKE_USER_ID) -> None:
+        self.api = api
+        self.message_id = next(_message_ids)
+        self.chat = FakeChat()
+        self.from_user = FakeUser(user_id)
+        self.text = text
+
+    async def answer(self, text: str, **kwargs) -> "FakeMessage":
+        await self.api.call("sendMessage")
+        return FakeMessage(self.api, text)
+
+    async def edit_text(self, text: str, **kwargs) -> "FakeMessage":
+        await self.api.call("editMessageText")
+        self.text = text
+        return self
+
+    async def answer_document(self, document, **kwargs) -> "FakeMessage":
+        await self.api.call("sendDocument")
+        return FakeMessage(self.api)
+
+
+class FakeCallbackQuery:
+    """Stand-in for `aiogram.types.CallbackQuery`."""
+
+    def __init__(self, api: FakeTelegramAPI, data: str, message: FakeMessage) -> None:
+        self.api = api
+        self.data = data
+        self.message = message
+        self.from_user = FakeUser(message.from_user.id)
+
+    async def answer(self, text: str | None = None, **kwargs) -> None:
+        await self.api.call("answerCallbackQuery")
+
+
+class FakeInlineQuery:
+    """Stand-in for `aiogram.types.InlineQuery`."""
+
+    def __init__(self, api: FakeTelegramAPI, query: str, user_id: int = FAKE_USER_ID) -> None:
+        self.api = api
+        self.query = query
+        self.from_user = FakeUser(user_id)
+        self.results: list[Any] = []
+
+    async def answer(self, results: list[Any], **kwargs) -> None:
+        await self.api.call("answerInlineQuery")
+        self.results = results
+
+
+class FakeBot:
+    """Stand-in for `aiogram.Bot` methods called directly by `VocabularyBot`."""
+
+    def __init__(self, api: FakeTelegramAPI) -> None:
+        self.api = api
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> FakeMessage:
+        await self.api.call("sendMessage")
+        return FakeMessage(self.api, text)
+
+    async def edit_message_text(self, text: str, reply_markup=None, **kwargs) -> None:
+        await self.api.call("editMessageText")
+        if reply_markup is not None:
+            self.api.last_reply_markup = reply_markup
+
+    async def edit_message_reply_markup(self, reply_markup=None, **kwargs) -> None:
+        await self.api.call("editMessageReplyMarkup")
+        self.api.last_reply_markup = reply_markup
+
+
+def button_data(api: FakeTelegramAPI, action: str) -> str:
+    """Return the callback data of a button on the most recent card keyboard."""
+    for row in api.last_reply_markup.inline_keyboard:
+        for button in row:
+            if action.lower() in button.text.lower():
+                return button.callback_data
+    raise LookupError(f"No {action} button on the last keyboard")
+
+
+def fake_card(word: str) -> Card:
+    """Build a valid card for the given word without calling an LLM."""
+    term = word.strip().lower()
+    return Card(
+        is_exists=True,
+        normalized_term=term,
+        definition=f"n. Synthetic definition for '{term}'. (Syn: sample, example)",
+        collocations=[f"a typical _____ ({term})", f"the _____ ({term}) itself"],
+        examples=[
+            f"This sentence mentions the _____ ({term}).",
+            f"Another sentence about the _____ ({term}).",
+        ],
+    )
+
+
+@contextmanager
+def fake_llm(latency_seconds: float = 0.0) -> Iterator[None]:
+    """Replace `build_card` used by the bot with a fast in-process fake."""
+    original = src.bot.build_card
+
+    async def _fake_build_card(word: str, language: Language, settings: Settings, **kwargs) -> Card:
+        if latency_seconds:
+            await asyncio.sleep(latency_seconds)
+        return fake_card(word)
+
+    src.bot.build_card = _fake_build_card
+    try:
+        yield
+    finally:
+        src.bot.build_card = original
+
+
+def make_settings(data_dir: str, **overrides: Any) -> Settings:
+    """Create settings pointing all storage at `data_dir`; `overrides` replace any setting."""
+    options: dict[str, Any] = dict(
+        TELEGRAM_BOT_TOKEN="123456:BENCHMARK-FAKE-TOKEN",
+        ALLOWED_USER_ID=FAKE_USER_ID,
+        OPENROUTER_API_KEY="benchmark",
+        ENGLISH_CSV_PATH=f"{data_dir}/english.txt",
+        GERMAN_CSV_PATH=f"{data_dir}/german.txt",
+        CARD_CACHE_PATH=f"{data_dir}/card_cache.sqlite3",
+    )
+    options.update(overrides)
+    return Settings(**options, _env_file=None)
+
+
+def make_bot(data_dir: str, api: FakeTelegramAPI, **overrides: Any) -> VocabularyBot:
+    """Create a VocabularyBot wired to the fake Telegram API."""
+    bot = VocabularyBot(make_settings(data_dir, **overrides))
+    bot.bot = FakeBot(api)
+    bot.outbox.bot = bot.bot
+    return bot
+
+
+def word_command(word: str, language: Language) -> CommandObject:
+    """Build the CommandObject aiogram would pass for `/en word` or `/de word`."""
+    return CommandObject(prefix="/", command=get_language(language).command, args=word)
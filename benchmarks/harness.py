@@ -0,0 +1,169 @@
+"""Timing harness, percentile summaries and baseline comparison."""
+
+import gc
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+BASELINES_DIR = Path(__file__).parent / "baselines"
+
+# A benchmark regresses when its p50 grows by more than this fraction
+DEFAULT_REGRESSION_THRESHOLD = 0.20
+
+
+@dataclass
+class BenchResult:
+    """Summary of one benchmark run. Latencies are in milliseconds."""
+
+    name: str
+    iterations: int
+    total_seconds: float
+    ops_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+def percentile(sorted_samples: list[float], pct: float) -> float:
+    """
+    Return the nearest-rank percentile of already sorted samples.
+
+    Args:
+        sorted_samples: Samples sorted in ascending order.
+        pct: Percentile in range 0-100.
+
+    Returns:
+        The percentile value, or 0.0 for an empty list.
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, round(pct / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[rank]
+
+
+def summarize(name: str, samples: list[float], total_seconds: float | None = None) -> BenchResult:
+    """
+    Build a BenchResult from per-operation samples in seconds.
+
+    Args:
+        name: Benchmark name.
+        samples: Duration of each operation in seconds.
+        total_seconds: Wall-clock time of the run (sum of samples if omitted).
+    """
+    ordered = sorted(samples)
+    total = total_seconds if total_seconds is not None else sum(ordered)
+    return BenchResult(
+        name=name,
+        iterations=len(ordered),
+        total_seconds=total,
+        ops_per_second=len(ordered) / total if total > 0 else 0.0,
+        p50_ms=percentile(ordered, 50) * 1000,
+        p95_ms=percentile(ordered, 95) * 1000,
+        p99_ms=percentile(ordered, 99) * 1000,
+        max_ms=(ordered[-1] * 1000) if ordered else 0.0,
+    )
+
+
+def measure(
+    name: str,
+    fn: Callable[[], object],
+    iterations: int = 1000,
+    max_seconds: float = 5.0,
+) -> BenchResult:
+    """
+    Time a synchronous callable.
+
+    Stops early once `max_seconds` is exceeded so slow cases (e.g. saving a
+    100k history) stay bounded.
+    """
+    # Start from a collected heap, so a full collection of objects left by
+    # imports or earlier benchmarks does not land in this one's samples
+    gc.collect()
+    samples: list[float] = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+        if time.perf_counter() - started > max_seconds:
+            break
+    return summarize(name, samples, time.perf_counter() - started)
+
+
+async def measure_async(
+    name: str,
+    fn: Callable[[], Awaitable[object]],
+    iterations: int = 1000,
+    max_seconds: float = 5.0,
+) -> BenchResult:
+    """Time an async callable sequentially, see `measure`."""
+    gc.collect()
+    samples: list[float] = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - t0)
+        if time.perf_counter() - started > max_seconds:
+            break
+    return summarize(name, samples, time.perf_counter() - started)
+
+
+def format_results(results: list[BenchResult]) -> str:
+    """Render results as a fixed-width table."""
+    header = f"{'benchmark':<48} {'iters':>7} {'ops/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.name:<48} {r.iterations:>7} {r.ops_per_second:>11.1f} "
+            f"{r.p50_ms:>9.3f} {r.p95_ms:>9.3f} {r.p99_ms:>9.3f}"
+        )
+    return "\n".join(lines)
+
+
+def save_baseline(results: list[BenchResult], label: str) -> Path:
+    """Save results as a named baseline and return its path."""
+    BASELINES_DIR.mkdir(parents=True, exist_ok=True)
+    path = BASELINES_DIR / f"{label}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([asdict(r) for r in results], f, indent=2)
+    return path
+
+
+def load_baseline(label: str) -> dict[str, BenchResult]:
+    """Load a named baseline keyed by benchmark name."""
+    path = BASELINES_DIR / f"{label}.json"
+    with open(path, "r", encoding="utf-8") as f:
+        return {entry["name"]: BenchResult(**entry) for entry in json.load(f)}
+
+
+def compare(
+    results: list[BenchResult],
+    baseline: dict[str, BenchResult],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+) -> tuple[str, list[str]]:
+    """
+    Compare results against a baseline by p50 latency.
+
+    Returns:
+        Tuple of (report text, names of regressed benchmarks).
+    """
+    lines = [f"{'benchmark':<48} {'base p50':>10} {'now p50':>10} {'change':>8}"]
+    regressions: list[str] = []
+    for r in results:
+        base = baseline.get(r.name)
+        if base is None or base.p50_ms <= 0:
+            lines.append(f"{r.name:<48} {'-':>10} {r.p50_ms:>10.3f} {'new':>8}")
+            continue
+        change = (r.p50_ms - base.p50_ms) / base.p50_ms
+        marker = ""
+        if change > threshold:
+            regressions.append(r.name)
+            marker = "  REGRESSION"
+        lines.append(
+            f"{r.name:<48} {base.p50_ms:>10.3f} {r.p50_ms:>10.3f} {change:>+8.1%}{marker}"
+        )
+    return "\n".join(lines), regressions
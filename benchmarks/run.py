@@ -0,0 +1,90 @@
+"""Command-line runner for the benchmark suite.
+
+Usage:
+```
+uv run python -m benchmarks.run                       # run everything
+uv run python -m benchmarks.run --save-baseline main  # store results as baseline "main"
+uv run python -m benchmarks.run --compare main        # compare against baseline "main"
+```
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from benchmarks.bench_card_manager import DEFAULT_SIZES, run_card_manager_benchmarks
+from benchmarks.bench_card_parsing import run_card_parsing_benchmarks
+from benchmarks.bench_export import run_export_benchmarks
+from benchmarks.bench_lemmatizer import run_lemmatizer_benchmarks
+from benchmarks.bench_pipeline import run_pipeline_benchmarks
+from benchmarks.harness import (
+    DEFAULT_REGRESSION_THRESHOLD,
+    BenchResult,
+    compare,
+    format_results,
+    load_baseline,
+    save_baseline,
+)
+
+SUITES = ("pipeline", "card_manager", "lemmatizer", "card_parsing", "export")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Vocabulary Builder benchmarks")
+    parser.add_argument("--suite", choices=SUITES, action="append", help="Suites to run (default: all)")
+    parser.add_argument("--iterations", type=int, default=200, help="Words per pipeline benchmark")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="History sizes"
+    )
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--api-latency-ms", type=float, default=0.0)
+    parser.add_argument("--save-baseline", metavar="LABEL")
+    parser.add_argument("--compare", metavar="LABEL")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the selected suites and return the process exit code."""
+    args = parse_args(argv)
+    # Handler logging would dominate the measurements
+    logging.basicConfig(level=logging.WARNING)
+    suites = args.suite or list(SUITES)
+
+    results: list[BenchResult] = []
+    if "pipeline" in suites:
+        results += asyncio.run(
+            run_pipeline_benchmarks(
+                iterations=args.iterations,
+                llm_latency=args.llm_latency_ms / 1000,
+                api_latency=args.api_latency_ms / 1000,
+            )
+        )
+    if "card_manager" in suites:
+        results += run_card_manager_benchmarks(tuple(args.sizes))
+    if "lemmatizer" in suites:
+        results += run_lemmatizer_benchmarks()
+    if "card_parsing" in suites:
+        results += run_card_parsing_benchmarks()
+    if "export" in suites:
+        results += run_export_benchmarks()
+
+    print(format_results(results))
+
+    if args.save_baseline:
+        path = save_baseline(results, args.save_baseline)
+        print(f"\nBaseline saved to {path}")
+
+    if args.compare:
+        report, regressions = compare(results, load_baseline(args.compare), args.threshold)
+        print(f"\nComparison with baseline '{args.compare}':\n{report}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Memory soak test: thousands of simulated words against the fake LLM.
+
+Runs words through the full handler pipeline (generate, then accept, decline
+or regenerate) with allocation tracing on, and fails if traced memory grows
+by more than a bound between the end of a warm-up phase and the end of the
+run, or if pending cards are left behind.
+
+The vocabulary is reused in rounds and the buffer is dumped regularly, so a
+healthy bot reaches a steady state: history and the search index stop
+growing once every word has been seen. The card cache is disabled, so every
+word, repeated or not, goes through card generation.
+
+Usage:
+```
+uv run python -m benchmarks.soak_memory
+uv run python -m benchmarks.soak_memory --words 20000 --max-growth-kib 1024
+```
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import sys
+import tempfile
+import tracemalloc
+
+from aiogram.filters import CommandObject
+
+from benchmarks.fakes import (
+    FakeCallbackQuery,
+    FakeMessage,
+    FakeTelegramAPI,
+    button_data,
+    fake_llm,
+    make_bot,
+    word_command,
+)
+from src.bot import VocabularyBot
+from src.memory_profiler import count_objects
+
+# Words are reused in rounds over this many distinct words
+VOCABULARY_SIZE = 500
+
+# Dump (and clear) the card buffer after this many words
+DUMP_EVERY = 250
+
+ACTIONS = ("accept", "decline", "decline", "regenerate")
+
+
+async def _one_word(bot: VocabularyBot, api: FakeTelegramAPI, i: int) -> None:
+    word = f"soak{i % VOCABULARY_SIZE}"
+    await bot._process_word(FakeMessage(api, f"/en {word}"), word_command(word, "english"), "english")
+    await bot.jobs.join()
+
+    action = ACTIONS[i % len(ACTIONS)]
+    await getattr(bot, f"_handle_{action}")(
+        FakeCallbackQuery(api, button_data(api, action), FakeMessage(api))
+    )
+    await bot.jobs.join()
+    if action == "regenerate":
+        # Settle the regenerated card so no pending card is left behind
+        await bot._handle_decline(FakeCallbackQuery(api, button_data(api, "decline"), FakeMessage(api)))
+
+    if i % DUMP_EVERY == DUMP_EVERY - 1:
+        await bot._handle_dump(FakeMessage(api, "/dump_english"), CommandObject(prefix="/", command="dump_english"))
+
+
+def _traced_kib() -> float:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / 1024
+
+
+async def run_soak(words: int, warmup: int) -> tuple[float, float, dict[str, int]]:
+    """
+    Run the soak and return traced memory after warm-up and at the end (KiB).
+
+    Also returns live object counts at the end.
+    """
+    with tempfile.TemporaryDirectory() as data_dir, fake_llm():
+        api = FakeTelegramAPI()
+        # Without the cache every word is generated, not served from SQLite
+        bot = make_bot(data_dir, api, CARD_CACHE_PATH=None)
+        await bot.jobs.start()
+        try:
+            for i in range(warmup):
+                await _one_word(bot, api, i)
+            after_warmup = _traced_kib()
+
+            for i in range(warmup, words):
+                await _one_word(bot, api, i)
+                if i % 1000 == 999:
+                    print(f"{i + 1:>7} words: {_traced_kib() - after_warmup:+9.1f} KiB since warm-up")
+            at_end = _traced_kib()
+            objects = count_objects()
+        finally:
+            await bot.jobs.stop()
+            bot.pending.close()
+            if bot.card_cache is not None:
+                bot.card_cache.close()
+    return after_warmup, at_end, objects
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Memory soak test against the fake LLM")
+    parser.add_argument("--words", type=int, default=5000, help="Words to simulate")
+    parser.add_argument(
+        "--warmup", type=int, default=2 * VOCABULARY_SIZE, help="Words before the baseline"
+    )
+    parser.add_argument(
+        "--max-growth-kib", type=float, default=512.0, help="Allowed growth after warm-up"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the soak test and return the process exit code."""
+    args = parse_args(argv)
+    # Handler logging would dominate the allocations
+    logging.basicConfig(level=logging.WARNING)
+
+    tracemalloc.start()
+    after_warmup, at_end, objects = asyncio.run(run_soak(args.words, args.warmup))
+    tracemalloc.stop()
+
+    growth = at_end - after_warmup
+    print(f"Traced after warm-up: {after_warmup:.1f} KiB, at end: {at_end:.1f} KiB ({growth:+.1f} KiB)")
+    print("Live objects: " + ", ".join(f"{name} {count}" for name, count in objects.items()))
+
+    failures = []
+    if growth > args.max_growth_kib:
+        failures.append(f"memory grew {growth:.1f} KiB (limit {args.max_growth_kib:.0f} KiB)")
+    if objects["PendingCard"]:
+        failures.append(f"{objects['PendingCard']} PendingCard object(s) left")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
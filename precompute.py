@@ -0,0 +1,376 @@
+"""Bulk-generate cards for a word list and store them in the card cache.
+
+Later `/en` and `/de` requests for precomputed words are answered from the
+cache without calling the LLM.
+
+Usage:
+```
+uv run python precompute.py english unit5.txt
+uv run python precompute.py german de_freq.tsv --limit 2000 --concurrency 8 --rpm 120
+```
+
+Word lists contain one word or phrase per line; frequency lists with tab,
+comma or semicolon separated columns (e.g. `rank<TAB>word<TAB>count`) or a
+trailing count (`word 12345`) are accepted too. Progress is checkpointed:
+words already in the cache are skipped, so an interrupted run resumes where
+it stopped.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from openai import APIStatusError
+
+from src.build_card import CardBuildError, ProviderUnavailableError, build_card
+from src.card_cache import CardCache, cache_key
+from src.config import Settings
+from src.languages import language_names, matches_term
+from src.provider_health import provider_health
+from src.schemas import Language
+
+logger = logging.getLogger("precompute")
+
+# Save the checkpoint file after this many finished words
+CHECKPOINT_EVERY = 25
+
+# Pause applied to all workers after a rate limit without a Retry-After header
+DEFAULT_RATE_LIMIT_PAUSE_SECONDS = 30
+
+# How many times a rate-limited word is put back into the queue
+MAX_RATE_LIMIT_REQUEUES = 5
+
+_COLUMN_SEPARATOR = re.compile(r"[\t,;]")
+_NUMBER = re.compile(r"^\d+([.,]\d+)?$")
+_TRAILING_COUNT = re.compile(r"\s+\d+([.,]\d+)?$")
+_LEADING_RANK = re.compile(r"^\d+[.)]?\s+")
+
+
+def parse_word_line(line: str) -> str | None:
+    """
+    Extract the word or phrase from a word-list line.
+
+    Returns:
+        The word, or None for blank lines, comments and header-only lines.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+
+    if _COLUMN_SEPARATOR.search(line):
+        columns = [column.strip() for column in _COLUMN_SEPARATOR.split(line)]
+        words = [column for column in columns if column and not _NUMBER.match(column)]
+        return words[0] if words else None
+
+    word = _LEADING_RANK.sub("", _TRAILING_COUNT.sub("", line))
+    return None if _NUMBER.match(word) else word
+
+
+def read_word_list(path: str, language: Language, limit: int | None = None) -> list[str]:
+    """
+    Read unique words from a word or frequency list, keeping file order.
+
+    Inflected forms of a word already in the list ("went" after "go") are
+    dropped, since they share its cache entry. Words that merely share a
+    lemma key with an earlier word, without lemmatizing to it, are kept.
+
+    Args:
+        path: Path of the list.
+        language: Language of the list.
+        limit: Keep only the first `limit` words (e.g. the most frequent ones).
+    """
+    words: list[str] = []
+    first_by_key: dict[str, str] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            word = parse_word_line(line)
+            if word is not None:
+                first = first_by_key.setdefault(cache_key(word, language), word)
+                if first is word or not matches_term(word, first, language):
+                    words.append(word)
+            if limit is not None and len(words) >= limit:
+                break
+    return words
+
+
+@dataclass
+class PrecomputeReport:
+    """Outcome of a precompute run."""
+
+    total: int = 0
+    skipped: int = 0
+    generated: int = 0
+    not_found: int = 0
+    rate_limited: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def finished(self) -> int:
+        """Words handled in this run (generated or failed)."""
+        return self.generated + len(self.failed)
+
+    def format(self) -> str:
+        """Render the report as text."""
+        rate = self.generated / self.elapsed_seconds if self.elapsed_seconds else 0.0
+        lines = [
+            f"Words in list:     {self.total}",
+            f"Already cached:    {self.skipped}",
+            f"Generated:         {self.generated} ({self.not_found} not existing)",
+            f"Failed:            {len(self.failed)}",
+            f"Rate limited:      {self.rate_limited} time(s)",
+            f"Elapsed:           {self.elapsed_seconds:.1f} s",
+            f"Throughput:        {rate:.2f} cards/s ({rate * 60:.0f} cards/min)",
+        ]
+        for word, error in list(self.failed.items())[:20]:
+            lines.append(f"  ✗ {word}: {error[:120]}")
+        if len(self.failed) > 20:
+            lines.append(f"  ... and {len(self.failed) - 20} more (see checkpoint file)")
+        return "\n".join(lines)
+
+
+class RateGate:
+    """
+    Paces LLM calls shared by all workers.
+
+    Enforces an optional requests-per-minute budget and pauses every worker
+    after the provider answers 429, honouring its Retry-After header.
+    """
+
+    def __init__(self, requests_per_minute: float | None = None) -> None:
+        self._interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+
+    async def wait(self) -> None:
+        """Wait until the next call may start."""
+        while True:
+            now = time.monotonic()
+            delay = max(self._paused_until, self._next_slot) - now
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        if self._interval:
+            self._next_slot = max(self._next_slot, now) + self._interval
+
+    def pause(self, seconds: float) -> None:
+        """Hold all workers for `seconds`."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def rate_limit_pause(error: CardBuildError) -> float | None:
+    """
+    Return how long to back off if a card failed because of rate limiting
+    or because the provider is down.
+
+    Returns:
+        Seconds to pause, or None if the error was neither.
+    """
+    if isinstance(error, ProviderUnavailableError):
+        return max(1.0, error.retry_after)
+    original = error.original_error
+    if not isinstance(original, APIStatusError) or original.status_code != 429:
+        return None
+    retry_after = original.response.headers.get("retry-after")
+    try:
+        return float(retry_after) if retry_after else DEFAULT_RATE_LIMIT_PAUSE_SECONDS
+    except ValueError:
+        return DEFAULT_RATE_LIMIT_PAUSE_SECONDS
+
+
+class Precomputer:
+    """Generates cards for a word list concurrently and stores them in the cache."""
+
+    def __init__(
+        self,
+        settings: Settings,
+        cache: CardCache,
+        language: Language,
+        checkpoint_path: Path,
+        concurrency: int = 4,
+        requests_per_minute: float | None = None,
+        retry_failed: bool = True,
+    ) -> None:
+        """
+        Initialize the run.
+
+        Args:
+            settings: Application settings (LLM credentials and model).
+            cache: Cache receiving the cards.
+            language: Language of the word list.
+            checkpoint_path: JSON file recording progress and failures.
+            concurrency: Number of concurrent LLM calls.
+            requests_per_minute: Optional cap on LLM calls per minute.
+            retry_failed: Retry words that failed in a previous run.
+        """
+        self.settings = settings
+        self.cache = cache
+        self.language = language
+        self.checkpoint_path = checkpoint_path
+        self.concurrency = max(1, concurrency)
+        self.retry_failed = retry_failed
+        self.gate = RateGate(requests_per_minute)
+        self.report = PrecomputeReport()
+        self._requeues: dict[str, int] = {}
+
+    def _load_checkpoint(self) -> dict[str, str]:
+        """Return the words that failed in a previous run."""
+        if not self.checkpoint_path.exists():
+            return {}
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                return dict(json.load(f).get("failed", {}))
+        except (json.JSONDecodeError, TypeError, ValueError) as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", self.checkpoint_path, e)
+            return {}
+
+    def _save_checkpoint(self) -> None:
+        """Write progress and failures atomically."""
+        data = {
+            "language": self.language,
+            "updated_at": datetime.now().isoformat(),
+            "total": self.report.total,
+            "cached_before_run": self.report.skipped,
+            "generated": self.report.generated,
+            "failed": self.report.failed,
+        }
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        tmp_path.replace(self.checkpoint_path)
+
+    async def run(self, words: list[str]) -> PrecomputeReport:
+        """Generate cards for every word not cached yet."""
+        started = time.perf_counter()
+        self.report.total = len(words)
+
+        cached = await asyncio.to_thread(self.cache.cached_words, self.language)
+        previous_failures = self._load_checkpoint()
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        for word in words:
+            if cache_key(word, self.language) in cached:
+                self.report.skipped += 1
+            elif word in previous_failures and not self.retry_failed:
+                self.report.failed[word] = previous_failures[word]
+            else:
+                queue.put_nowait(word)
+
+        logger.warning(
+            "%d word(s) to generate, %d already cached", queue.qsize(), self.report.skipped
+        )
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.report.elapsed_seconds = time.perf_counter() - started
+            self._save_checkpoint()
+        return self.report
+
+    async def _worker(self, queue: asyncio.Queue[str]) -> None:
+        while True:
+            word = await queue.get()
+            try:
+                await self._generate(word, queue)
+            finally:
+                queue.task_done()
+
+    async def _generate(self, word: str, queue: asyncio.Queue[str]) -> None:
+        await self.gate.wait()
+        try:
+            card = await build_card(word, self.language, self.settings, request_class="batch")
+        except CardBuildError as e:
+            pause = rate_limit_pause(e)
+            requeues = self._requeues.get(word, 0)
+            if pause is not None and requeues < MAX_RATE_LIMIT_REQUEUES:
+                logger.warning("Rate limited or provider down, pausing all workers for %.0f s", pause)
+                self.report.rate_limited += 1
+                self._requeues[word] = requeues + 1
+                self.gate.pause(pause)
+                queue.put_nowait(word)
+                return
+            self.report.failed[word] = e.message
+        else:
+            await self.cache.put(word, self.language, card, self.settings.MODEL_ID)
+            self.report.failed.pop(word, None)
+            self.report.generated += 1
+            if not card.is_exists:
+                self.report.not_found += 1
+
+        if self.report.finished % CHECKPOINT_EVERY == 0:
+            self._save_checkpoint()
+            logger.warning(
+                "Progress: %d/%d generated, %d failed",
+                self.report.generated,
+                self.report.total - self.report.skipped,
+                len(self.report.failed),
+            )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Precompute cards into the card cache")
+    parser.add_argument("language", choices=language_names())
+    parser.add_argument("word_list", help="Word list or frequency list")
+    parser.add_argument("--limit", type=int, help="Use only the first N words of the list")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent LLM calls")
+    parser.add_argument("--rpm", type=float, help="Maximum LLM calls per minute")
+    parser.add_argument("--cache", help="Card cache path (default: CARD_CACHE_PATH)")
+    parser.add_argument(
+        "--checkpoint", help="Progress file (default: <word_list>.<language>.progress.json)"
+    )
+    parser.add_argument(
+        "--skip-failed", action="store_true", help="Do not retry words that failed before"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Log every LLM attempt")
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> int:
+    """Run a precompute job and return the process exit code."""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    settings = Settings()
+    provider_health.configure(settings.PROVIDER_FAILURE_THRESHOLD, settings.PROVIDER_COOLDOWN_SECONDS)
+
+    cache_path = args.cache or settings.CARD_CACHE_PATH
+    if not cache_path:
+        print("Card cache is disabled: set CARD_CACHE_PATH or pass --cache", file=sys.stderr)
+        return 2
+
+    words = read_word_list(args.word_list, args.language, args.limit)
+    checkpoint = Path(args.checkpoint or f"{args.word_list}.{args.language}.progress.json")
+    cache = CardCache(cache_path)
+    try:
+        precomputer = Precomputer(
+            settings,
+            cache,
+            args.language,
+            checkpoint,
+            concurrency=args.concurrency,
+            requests_per_minute=args.rpm,
+            retry_failed=not args.skip_failed,
+        )
+        report = await precomputer.run(words)
+    finally:
+        cache.close()
+
+    print(report.format())
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
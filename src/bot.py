@@ -1,18 +1,56 @@
 """Telegram bot for vocabulary building using Contextual Immersion method."""
 
+import asyncio
+import hashlib
 import logging
-from dataclasses import dataclass, field
-from datetime import datetime
+import time
 
 from aiogram import Bot, Dispatcher, F, Router
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
 from aiogram.filters import Command, CommandObject
-from aiogram.types import CallbackQuery, FSInputFile, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.types import (
+    CallbackQuery,
+    FSInputFile,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQuery,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    Message,
+    ReplyParameters,
+)
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from src.build_card import CardBuildError, build_card
-from src.card_manager import CardManager, WordHistoryEntry
+from src.build_card import CardBuildError, ProviderUnavailableError, build_card
+from src.card_cache import cache_key, create_card_cache
+from src.callback_tokens import CardAction, decode_callback, derive_secret, encode_callback
+from src.card_manager import CardManager, WordHistoryEntry, format_card
 from src.config import Settings
+from src.exporters import EXPORTERS, get_exporter
+from src.job_queue import CardJob, JobPriority, JobQueue
+from src.languages import LANGUAGES, get_language, language_by_command, language_names
+from src.loop_watchdog import HandlerNameMiddleware, LoopWatchdog
+from src.memory_profiler import MemoryProfiler
+from src.metrics import (
+    ACTIVE_USERS,
+    CARDS,
+    DEFERRED_JOBS,
+    DEGRADED_REQUESTS,
+    HISTORY_SIZE,
+    PENDING_CARDS,
+    PROVIDER_UP,
+    WORD_LOOKUPS,
+    MetricsServer,
+)
+from src.pending_store import PendingCard, create_pending_store
+from src.prompt_variants import prompt_stats
+from src.provider_health import provider_health
 from src.schemas import Card, Language
+from src.telegram_outbox import RateLimiter, RateLimitMiddleware, TelegramOutbox
+from src.tracing import tracer
+from src.user_registry import UserRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -20,21 +58,29 @@ logger = logging.getLogger(__name__)
 MAX_MESSAGE_LENGTH = 4096
 SAFE_MESSAGE_LENGTH = 3800  # Leave some buffer for emojis and formatting
 
+SEARCH_RESULTS = 10
+
+# Windows accepted by /perf, in seconds
+PERF_WINDOWS = {"5m": 5 * 60, "1h": 60 * 60, "24h": 24 * 60 * 60}
+DEFAULT_PERF_WINDOW = "1h"
+
+# How often deferred jobs are checked for resubmission while the provider is down
+DEFERRED_CHECK_SECONDS = 5
+
 router = Router()
 
 
-@dataclass
-class PendingCard:
-    """Card awaiting user action (accept/decline/regenerate)."""
+class TelegramTracingMiddleware(BaseRequestMiddleware):
+    """Records a tracing span for every outgoing Telegram Bot API call."""
 
-    word_identifier: str
-    card: Card
-    language: Language
-    chat_id: int
-    message_id: int
-    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
-    is_duplicate: bool = False
-    duplicate_entry: WordHistoryEntry | None = None
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        with tracer.span(f"telegram.{type(method).__name__}"):
+            return await make_request(bot, method)
 
 
 class VocabularyBot:
@@ -56,14 +102,63 @@ class VocabularyBot:
         """
         self.settings = settings
         self.bot = Bot(token=settings.TELEGRAM_BOT_TOKEN.get_secret_value())
+        self.bot.session.middleware(TelegramTracingMiddleware())
+        self.bot.session.middleware(
+            RateLimitMiddleware(
+                RateLimiter(
+                    settings.TELEGRAM_GLOBAL_RATE,
+                    settings.TELEGRAM_CHAT_RATE,
+                    settings.TELEGRAM_CHAT_BURST,
+                )
+            )
+        )
+        # Card messages are edited through the outbox, which merges edits
+        self.outbox = TelegramOutbox(self.bot)
+        tracer.configure(settings.TRACE_FILE_PATH)
         self.dp = Dispatcher()
-        self.card_manager = CardManager(
-            english_path=settings.ENGLISH_CSV_PATH,
-            german_path=settings.GERMAN_CSV_PATH,
+        self.users = UserRegistry(settings)
+
+        # Store pending cards awaiting user action, keyed by (chat_id, message_id)
+        self.pending = create_pending_store(settings)
+        secret = settings.CALLBACK_SECRET or settings.TELEGRAM_BOT_TOKEN
+        self._callback_secret = derive_secret(secret.get_secret_value())
+
+        self.card_cache = create_card_cache(settings)
+
+        # Unknown words wait for the provider while it is down (degraded mode)
+        provider_health.configure(
+            settings.PROVIDER_FAILURE_THRESHOLD, settings.PROVIDER_COOLDOWN_SECONDS
+        )
+
+        # Card generation runs in background workers, not in handlers
+        self.jobs = JobQueue(
+            self._run_card_job,
+            self._on_job_expired,
+            workers=settings.JOB_WORKERS or settings.LLM_CONCURRENCY,
+            per_user_limit=settings.LLM_CONCURRENCY_PER_USER,
+            persist_path=settings.JOB_QUEUE_PATH,
         )
 
-        # Store pending cards awaiting user action (keyed by message_id)
-        self._pending_cards: dict[int, PendingCard] = {}
+        self.watchdog = None
+        if settings.LOOP_WATCHDOG_ENABLED:
+            self.watchdog = LoopWatchdog(
+                settings.LOOP_STALL_THRESHOLD_MS / 1000, settings.SLOW_CALLBACK_MS / 1000
+            )
+            # Names the handler each update runs in, for blocking-time metrics
+            for observer in (self.dp.message, self.dp.callback_query, self.dp.inline_query):
+                observer.middleware(HandlerNameMiddleware())
+
+        # Allocation tracing for /memstats, optionally from startup
+        self.memory = MemoryProfiler(frames=settings.TRACEMALLOC_FRAMES)
+        if settings.TRACEMALLOC_FRAMES > 0:
+            self.memory.start()
+
+        # Gauges are computed at scrape time from live state
+        PENDING_CARDS.set_callback(lambda: {(): len(self.pending)})
+        HISTORY_SIZE.set_callback(self._history_sizes)
+        ACTIVE_USERS.set_callback(lambda: {(): self.users.active_users})
+        PROVIDER_UP.set_callback(lambda: {(): 0 if provider_health.degraded else 1})
+        DEFERRED_JOBS.set_callback(lambda: {(): self.jobs.deferred})
 
         # Register handlers
         self._register_handlers()
@@ -71,46 +166,73 @@ class VocabularyBot:
     def _register_handlers(self) -> None:
         """Register all message handlers."""
         self.dp.message.register(self._handle_start, Command("start"))
-        self.dp.message.register(self._handle_dump_english, Command("dump_english"))
-        self.dp.message.register(self._handle_dump_german, Command("dump_german"))
+        self.dp.message.register(
+            self._handle_dump, Command(*(spec.dump_command for spec in LANGUAGES.values()))
+        )
+        self.dp.message.register(self._handle_export, Command("export"))
         self.dp.message.register(self._handle_stats, Command("stats"))
-        self.dp.message.register(self._handle_english_word, Command("en"))
-        self.dp.message.register(self._handle_german_word, Command("de"))
+        self.dp.message.register(self._handle_search, Command("search"))
+        self.dp.message.register(self._handle_perf, Command("perf"))
+        self.dp.message.register(self._handle_prompt_stats, Command("prompt_stats"))
+        self.dp.message.register(self._handle_memstats, Command("memstats"))
+        self.dp.message.register(
+            self._handle_word, Command(*(spec.command for spec in LANGUAGES.values()))
+        )
         self.dp.message.register(self._handle_unknown_text, F.text)
 
+        # Inline mode (@bot word) is answered from local data only
+        self.dp.inline_query.register(self._handle_inline_query)
+
         # Register callback handlers for inline buttons
         self.dp.callback_query.register(
-            self._handle_accept, F.data.startswith("accept:")
+            self._handle_accept, F.data.startswith("a|")
         )
         self.dp.callback_query.register(
-            self._handle_decline, F.data.startswith("decline:")
+            self._handle_decline, F.data.startswith("d|")
         )
         self.dp.callback_query.register(
-            self._handle_regenerate, F.data.startswith("regenerate:")
+            self._handle_regenerate, F.data.startswith("r|")
         )
 
-    def _build_card_keyboard(self, message_id: int) -> InlineKeyboardMarkup:
+    def _build_card_keyboard(self, chat_id: int, message_id: int) -> InlineKeyboardMarkup:
         """
         Build inline keyboard for card actions.
 
         Args:
+            chat_id: The chat of the card message.
             message_id: The message ID to use in callbacks.
 
         Returns:
             Inline keyboard with accept, decline, and regenerate buttons.
         """
+
+        def data(action: CardAction) -> str:
+            return encode_callback(self._callback_secret, action, chat_id, message_id)
+
         builder = InlineKeyboardBuilder()
         builder.add(
-            InlineKeyboardButton(text="✅ Accept", callback_data=f"accept:{message_id}"),
-            InlineKeyboardButton(text="❌ Decline", callback_data=f"decline:{message_id}"),
-            InlineKeyboardButton(text="🔄 Regenerate", callback_data=f"regenerate:{message_id}"),
+            InlineKeyboardButton(text="✅ Accept", callback_data=data("accept")),
+            InlineKeyboardButton(text="❌ Decline", callback_data=data("decline")),
+            InlineKeyboardButton(text="🔄 Regenerate", callback_data=data("regenerate")),
         )
         builder.adjust(3)
         return builder.as_markup()
 
+    def _history_sizes(self) -> dict[tuple[str, ...], int]:
+        """Total history size per language over users currently in memory."""
+        sizes: dict[tuple[str, ...], int] = {}
+        for manager in self.users.active_managers():
+            for language, size in manager.get_history_stats(loaded_only=True).items():
+                sizes[(language,)] = sizes.get((language,), 0) + size
+        return sizes
+
+    def _card_manager(self, user_id: int) -> CardManager:
+        """Return the CardManager storing the given user's cards."""
+        return self.users.card_manager(user_id)
+
     async def _check_user(self, message: Message) -> bool:
         """Check if the user is allowed to use the bot."""
-        if message.from_user.id != self.settings.ALLOWED_USER_ID:
+        if not self.users.is_allowed(message.from_user.id):
             await message.answer("⛔ Sorry, this bot is private.")
             return False
         return True
@@ -120,6 +242,13 @@ class VocabularyBot:
         if not await self._check_user(message):
             return
 
+        usage = "".join(
+            f"• `/{spec.command} {spec.example}` — for {spec.label} words\n" for spec in LANGUAGES.values()
+        )
+        dump_commands = "".join(
+            f"/{spec.dump_command} — Get {spec.label} cards and clear buffer\n"
+            for spec in LANGUAGES.values()
+        )
         await message.answer(
             "👋 Welcome to the Vocabulary Builder Bot!\n\n"
             "**Methodology: Contextual Immersion**\n"
@@ -127,100 +256,344 @@ class VocabularyBot:
             "and gap-fill examples — all in the target language. "
             "No translations to Russian!\n\n"
             "**Usage:**\n"
-            "• `/en useful` — for English words\n"
-            "• `/de aufgeben` — for German words\n\n"
+            f"{usage}\n"
             "**Card Format:**\n"
             "*Side 1 (Term):* The word/phrase\n"
             "*Side 2 (Definition):* Definition + Collocations + Gap-fill examples\n\n"
             "**Commands:**\n"
-            "/dump_english — Get English cards (.txt) and clear buffer\n"
-            "/dump_german — Get German cards (.txt) and clear buffer\n"
-            "/stats — View current statistics",
+            f"{dump_commands}"
+            "/export — Get your whole history (`/export de csv anki`)\n"
+            f"Export formats: {', '.join(EXPORTERS)} (default: {', '.join(self.settings.EXPORT_FORMATS)})\n"
+            "/stats — View current statistics\n"
+            "/search — Search your past cards (`/search de haus`)\n"
+            "/perf — Latency per stage (p50/p95/p99)\n"
+            "/prompt_stats — Compare full vs compact prompts",
             parse_mode="Markdown",
         )
 
-    async def _handle_dump_english(self, message: Message) -> None:
-        """Handle /dump_english command - send .txt file and clear buffer."""
+    async def _handle_dump(self, message: Message, command: CommandObject) -> None:
+        """Handle /dump_<language> [formats] commands - send the buffer as files and clear it."""
         if not await self._check_user(message):
             return
 
-        if not self.card_manager.has_cards("english"):
-            await message.answer("📭 No English cards in the buffer yet.")
+        spec = get_language(command.command.lower().removeprefix("dump_"))
+        card_manager = self._card_manager(message.from_user.id)
+        await card_manager.load(spec.name)
+        if not card_manager.has_cards(spec.name):
+            await message.answer(f"📭 No {spec.label} cards in the buffer yet.")
+            return
+
+        formats = await self._export_formats(message, command.args)
+        if not formats:
             return
 
-        txt_path = self.card_manager.dump_txt("english")
-        if txt_path:
+        with tracer.span("dump", language=spec.name):
+            paths = await asyncio.to_thread(card_manager.dump, spec.name, formats)
+        for export_format, path in paths.items():
+            exporter = get_exporter(export_format)
             await message.answer_document(
-                FSInputFile(txt_path, filename="english_vocabulary.txt"),
-                caption="📥 Here are your English cards! Ready for Quizlet Custom Import. Buffer cleared.",
+                FSInputFile(path, filename=f"{spec.name}_vocabulary{exporter.extension}"),
+                caption=f"📥 Here are your {spec.label} cards! Ready for {exporter.target}. Buffer cleared.",
             )
 
-    async def _handle_dump_german(self, message: Message) -> None:
-        """Handle /dump_german command - send .txt file and clear buffer."""
+    async def _handle_export(self, message: Message, command: CommandObject) -> None:
+        """Handle /export command - send the whole card history without touching the buffer."""
         if not await self._check_user(message):
             return
 
-        if not self.card_manager.has_cards("german"):
-            await message.answer("📭 No German cards in the buffer yet.")
+        first, _, rest = (command.args or "").strip().partition(" ")
+        spec = language_by_command(first)
+        if spec is None:
+            await message.answer(
+                "❓ Please specify the language and optionally formats.\n"
+                f"Example: `/export en csv anki` (formats: {', '.join(EXPORTERS)})",
+                parse_mode="Markdown",
+            )
             return
 
-        txt_path = self.card_manager.dump_txt("german")
-        if txt_path:
+        formats = await self._export_formats(message, rest)
+        if not formats:
+            return
+
+        card_manager = self._card_manager(message.from_user.id)
+        with tracer.span("export", language=spec.name):
+            paths = await asyncio.to_thread(card_manager.export_history, spec.name, formats)
+        if not paths:
+            await message.answer(f"📭 No {spec.label} cards in your history yet.")
+            return
+        for export_format, path in paths.items():
+            exporter = get_exporter(export_format)
             await message.answer_document(
-                FSInputFile(txt_path, filename="german_vocabulary.txt"),
-                caption="📥 Here are your German cards! Ready for Quizlet Custom Import. Buffer cleared.",
+                FSInputFile(path, filename=f"{spec.name}_history{exporter.extension}"),
+                caption=f"📥 All your {spec.label} cards! Ready for {exporter.target}.",
             )
 
+    async def _export_formats(self, message: Message, args: str | None) -> list[str]:
+        """
+        Return the export formats named in command arguments.
+
+        Falls back to `EXPORT_FORMATS`; replies and returns an empty list if a
+        format is unknown.
+        """
+        formats = list(dict.fromkeys(name.lower() for name in (args or "").split()))
+        unknown = [name for name in formats if name not in EXPORTERS]
+        if unknown:
+            await message.answer(
+                f"❓ Unknown format: {', '.join(unknown)}. Available: {', '.join(EXPORTERS)}."
+            )
+            return []
+        return formats or list(self.settings.EXPORT_FORMATS)
+
     async def _handle_stats(self, message: Message) -> None:
         """Handle /stats command - show current statistics."""
         if not await self._check_user(message):
             return
 
-        stats = self.card_manager.get_stats()
-        history_stats = self.card_manager.get_history_stats()
+        card_manager = self._card_manager(message.from_user.id)
+        stats = card_manager.get_stats()
+        history_stats = await asyncio.to_thread(card_manager.get_history_stats)
+
+        sections = [
+            f"{spec.flag} {spec.label}:\n"
+            f"   • Cards in buffer: {stats[spec.name].cards_count}\n"
+            f"   • Unique words (session): {stats[spec.name].unique_words}\n"
+            f"   • Total in history: {history_stats[spec.name]}"
+            for spec in LANGUAGES.values()
+        ]
+        await message.answer("📊 Current Statistics\n\n" + "\n\n".join(sections))
+
+    async def _handle_search(self, message: Message, command: CommandObject) -> None:
+        """Handle /search command - full-text search over the card history."""
+        if not await self._check_user(message):
+            return
+
+        query = (command.args or "").strip()
+        language: Language | None = None
+        first, _, rest = query.partition(" ")
+        if spec := language_by_command(first):
+            language, query = spec.name, rest.strip()
 
-        await message.answer(
-            "📊 Current Statistics\n\n"
-            f"🇬🇧 English:\n"
-            f"   • Cards in buffer: {stats['english'].cards_count}\n"
-            f"   • Unique words (session): {stats['english'].unique_words}\n"
-            f"   • Total in history: {history_stats['english']}\n\n"
-            f"🇩🇪 German:\n"
-            f"   • Cards in buffer: {stats['german'].cards_count}\n"
-            f"   • Unique words (session): {stats['german'].unique_words}\n"
-            f"   • Total in history: {history_stats['german']}"
+        if not query:
+            await message.answer(
+                "❓ Please provide a search query.\n"
+                "Example: `/search give up` or `/search de haus`",
+                parse_mode="Markdown",
+            )
+            return
+
+        card_manager = self._card_manager(message.from_user.id)
+        with tracer.span("search", language=language):
+            hits = await asyncio.to_thread(card_manager.search, query, language, SEARCH_RESULTS)
+
+        if not hits:
+            await message.answer(f'🔍 Nothing found for "{query[:100]}".')
+            return
+
+        lines = []
+        for hit in hits:
+            language_emoji = get_language(hit.language).flag
+            definition = hit.definition if len(hit.definition) <= 150 else hit.definition[:150] + "…"
+            lines.append(f"{language_emoji} {hit.word} ({hit.added_at[:10]})\n{definition}")
+
+        await self._send_long_message(
+            message.chat.id,
+            f'🔍 Results for "{query[:100]}":\n\n' + "\n\n".join(lines),
         )
 
-    async def _handle_english_word(
-        self, message: Message, command: CommandObject
-    ) -> None:
-        """Handle /en command - process English words."""
+    async def _inline_lookup(
+        self, user_id: int, query: str, language: Language | None
+    ) -> list[tuple[Language, str, Card]]:
+        """
+        Find cards for an inline query in the card cache and the history index.
+
+        Both lookups run concurrently in worker threads; whatever has not
+        finished within `INLINE_LATENCY_BUDGET_MS` is dropped.
+
+        Returns:
+            (language, term, card) triples, cached exact matches first.
+        """
+        languages: list[Language] = [language] if language else language_names()
+        card_manager = self._card_manager(user_id)
+
+        lookups = [
+            asyncio.create_task(
+                asyncio.to_thread(
+                    card_manager.search, query, language, self.settings.INLINE_MAX_RESULTS
+                )
+            )
+        ]
+        if self.card_cache is not None:
+            lookups += [
+                asyncio.create_task(asyncio.to_thread(self.card_cache.get_sync, query, lang))
+                for lang in languages
+            ]
+
+        done, pending = await asyncio.wait(
+            lookups, timeout=self.settings.INLINE_LATENCY_BUDGET_MS / 1000
+        )
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("Inline lookup exceeded budget; %d lookup(s) dropped", len(pending))
+
+        cards: list[tuple[Language, str, Card]] = []
+        for lang, task in zip(languages, lookups[1:]):
+            if task in done and task.exception() is None:
+                card = task.result()
+                if card is not None and card.is_exists:
+                    cards.append((lang, card.normalized_term or query, card))
+
+        search = lookups[0]
+        if search in done and search.exception() is None:
+            cards += [(hit.language, hit.word, hit.to_card()) for hit in search.result()]
+        return cards
+
+    async def _handle_inline_query(self, inline_query: InlineQuery) -> None:
+        """Handle inline queries (`@bot word`) with cards from history and the cache."""
+        with tracer.span("inline_query") as span:
+            if not self.users.is_allowed(inline_query.from_user.id):
+                await inline_query.answer([], cache_time=self.settings.INLINE_CACHE_SECONDS, is_personal=True)
+                return
+
+            query = inline_query.query.strip()
+            language: Language | None = None
+            first, _, rest = query.partition(" ")
+            if spec := language_by_command(first):
+                language, query = spec.name, rest.strip()
+
+            results: list[InlineQueryResultArticle] = []
+            if query:
+                seen: set[tuple[str, str]] = set()
+                for lang, term, card in await self._inline_lookup(
+                    inline_query.from_user.id, query, language
+                ):
+                    key = (lang, cache_key(term, lang))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    language_emoji = get_language(lang).flag
+                    results.append(
+                        InlineQueryResultArticle(
+                            id=hashlib.sha1(f"{lang}:{key[1]}".encode("utf-8")).hexdigest()[:32],
+                            title=f"{language_emoji} {term}",
+                            description=(card.definition or "")[:120],
+                            input_message_content=InputTextMessageContent(
+                                message_text=f"⚡️ {term}\n\n{format_card(card)}"[
+                                    :MAX_MESSAGE_LENGTH
+                                ]
+                            ),
+                        )
+                    )
+                    if len(results) >= self.settings.INLINE_MAX_RESULTS:
+                        break
+
+            span.set(results=len(results))
+            await inline_query.answer(
+                results, cache_time=self.settings.INLINE_CACHE_SECONDS, is_personal=True
+            )
+
+    async def _handle_perf(self, message: Message, command: CommandObject) -> None:
+        """Handle /perf command - show latency percentiles per stage and language."""
         if not await self._check_user(message):
             return
-        await self._process_word(message, command, "english")
 
-    async def _handle_german_word(
-        self, message: Message, command: CommandObject
-    ) -> None:
-        """Handle /de command - process German words."""
+        window_name = (command.args or DEFAULT_PERF_WINDOW).strip()
+        if window_name not in PERF_WINDOWS:
+            await message.answer(
+                f"❓ Unknown window. Use one of: {', '.join(PERF_WINDOWS)}"
+            )
+            return
+
+        summaries = tracer.summary(PERF_WINDOWS[window_name])
+        if not summaries:
+            await message.answer(f"📭 No timings recorded in the last {window_name}.")
+            return
+
+        lines = [f"{'stage':<30} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8}"]
+        for summary in summaries:
+            name = summary.stage if summary.language is None else f"  {summary.language}"
+            lines.append(
+                f"{name[:30]:<30} {summary.count:>5} {summary.p50_ms:>8.1f} "
+                f"{summary.p95_ms:>8.1f} {summary.p99_ms:>8.1f}"
+            )
+
+        await self._send_long_message(
+            message.chat.id,
+            f"⏱ Latency (ms), last {window_name}\n\n" + "\n".join(lines),
+        )
+
+    async def _handle_prompt_stats(self, message: Message) -> None:
+        """Handle /prompt_stats command - compare prompt variants per request class."""
         if not await self._check_user(message):
             return
-        await self._process_word(message, command, "german")
+
+        rows = prompt_stats.items()
+        if not rows:
+            await message.answer("📭 No cards generated yet.")
+            return
+
+        lines = []
+        for variant, request_class, stats in rows:
+            lines.append(
+                f"{request_class} / {variant}:\n"
+                f"   • Calls: {stats.calls} (failed: {stats.failed_calls})\n"
+                f"   • Latency p50/p95: {stats.latency.percentile(50):.0f} / "
+                f"{stats.latency.percentile(95):.0f} ms\n"
+                f"   • Validation failures: {stats.validation_failure_rate:.1%} of attempts\n"
+                f"   • Tokens per call: {stats.avg_prompt_tokens:.0f} prompt, "
+                f"{stats.avg_completion_tokens:.0f} completion"
+            )
+
+        await self._send_long_message(
+            message.chat.id, "🧪 Prompt variants\n\n" + "\n\n".join(lines)
+        )
+
+    async def _handle_memstats(self, message: Message, command: CommandObject) -> None:
+        """Handle /memstats [start|stop] command - show memory use (owner only)."""
+        if not self.users.is_admin(message.from_user.id):
+            await message.answer("⛔ /memstats is only available to the bot owner.")
+            return
+
+        action = (command.args or "").strip().lower()
+        if action == "start":
+            self.memory.start()
+            await message.answer("🧠 Allocation tracing started; /memstats shows growth between calls.")
+            return
+        if action == "stop":
+            self.memory.stop()
+            await message.answer("🧠 Allocation tracing stopped.")
+            return
+        if action:
+            await message.answer("❓ Usage: /memstats [start|stop]")
+            return
+
+        # Snapshots and object counts walk the whole heap
+        report = await asyncio.to_thread(self.memory.report)
+        await self._send_long_message(message.chat.id, "🧠 Memory\n\n" + report.format())
+
+    async def _handle_word(self, message: Message, command: CommandObject) -> None:
+        """Handle language commands (/en, /de, ...) - process a word."""
+        if not await self._check_user(message):
+            return
+        await self._process_word(message, command, language_by_command(command.command).name)
 
     async def _handle_unknown_text(self, message: Message) -> None:
-        """Handle plain text without command - prompt user to use /en or /de."""
+        """Handle plain text without command - prompt user to use a language command."""
         if not await self._check_user(message):
             return
 
         await message.answer(
             "❓ Please specify the language:\n"
-            "• `/en word` — for English\n"
-            "• `/de word` — for German",
+            + "\n".join(f"• `/{spec.command} word` — for {spec.label}" for spec in LANGUAGES.values()),
             parse_mode="Markdown",
         )
 
     async def _send_long_message(
-        self, chat_id: int, text: str, message: Message | None = None
+        self,
+        chat_id: int,
+        text: str,
+        message_id: int | None = None,
+        reply_markup: InlineKeyboardMarkup | None = None,
     ) -> None:
         """
         Send a long message by splitting it into multiple parts if needed.
@@ -228,11 +601,12 @@ class VocabularyBot:
         Args:
             chat_id: The chat ID to send the message to.
             text: The text to send.
-            message: If provided, edit this message instead of sending new ones.
+            message_id: If provided, edit this message instead of sending new ones.
+            reply_markup: Keyboard set on the edited message in the same request.
         """
         if len(text) <= SAFE_MESSAGE_LENGTH:
-            if message:
-                await message.edit_text(text)
+            if message_id:
+                await self.outbox.edit(chat_id, message_id, text=text, reply_markup=reply_markup)
             else:
                 await self.bot.send_message(chat_id, text)
             return
@@ -260,150 +634,326 @@ class VocabularyBot:
 
         # Send chunks
         for i, chunk in enumerate(chunks):
-            if i == 0 and message:
-                await message.edit_text(chunk)
+            if i == 0 and message_id:
+                await self.outbox.edit(chat_id, message_id, text=chunk, reply_markup=reply_markup)
             else:
                 await self.bot.send_message(chat_id, chunk)
 
+    def _job_deadline(self) -> float:
+        """Deadline for an interactive or regenerate job submitted now."""
+        return time.time() + self.settings.JOB_DEADLINE_SECONDS
+
     async def _process_word(
         self, message: Message, command: CommandObject, language: Language
     ) -> None:
-        """Process a word for the specified language."""
-        word = command.args
-        if not word or not word.strip():
-            await message.answer(
-                f"❓ Please provide a word after the command.\n"
-                f"Example: `/{command.command} {'useful' if language == 'english' else 'aufgeben'}`",
-                parse_mode="Markdown",
-            )
-            return
-
-        # Use full input as identifier (preserves context like "bank (river)")
-        word_identifier = command.args
-        word = word.strip()
+        """Validate a word and queue a job generating its card."""
+        with tracer.span("process_word", language=language):
+            word = command.args
+            if not word or not word.strip():
+                await message.answer(
+                    f"❓ Please provide a word after the command.\n"
+                    f"Example: `/{command.command} {get_language(language).example}`",
+                    parse_mode="Markdown",
+                )
+                return
 
-        # Check for duplicate in history using full input as key
-        is_duplicate, duplicate_entry = self.card_manager.has_duplicate(
-            word_identifier, language
-        )
+            # Use full input as identifier (preserves context like "bank (river)")
+            word_identifier = command.args
+            word = word.strip()
 
-        if is_duplicate:
-            duplicate_warning = (
-                f"⚠️ This word was already added before!\n\n"
-                f"Previous definition: {duplicate_entry.definition}\n\n"
-                f"Added on: {duplicate_entry.added_at[:10]}\n\n"
-                f"Continuing anyway..."
+            # Check for duplicate in history; inflected forms match their lemma
+            card_manager = self._card_manager(message.from_user.id)
+            await card_manager.load(language)
+            is_duplicate, duplicate_entry = card_manager.has_duplicate(
+                word_identifier, language
+            )
+            WORD_LOOKUPS.inc(
+                language=language, kind="duplicate", result="hit" if is_duplicate else "miss"
             )
-            # Send warning, then continue with processing
-            await message.answer(duplicate_warning)
-
-        # Send processing message
-        processing_msg = await message.answer("🔄 Processing your word...")
 
-        try:
-            # Build the card using LLM (includes retry logic)
-            card = await build_card(word, language, self.settings)
+            # While the provider is down, known words are answered without the LLM
+            degraded = provider_health.degraded
 
-            # Check if word exists
-            if not card.is_exists:
-                await self._send_long_message(
-                    message.chat.id,
-                    f'❌ Word not found: "{word_identifier}"\n\n'
-                    f"This word does not exist in {language.capitalize()}, "
-                    f"or it may be a typo, made-up word, or gibberish.",
-                    message=processing_msg,
+            if is_duplicate and not degraded:
+                duplicate_warning = (
+                    f"⚠️ This word was already added before!\n\n"
+                    f"Previous definition: {duplicate_entry.definition}\n\n"
+                    f"Added on: {duplicate_entry.added_at[:10]}\n\n"
+                    f"Continuing anyway..."
                 )
-                return
+                # Send warning, then continue with processing
+                await message.answer(duplicate_warning)
 
-            # Store as pending card
-            pending = PendingCard(
+            # Send processing message; the job fills it in once the card is ready
+            processing_msg = await message.answer("🔄 Processing your word...")
+
+            job = CardJob(
+                word=word,
                 word_identifier=word_identifier,
-                card=card,
                 language=language,
-                chat_id=message.chat.id,
+                user_id=message.from_user.id,
+                chat_id=processing_msg.chat.id,
                 message_id=processing_msg.message_id,
+                priority=JobPriority.INTERACTIVE,
+                deadline=self._job_deadline(),
                 is_duplicate=is_duplicate,
-                duplicate_entry=duplicate_entry,
-            )
-            self._pending_cards[processing_msg.message_id] = pending
-
-            # Format response
-            language_emoji = "🇬🇧" if language == "english" else "🇩🇪"
-            language_name = language.capitalize()
-
-            duplicate_notice = "⚠️ (duplicate) " if is_duplicate else ""
-
-            response = (
-                f'⚡️ Term: "{word_identifier}" {duplicate_notice}\n\n'
-                f"📝 Definition:\n{card.definition}\n\n"
-                f"🔗 Collocations:\n"
-                + "\n".join(f"• {c}" for c in card.collocations)
-                + "\n\n"
-                f"📚 Examples:\n"
-                + "\n".join(f"• {e}" for e in card.examples)
             )
 
-            # Update message with card content and inline buttons
-            await self._send_long_message(
-                message.chat.id,
-                response,
-                message=processing_msg,
+            # Words generated before (or precomputed) are answered without the LLM
+            if self.card_cache is not None:
+                card = await self.card_cache.get(word, language)
+                WORD_LOOKUPS.inc(
+                    language=language, kind="cache", result="miss" if card is None else "hit"
+                )
+                if card is not None:
+                    await self._deliver_card(job, card, action="cached")
+                    return
+
+            if degraded:
+                await self._serve_degraded(job, duplicate_entry)
+                return
+
+            await self.jobs.submit(job)
+
+    async def _serve_degraded(
+        self, job: CardJob, history_entry: WordHistoryEntry | None
+    ) -> None:
+        """Answer a word from history, or defer it, while the provider is down."""
+        if history_entry is None:
+            await self._defer_job(job)
+            return
+
+        DEGRADED_REQUESTS.inc(language=job.language, result="history")
+        await self._send_long_message(
+            job.chat_id,
+            f'📚 "{job.word_identifier}" is already in your history.\n\n'
+            f"📝 Definition:\n{history_entry.definition}\n\n"
+            f"Added on: {history_entry.added_at[:10]}\n\n"
+            "⚠️ Card generation is temporarily unavailable, so no new card was created.",
+            message_id=job.message_id,
+        )
+
+    async def _defer_job(self, job: CardJob) -> None:
+        """Park a job until the provider recovers and tell the user."""
+        first_time = not job.deferred
+        self.jobs.defer(job)
+        if not first_time:
+            # A probe failed; the user already knows the word is waiting
+            return
+        DEGRADED_REQUESTS.inc(language=job.language, result="queued")
+        if job.priority == JobPriority.REGENERATE:
+            # The current card keeps its buttons, so it can still be accepted
+            # or declined (which cancels the deferred job); reply below it
+            await self.bot.send_message(
+                job.chat_id,
+                "⏳ Card generation is temporarily unavailable. A new card for "
+                f'"{job.word_identifier[:100]}" is queued and will replace this one when it is ready. '
+                "You can still accept or decline the current card.",
+                reply_parameters=ReplyParameters(message_id=job.message_id),
             )
-            await self.bot.edit_message_reply_markup(
-                chat_id=processing_msg.chat.id,
-                message_id=processing_msg.message_id,
-                reply_markup=self._build_card_keyboard(processing_msg.message_id),
+            return
+        await self._send_long_message(
+            job.chat_id,
+            f'⏳ Card generation is temporarily unavailable. "{job.word_identifier[:100]}" '
+            "is queued, and you will get a message when its card is ready.",
+            message_id=job.message_id,
+        )
+
+    async def _resume_deferred_jobs(self) -> None:
+        """Resubmit deferred jobs once the provider may be called again."""
+        while True:
+            await asyncio.sleep(DEFERRED_CHECK_SECONDS)
+            if not self.jobs.deferred or provider_health.state == "probing":
+                continue
+            if provider_health.state == "healthy":
+                resumed = await self.jobs.resume_deferred()
+                logger.info("Provider healthy, resumed %d deferred job(s)", resumed)
+            elif provider_health.retry_after() == 0:
+                # One job probes the provider; the rest follow once it succeeds
+                await self.jobs.resume_deferred(limit=1)
+
+    def _format_card(self, pending: PendingCard, regenerated: bool = False) -> str:
+        """Render a pending card as message text."""
+        card = pending.card
+        duplicate_notice = "⚠️ (duplicate) " if pending.is_duplicate else ""
+
+        response = (
+            f'⚡️ Term: "{pending.word_identifier}" {duplicate_notice}\n\n'
+            f"📝 Definition:\n{card.definition}\n\n"
+            f"🔗 Collocations:\n"
+            + "\n".join(f"• {c}" for c in card.collocations)
+            + "\n\n"
+            f"📚 Examples:\n"
+            + "\n".join(f"• {e}" for e in card.examples)
+        )
+        if regenerated:
+            response += "\n\n🔄 Regenerated"
+        return response
+
+    async def _run_card_job(self, job: CardJob) -> None:
+        """Generate (or regenerate) a card and render it into the job's message."""
+        regenerate = job.priority == JobPriority.REGENERATE
+        try:
+            # Build the card using LLM (includes retry logic)
+            async with self.users.llm_slot(job.user_id):
+                card = await build_card(
+                    job.word, job.language, self.settings, request_class=job.request_class
+                )
+            if self.card_cache is not None:
+                await self.card_cache.put(job.word, job.language, card, self.settings.MODEL_ID)
+
+            await self._deliver_card(
+                job, card, action="regenerated" if regenerate else "generated"
             )
+            if job.deferred:
+                # The card replaced a message sent long ago; notify the user
+                await self.bot.send_message(
+                    job.chat_id,
+                    f'🔔 Your queued word "{job.word_identifier[:100]}" has been processed.',
+                    reply_parameters=ReplyParameters(message_id=job.message_id),
+                )
 
         except CardBuildError as e:
-            logger.error("Card build failed for word '%s': %s", word[:50], e.message)
+            if isinstance(e, ProviderUnavailableError) or provider_health.degraded:
+                # The provider went down; generate the card once it recovers. A
+                # regenerated card stays pending until the deferred job replaces it
+                await self._defer_job(job)
+                return
+            logger.error("Card build failed for word '%s': %s", job.word[:50], e.message)
+            action = "regenerate" if regenerate else "create"
             error_text = (
-                f"❌ Failed to create card after 3 attempts.\n\n"
-                f"Word: {word[:100]}{'...' if len(word) > 100 else ''}\n"
+                f"❌ Failed to {action} card after 3 attempts.\n\n"
+                f"Word: {job.word[:100]}{'...' if len(job.word) > 100 else ''}\n"
                 f"Error: {e.message[:300]}"
             )
-            await self._send_long_message(
-                message.chat.id, error_text, message=processing_msg
-            )
+            await self._fail_job(job, error_text)
 
         except Exception as e:
-            logger.exception("Unexpected error processing word: %s", word[:50])
+            logger.exception("Unexpected error processing word: %s", job.word[:50])
             error_text = (
                 f"❌ Unexpected error occurred.\n\n"
                 f"Please try again later or contact support.\n"
                 f"Details: {type(e).__name__}: {str(e)[:200]}"
             )
-            await self._send_long_message(
-                message.chat.id, error_text, message=processing_msg
+            await self._fail_job(job, error_text)
+
+    async def _deliver_card(self, job: CardJob, card: Card, action: str) -> None:
+        """
+        Store a card as pending and render it into the job's message.
+
+        Args:
+            job: The job the card was produced for.
+            card: The generated or cached card.
+            action: `CARDS` metric action to count the card under.
+        """
+        regenerate = job.priority == JobPriority.REGENERATE
+        if regenerate:
+            pending = await self.pending.get(job.key)
+            if pending is None:
+                # The card was accepted or declined meanwhile
+                return
+            pending.card = card
+        else:
+            # Check if word exists
+            if not card.is_exists:
+                await self._send_long_message(
+                    job.chat_id,
+                    f'❌ Word not found: "{job.word_identifier}"\n\n'
+                    f"This word does not exist in {job.language.capitalize()}, "
+                    f"or it may be a typo, made-up word, or gibberish.",
+                    message_id=job.message_id,
+                )
+                return
+
+            pending = PendingCard(
+                word_identifier=job.word_identifier,
+                card=card,
+                language=job.language,
+                chat_id=job.chat_id,
+                message_id=job.message_id,
+                user_id=job.user_id,
+                is_duplicate=job.is_duplicate,
             )
 
+        await self.pending.put(pending)
+        CARDS.inc(language=job.language, action=action)
+
+        # Update message with card content and inline buttons in one request
+        await self._send_long_message(
+            job.chat_id,
+            self._format_card(pending, regenerated=regenerate),
+            message_id=job.message_id,
+            reply_markup=self._build_card_keyboard(job.chat_id, job.message_id),
+        )
+
+    async def _on_job_expired(self, job: CardJob) -> None:
+        """Tell the user a job missed its deadline."""
+        logger.warning("Job for word '%s' missed its deadline", job.word[:50])
+        await self._fail_job(
+            job,
+            f'⌛ Timed out while generating the card for "{job.word_identifier[:100]}".\n\n'
+            "Please try again.",
+        )
+
+    async def _fail_job(self, job: CardJob, error_text: str) -> None:
+        """Show a job's error in its message."""
+        await self._send_long_message(job.chat_id, error_text, message_id=job.message_id)
+        if job.priority == JobPriority.REGENERATE:
+            # Remove from pending as regeneration failed
+            await self.pending.take(job.key)
+
+    async def _edit_callback_message(self, callback: CallbackQuery, text: str) -> None:
+        """Replace the text (and remove the buttons) of a callback's card message."""
+        await self.outbox.edit(callback.message.chat.id, callback.message.message_id, text=text)
+
+    async def _load_pending(
+        self, callback: CallbackQuery, take: bool = False
+    ) -> PendingCard | None:
+        """
+        Verify a button's callback data and load the card it refers to.
+
+        Args:
+            callback: The button callback.
+            take: Remove the card from the store while loading it.
+
+        Returns:
+            The pending card, or None if the data is invalid or the card is gone.
+        """
+        token = decode_callback(self._callback_secret, callback.data)
+        if token is None:
+            logger.error("Invalid callback data: %s", callback.data)
+            return None
+
+        key = (token.chat_id, token.message_id)
+        if take:
+            # Accepting or declining supersedes a regeneration still in flight
+            self.jobs.cancel(key)
+        pending = await (self.pending.take(key) if take else self.pending.get(key))
+        if not pending:
+            await self._edit_callback_message(callback, "❌ This card is no longer available.")
+        return pending
+
     async def _handle_accept(self, callback: CallbackQuery) -> None:
         """Handle Accept button - add card to buffer."""
         await callback.answer()
 
-        if callback.from_user.id != self.settings.ALLOWED_USER_ID:
+        if not self.users.is_allowed(callback.from_user.id):
             await callback.message.answer("⛔ Sorry, this bot is private.")
             return
 
-        # Extract message_id from callback data
-        try:
-            message_id = int(callback.data.split(":")[1])
-        except (IndexError, ValueError):
-            logger.error("Invalid callback data: %s", callback.data)
-            return
-
-        pending = self._pending_cards.get(message_id)
+        pending = await self._load_pending(callback, take=True)
         if not pending:
-            await callback.message.edit_text("❌ This card is no longer available.")
             return
 
         # Add card to manager
-        cards_added = self.card_manager.add_card(
+        card_manager = self._card_manager(pending.user_id)
+        await card_manager.load(pending.language)
+        cards_added = card_manager.add_card(
             pending.word_identifier, pending.card, pending.language
         )
 
-        language_emoji = "🇬🇧" if pending.language == "english" else "🇩🇪"
-        language_name = pending.language.capitalize()
+        spec = get_language(pending.language)
+        language_emoji, language_name = spec.flag, spec.label
 
         # Show normalized term if different from original input
         normalized_term = pending.card.normalized_term
@@ -421,114 +971,78 @@ class VocabularyBot:
                 f"Added {cards_added} card for {language_name} {language_emoji}"
             )
 
-        await callback.message.edit_text(message)
-
-        # Remove from pending
-        del self._pending_cards[message_id]
+        await self._edit_callback_message(callback, message)
+        CARDS.inc(language=pending.language, action="accepted")
 
     async def _handle_decline(self, callback: CallbackQuery) -> None:
         """Handle Decline button - discard the card."""
         await callback.answer()
 
-        if callback.from_user.id != self.settings.ALLOWED_USER_ID:
+        if not self.users.is_allowed(callback.from_user.id):
             await callback.message.answer("⛔ Sorry, this bot is private.")
             return
 
-        # Extract message_id from callback data
-        try:
-            message_id = int(callback.data.split(":")[1])
-        except (IndexError, ValueError):
-            logger.error("Invalid callback data: %s", callback.data)
-            return
-
-        pending = self._pending_cards.get(message_id)
+        pending = await self._load_pending(callback, take=True)
         if not pending:
-            await callback.message.edit_text("❌ This card is no longer available.")
             return
 
-        await callback.message.edit_text(
+        await self._edit_callback_message(
+            callback,
             f'❌ Card declined: "{pending.word_identifier}"\n\n'
-            "The card was not added to your buffer."
+            "The card was not added to your buffer.",
         )
-
-        # Remove from pending
-        del self._pending_cards[message_id]
+        CARDS.inc(language=pending.language, action="declined")
 
     async def _handle_regenerate(self, callback: CallbackQuery) -> None:
-        """Handle Regenerate button - generate a new card for the same word."""
+        """Handle Regenerate button - queue a new card for the same word."""
         await callback.answer("🔄 Regenerating...")
 
-        if callback.from_user.id != self.settings.ALLOWED_USER_ID:
+        if not self.users.is_allowed(callback.from_user.id):
             await callback.message.answer("⛔ Sorry, this bot is private.")
             return
 
-        # Extract message_id from callback data
-        try:
-            message_id = int(callback.data.split(":")[1])
-        except (IndexError, ValueError):
-            logger.error("Invalid callback data: %s", callback.data)
-            return
-
-        pending = self._pending_cards.get(message_id)
+        pending = await self._load_pending(callback)
         if not pending:
-            await callback.message.edit_text("❌ This card is no longer available.")
             return
 
-        word = pending.word_identifier.strip()
-
-        try:
-            # Build new card using LLM
-            new_card = await build_card(word, pending.language, self.settings)
-
-            # Update pending card with new content
-            pending.card = new_card
-
-            # Format response
-            duplicate_notice = "⚠️ (duplicate) " if pending.is_duplicate else ""
-
-            response = (
-                f'⚡️ Term: "{pending.word_identifier}" {duplicate_notice}\n\n'
-                f"📝 Definition:\n{new_card.definition}\n\n"
-                f"🔗 Collocations:\n"
-                + "\n".join(f"• {c}" for c in new_card.collocations)
-                + "\n\n"
-                f"📚 Examples:\n"
-                + "\n".join(f"• {e}" for e in new_card.examples)
-                + "\n\n"
-                "🔄 Regenerated"
-            )
-
-            await self._send_long_message(
-                callback.message.chat.id, response, message=callback.message
+        # The current card stays pending (and can still be accepted) until the job replaces it
+        await self.jobs.submit(
+            CardJob(
+                word=pending.word_identifier.strip(),
+                word_identifier=pending.word_identifier,
+                language=pending.language,
+                user_id=pending.user_id,
+                chat_id=pending.chat_id,
+                message_id=pending.message_id,
+                priority=JobPriority.REGENERATE,
+                deadline=self._job_deadline(),
+                is_duplicate=pending.is_duplicate,
             )
-            await self.bot.edit_message_reply_markup(
-                chat_id=callback.message.chat.id,
-                message_id=callback.message.message_id,
-                reply_markup=self._build_card_keyboard(callback.message.message_id),
-            )
-
-        except CardBuildError as e:
-            logger.error("Card build failed for word '%s': %s", word[:50], e.message)
-            error_text = (
-                f"❌ Failed to regenerate card after 3 attempts.\n\n"
-                f"Word: {word[:100]}{'...' if len(word) > 100 else ''}\n"
-                f"Error: {e.message[:300]}"
-            )
-            await callback.message.edit_text(error_text)
-            # Remove from pending as regeneration failed
-            del self._pending_cards[message_id]
-
-        except Exception as e:
-            logger.exception("Unexpected error regenerating word: %s", word[:50])
-            error_text = (
-                f"❌ Unexpected error occurred during regeneration.\n\n"
-                f"Details: {type(e).__name__}: {str(e)[:200]}"
-            )
-            await callback.message.edit_text(error_text)
-            # Remove from pending as regeneration failed
-            del self._pending_cards[message_id]
+        )
 
     async def run(self) -> None:
         """Start the bot polling."""
         logger.info("Starting Vocabulary Builder Bot...")
-        await self.dp.start_polling(self.bot)
+        eviction_task = asyncio.create_task(self.users.run_eviction())
+        resume_task = asyncio.create_task(self._resume_deferred_jobs())
+        metrics_server = None
+        if self.settings.METRICS_PORT:
+            metrics_server = MetricsServer(self.settings.METRICS_HOST, self.settings.METRICS_PORT)
+            await metrics_server.start()
+        if self.watchdog is not None:
+            await self.watchdog.start()
+        await self.jobs.start()
+        try:
+            await self.dp.start_polling(self.bot)
+        finally:
+            eviction_task.cancel()
+            resume_task.cancel()
+            await self.jobs.stop()
+            if self.watchdog is not None:
+                await self.watchdog.stop()
+            if metrics_server is not None:
+                await metrics_server.stop()
+            self.pending.close()
+            if self.card_cache is not None:
+                self.card_cache.close()
+            tracer.close()
@@ -1,15 +1,22 @@
 """LLM-based card generation module using Contextual Immersion method."""
 
 import asyncio
+import functools
 import logging
 import pprint
-from pathlib import Path
+import time
 
 from openai import APIConnectionError, APIStatusError, APITimeoutError, AsyncOpenAI
 from pydantic import ValidationError
 
+from src.card_parser import card_response_format, parse_card
 from src.config import Settings
+from src.languages import get_language
+from src.metrics import LLM_REQUEST_SECONDS, LLM_RETRIES, LLM_TOKENS
+from src.prompt_variants import PromptVariant, RequestClass, prompt_stats, select_variant
+from src.provider_health import provider_health
 from src.schemas import Card, Language
+from src.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -27,25 +34,45 @@ class CardBuildError(Exception):
         super().__init__(message)
 
 
-def load_system_prompt(language: Language) -> str:
+class ProviderUnavailableError(CardBuildError):
+    """Raised without calling the LLM while the provider is marked down."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"LLM provider unavailable, retry in {retry_after:.0f} s")
+
+
+@functools.lru_cache(maxsize=4)
+def _get_client(api_key: str, base_url: str) -> AsyncOpenAI:
+    """Return the client for a provider, created once so its connection pool is reused."""
+    return AsyncOpenAI(api_key=api_key, base_url=base_url)
+
+
+@functools.lru_cache(maxsize=None)
+def load_system_prompt(language: Language, variant: PromptVariant = "full") -> str:
     """
     Load the system prompt for the specified language.
 
+    Prompts are read from disk on first use of a language and cached.
+
     Args:
-        language: The language to load prompt for ('english' or 'german').
+        language: The language to load prompt for (a registered language name).
+        variant: 'full' or 'compact' version of the prompt.
 
     Returns:
         The system prompt content.
     """
-    prompt_filename = (
-        "english_prompt.md" if language == "english" else "german_prompt.md"
-    )
-    prompt_path = Path(__file__).parent.parent / "prompts" / prompt_filename
+    prompt_path = get_language(language).prompt_path(compact=variant == "compact")
     with open(prompt_path, "r", encoding="utf-8") as file:
         return file.read()
 
 
-async def build_card(word: str, language: Language, settings: Settings) -> Card:
+async def build_card(
+    word: str,
+    language: Language,
+    settings: Settings,
+    request_class: RequestClass = "interactive",
+) -> Card:
     """
     Build a vocabulary card for the given word using LLM with retry logic.
 
@@ -56,82 +83,160 @@ async def build_card(word: str, language: Language, settings: Settings) -> Card:
 
     Args:
         word: The word or phrase to create a card for.
-        language: The language of the word ('english' or 'german').
+        language: The language of the word (a registered language name).
         settings: Application settings with API credentials.
+        request_class: Kind of request, used to pick the prompt variant.
 
     Returns:
         Card object with definition, collocations, and gap-fill examples.
 
     Raises:
+        ProviderUnavailableError: If the provider is down (see `provider_health`).
         CardBuildError: If all retry attempts fail.
     """
-    client = AsyncOpenAI(
-        api_key=settings.OPENROUTER_API_KEY.get_secret_value(),
-        base_url=settings.OPENROUTER_BASE_URL,
+    client = _get_client(
+        settings.OPENROUTER_API_KEY.get_secret_value(), settings.OPENROUTER_BASE_URL
     )
 
     last_error: Exception | None = None
-    system_prompt = load_system_prompt(language)
+    variant = select_variant(settings, request_class)
+    system_prompt = load_system_prompt(language, variant)
+
+    call_started = time.perf_counter()
+    validation_failures = 0
+    prompt_tokens = 0
+    completion_tokens = 0
+
+    def record_call(attempts: int, succeeded: bool) -> None:
+        prompt_stats.record_call(
+            variant,
+            request_class,
+            time.perf_counter() - call_started,
+            attempts,
+            validation_failures,
+            prompt_tokens,
+            completion_tokens,
+            succeeded,
+        )
 
     for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            logger.info("Attempt %d/%d for word: %s", attempt, MAX_RETRIES, word[:50])
-
-            response = await client.beta.chat.completions.parse(
-                model=settings.MODEL_ID,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": word},
-                ],
-                response_format=Card,
-            )
-
-            parsed = response.choices[0].message.parsed
-            if parsed is None:
-                raise CardBuildError("LLM returned empty response")
-
-            logger.info("Successfully built card on attempt %d", attempt)
-            return parsed
-
-        except ValidationError as e:
-            last_error = e
-            logger.warning(
-                "Pydantic validation error on attempt %d: %s",
-                attempt,
-                str(e)[:200],
-            )
-
-        except APITimeoutError as e:
-            last_error = e
-            logger.warning("API timeout on attempt %d: %s", attempt, str(e)[:200])
-
-        except APIConnectionError as e:
-            last_error = e
-            logger.warning(
-                "API connection error on attempt %d: %s", attempt, str(e)[:200]
-            )
-
-        except APIStatusError as e:
-            last_error = e
-            logger.warning(
-                "API status error on attempt %d (status %d): %s",
-                attempt,
-                e.status_code,
-                str(e)[:200],
-            )
-            # Don't retry on 4xx client errors (except 429 rate limit)
-            if 400 <= e.status_code < 500 and e.status_code != 429:
-                break
-
-        except Exception as e:
-            last_error = e
-            logger.warning("Unexpected error on attempt %d: %s", attempt, str(e)[:200])
-
-        # Wait before retrying (except on last attempt)
-        if attempt < MAX_RETRIES:
-            await asyncio.sleep(RETRY_DELAY_SECONDS * attempt)
+        if not provider_health.allow_request():
+            # Fail fast instead of retrying against a provider that is down
+            if attempt > 1:
+                record_call(attempt - 1, succeeded=False)
+            raise ProviderUnavailableError(provider_health.retry_after())
+
+        with tracer.span(
+            "llm.attempt", language=language, attempt=attempt, variant=variant
+        ) as span:
+            started = time.perf_counter()
+            # Outcome of this attempt only; `last_error` keeps the latest failure across attempts
+            attempt_error: Exception | None = None
+            try:
+                logger.info("Attempt %d/%d for word: %s", attempt, MAX_RETRIES, word[:50])
+
+                response = await client.chat.completions.create(
+                    model=settings.MODEL_ID,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": word},
+                    ],
+                    response_format=card_response_format(),
+                )
+
+                if response.usage is not None:
+                    prompt_tokens += response.usage.prompt_tokens
+                    completion_tokens += response.usage.completion_tokens
+                    span.set(
+                        prompt_tokens=response.usage.prompt_tokens,
+                        completion_tokens=response.usage.completion_tokens,
+                    )
+                    LLM_TOKENS.inc(
+                        response.usage.prompt_tokens,
+                        model=settings.MODEL_ID,
+                        variant=variant,
+                        kind="prompt",
+                    )
+                    LLM_TOKENS.inc(
+                        response.usage.completion_tokens,
+                        model=settings.MODEL_ID,
+                        variant=variant,
+                        kind="completion",
+                    )
+
+                content = response.choices[0].message.content
+                if not content:
+                    raise CardBuildError("LLM returned empty response")
+                parsed = parse_card(content, word)
+
+                provider_health.record_success()
+                logger.info("Successfully built card on attempt %d", attempt)
+                span.set(outcome="ok")
+                record_call(attempt, succeeded=True)
+                return parsed
+
+            except ValidationError as e:
+                attempt_error = e
+                provider_health.record_success()
+                validation_failures += 1
+                logger.warning(
+                    "Pydantic validation error on attempt %d: %s",
+                    attempt,
+                    str(e)[:200],
+                )
+
+            except APITimeoutError as e:
+                attempt_error = e
+                provider_health.record_failure()
+                logger.warning("API timeout on attempt %d: %s", attempt, str(e)[:200])
+
+            except APIConnectionError as e:
+                attempt_error = e
+                provider_health.record_failure()
+                logger.warning(
+                    "API connection error on attempt %d: %s", attempt, str(e)[:200]
+                )
+
+            except APIStatusError as e:
+                attempt_error = e
+                logger.warning(
+                    "API status error on attempt %d (status %d): %s",
+                    attempt,
+                    e.status_code,
+                    str(e)[:200],
+                )
+                if e.status_code >= 500:
+                    provider_health.record_failure()
+                # Don't retry on 4xx client errors (except 429 rate limit)
+                if 400 <= e.status_code < 500 and e.status_code != 429:
+                    break
+
+            except Exception as e:
+                attempt_error = e
+                logger.warning("Unexpected error on attempt %d: %s", attempt, str(e)[:200])
+
+            finally:
+                if attempt_error is not None:
+                    last_error = attempt_error
+                outcome = span.attrs.setdefault(
+                    "outcome", type(attempt_error).__name__ if attempt_error else "cancelled"
+                )
+                LLM_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started,
+                    model=settings.MODEL_ID,
+                    variant=variant,
+                    outcome=outcome,
+                )
+
+        # The attempt failed without stopping the loop; it is only a retry if
+        # another attempt follows (not after the last one or once the provider is down)
+        if attempt < MAX_RETRIES and not provider_health.degraded:
+            LLM_RETRIES.inc(error_class=outcome)
+            with tracer.span("llm.retry_wait", language=language, attempt=attempt):
+                await asyncio.sleep(RETRY_DELAY_SECONDS * attempt)
 
     # All retries exhausted
+    record_call(attempt, succeeded=False)
     error_type = type(last_error).__name__ if last_error else "Unknown"
     error_msg = str(last_error)[:300] if last_error else "No error details"
 
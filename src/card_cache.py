@@ -0,0 +1,121 @@
+"""Cache of generated cards, keyed by language and lemmatized word.
+
+The cache is filled by the bot as it generates cards and in bulk by
+`precompute.py`, so `/en` and `/de` requests for known words are answered
+without an LLM call. It is a SQLite file and can be shared between the bot
+and a running precompute job.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from src.config import Settings
+from src.languages import lemma_key, matches_term
+from src.schemas import Card, Language
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(word: str, language: Language) -> str:
+    """Normalize a word the way duplicate checks do (lemma, case and whitespace)."""
+    return lemma_key(word, language)
+
+
+class CardCache:
+    """
+    SQLite-backed store of validated cards.
+
+    Queries run in a worker thread from async code so disk I/O never blocks
+    the event loop; WAL mode lets the bot read while a precompute job writes.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            path: Path of the SQLite file.
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cards (
+                language TEXT NOT NULL,
+                word TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                model TEXT,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (language, word)
+            )
+            """
+        )
+
+    def get_sync(self, word: str, language: Language) -> Card | None:
+        """
+        Return the cached card for a word, or None.
+
+        Lookups go by lemma key, which different words can share, so a card
+        is only served if its normalized term is the requested word or its
+        lemma (`matches_term`); otherwise it is treated as a miss rather than
+        served for the wrong word.
+        """
+        key = cache_key(word, language)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM cards WHERE language = ? AND word = ?",
+                (language, key),
+            ).fetchone()
+        if not row:
+            return None
+        card = Card.model_validate_json(row[0])
+        if card.normalized_term and not matches_term(word, card.normalized_term, language):
+            logger.info("Cached card %r does not match %r, ignoring it", card.normalized_term, word)
+            return None
+        return card
+
+    def put_sync(self, word: str, language: Language, card: Card, model: str | None = None) -> None:
+        """Insert or replace the cached card for a word."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cards (language, word, payload, model, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (language, cache_key(word, language), card.model_dump_json(), model, datetime.now().isoformat()),
+            )
+
+    def cached_words(self, language: Language) -> set[str]:
+        """Return the normalized words cached for a language."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT word FROM cards WHERE language = ?", (language,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    async def get(self, word: str, language: Language) -> Card | None:
+        return await asyncio.to_thread(self.get_sync, word, language)
+
+    async def put(self, word: str, language: Language, card: Card, model: str | None = None) -> None:
+        await asyncio.to_thread(self.put_sync, word, language, card, model)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+
+def create_card_cache(settings: Settings) -> CardCache | None:
+    """Open the card cache at `CARD_CACHE_PATH`, or return None if it is disabled."""
+    if not settings.CARD_CACHE_PATH:
+        return None
+    return CardCache(settings.CARD_CACHE_PATH)
@@ -1,12 +1,24 @@
 """Storage manager for vocabulary cards using Quizlet Custom Import format."""
 
+import asyncio
 import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Iterable, Iterator, Sequence
 
+from src.exporters import ExportRecord, export_cards, get_exporter
+from src.languages import get_language, language_names, lemma_key, term_key
+from src.metrics import EXPORTED_CARDS, STORAGE_WRITE_SECONDS
 from src.schemas import Card, Language
+from src.search_index import IndexDocument, SearchHit, SearchIndex
+from src.tracing import tracer
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -26,6 +38,64 @@ class WordHistoryEntry:
     definition: str
 
 
+def format_definition(definition: str, collocations: list[str], examples: list[str]) -> str:
+    """Format a definition with collocations and examples as the back of a card."""
+    lines = [definition]
+
+    if collocations:
+        lines.append("")
+        lines.append("Collocations:")
+        for collocation in collocations:
+            lines.append(f"- {collocation}")
+
+    if examples:
+        lines.append("")
+        lines.append("Examples:")
+        for example in examples:
+            lines.append(f"- {example}")
+
+    return "\n".join(lines)
+
+
+def format_card(card: Card) -> str:
+    """
+    Format the card's definition with collocations and examples.
+
+    Format:
+    ```
+    Definition
+
+    Collocations:
+    - collocation1
+    - collocation2
+
+    Examples:
+    - example1
+    - example2
+    ```
+    """
+    return format_definition(card.definition, card.collocations, card.examples)
+
+
+def _history_keys(history: dict[str, WordHistoryEntry], language: Language) -> dict[str, str]:
+    """Map the term key of every history word to the word."""
+    return {term_key(word, language): word for word in history}
+
+
+@dataclass
+class LanguageStore:
+    """In-memory cards and history of one language, loaded on first use."""
+
+    history: dict[str, WordHistoryEntry] = field(default_factory=dict)
+    # Term key of stored normalized terms and of the words typed for them -> history word
+    history_keys: dict[str, str] = field(default_factory=dict)
+    cards: list[tuple[str, str]] = field(default_factory=list)
+    unique_words: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    # Worker threads using the store (see `CardManager._using`); never unloaded while non-zero
+    users: int = 0
+
+
 @dataclass
 class CardManager:
     """
@@ -44,62 +114,182 @@ class CardManager:
     ####
     ```
 
-    Also maintains a history of all words ever added for duplicate checking.
+    Also maintains a history of all words ever added for duplicate checking,
+    and a full-text search index over it (`search_index.sqlite3`).
+    With `persist_buffer` the card buffers are also kept on disk, so the manager
+    can be dropped from memory and recreated without losing cards.
+    Buffer and history can also be exported to other formats (CSV, TSV,
+    JSONL, Anki) with `dump` and `export_history`.
+
+    Languages are loaded lazily: the history and buffer of a language are
+    read on its first use and dropped again by `unload_idle`, so memory and
+    startup time depend on the languages in use, not on those registered.
     """
 
-    english_path: str
-    german_path: str
-    _english_cards: list[tuple[str, str]] = field(default_factory=list)
-    _german_cards: list[tuple[str, str]] = field(default_factory=list)
-    _english_unique_words: int = 0
-    _german_unique_words: int = 0
-    _english_history: dict[str, WordHistoryEntry] = field(default_factory=dict)
-    _german_history: dict[str, WordHistoryEntry] = field(default_factory=dict)
+    data_dir: str
+    # Quizlet export path per language; defaults to <data_dir>/<language>.txt
+    export_paths: dict[Language, str] = field(default_factory=dict)
+    persist_buffer: bool = False
+    _stores: dict[Language, LanguageStore] = field(default_factory=dict)
+    # History size of languages not in memory, recorded on unload or counted from the file
+    _history_counts: dict[Language, int] = field(default_factory=dict)
+    _search_index: SearchIndex | None = None
+    _buffer_lock: threading.Lock = field(default_factory=threading.Lock)
+    _load_lock: threading.RLock = field(default_factory=threading.RLock)
 
     def __post_init__(self) -> None:
-        """Ensure data directories exist and load word history."""
-        data_dir = Path(self.english_path).parent
-        data_dir.mkdir(parents=True, exist_ok=True)
+        """Ensure the data directory exists."""
+        Path(self.data_dir).mkdir(parents=True, exist_ok=True)
+
+    def _store(self, language: Language) -> LanguageStore:
+        """Return the in-memory state of a language, loading it on first use."""
+        store = self._stores.get(language)
+        if store is None:
+            get_language(language)
+            # Searches and exports run in worker threads and may load concurrently
+            with self._load_lock:
+                store = self._stores.get(language)
+                if store is None:
+                    store = self._load_language(language)
+        store.last_used = time.monotonic()
+        return store
+
+    def _load_language(self, language: Language) -> LanguageStore:
+        """Read the history and buffer of a language (called with `_load_lock` held)."""
+        with tracer.span("storage.load_language", language=language):
+            history = self._load_history(language)
+            store = LanguageStore(history=history, history_keys=_history_keys(history, language))
+            if self.persist_buffer:
+                store.cards, store.unique_words = self._load_buffer(language)
+            self._stores[language] = store
+            self._index_missing_history(language)
+        return store
+
+    async def load(self, language: Language) -> None:
+        """
+        Load a language in a worker thread unless it is already in memory.
+
+        Loading parses the history and indexes entries missing from the search
+        index, which takes about a second for 100k entries. Await this on the
+        event loop before `has_duplicate`, `add_card` or `has_cards`, which
+        would otherwise load the language synchronously.
+        """
+        if language not in self._stores:
+            await asyncio.to_thread(self._store, language)
+
+    @contextmanager
+    def _using(self, *languages: Language) -> Iterator[list[LanguageStore]]:
+        """
+        Load languages and keep them, and the search index, loaded until the block exits.
+
+        Used by the methods that run in worker threads, so `unload_idle`
+        cannot drop a store or close the index under them.
+        """
+        with self._load_lock:
+            stores = [self._store(language) for language in languages]
+            for store in stores:
+                store.users += 1
+        try:
+            yield stores
+        finally:
+            with self._load_lock:
+                for store in stores:
+                    store.users -= 1
+
+    @property
+    def loaded_languages(self) -> list[Language]:
+        """Languages whose state is currently held in memory."""
+        with self._load_lock:
+            return list(self._stores)
+
+    def unload_idle(self, max_idle_seconds: float, now: float | None = None) -> int:
+        """
+        Drop languages unused for longer than `max_idle_seconds` from memory.
 
-        # Load word history from files
-        self._load_history("english")
-        self._load_history("german")
+        History is saved on every change, so an unloaded language is reloaded
+        from disk on its next use. Buffers are only on disk with
+        `persist_buffer`; languages with unsaved cards are kept, as are
+        languages a worker thread is using. The search index is closed once no
+        language is loaded.
+
+        Returns:
+            Number of unloaded languages.
+        """
+        now = now if now is not None else time.monotonic()
+        cutoff = now - max_idle_seconds
+        with self._load_lock:
+            idle = [
+                language
+                for language, store in list(self._stores.items())
+                if not store.users
+                and store.last_used < cutoff
+                and (self.persist_buffer or not store.cards)
+            ]
+            for language in idle:
+                self._history_counts[language] = len(self._stores.pop(language).history)
+            if not self._stores and self._search_index is not None:
+                self._search_index.close()
+                self._search_index = None
+        return len(idle)
+
+    def _index(self) -> SearchIndex:
+        """Return the search index, opening it on first use."""
+        search_index = self._search_index
+        if search_index is None:
+            with self._load_lock:
+                if self._search_index is None:
+                    self._search_index = SearchIndex(str(Path(self.data_dir) / "search_index.sqlite3"))
+                search_index = self._search_index
+        return search_index
 
     def _get_history_path(self, language: Language) -> Path:
         """Get the path to the history file for the specified language."""
-        data_dir = Path(self.english_path).parent
-        return data_dir / f"{language}_history.json"
+        return Path(self.data_dir) / get_language(language).history_file
 
-    def _load_history(self, language: Language) -> None:
+    def _load_history(self, language: Language) -> dict[str, WordHistoryEntry]:
         """
         Load word history from JSON file.
 
         Args:
             language: The language to load history for.
+
+        Returns:
+            The history, empty if there is none yet.
         """
         history_path = self._get_history_path(language)
 
         if not history_path.exists():
-            return
+            return {}
 
         try:
             with open(history_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
 
-            if language == "english":
-                self._english_history = {
-                    word: WordHistoryEntry(**entry)
-                    for word, entry in data.items()
-                }
-            else:
-                self._german_history = {
-                    word: WordHistoryEntry(**entry)
-                    for word, entry in data.items()
-                }
+            return {
+                word: WordHistoryEntry(**entry)
+                for word, entry in data.items()
+            }
 
         except (json.JSONDecodeError, KeyError, TypeError) as e:
             # If history file is corrupted, start fresh
-            print(f"Warning: Failed to load {language} history: {e}")
+            logger.warning("Failed to load %s history: %s", language, e)
+            return {}
+
+    def _count_history(self, language: Language) -> int:
+        """Count the entries of a history file without building the history."""
+        history_path = self._get_history_path(language)
+        if not history_path.exists():
+            return 0
+        try:
+            with open(history_path, "r", encoding="utf-8") as f:
+                return len(json.load(f))
+        except (json.JSONDecodeError, TypeError):
+            return 0
+
+    def _rebuild_history_keys(self, language: Language) -> None:
+        """Rebuild the lemma key index used by `has_duplicate`."""
+        store = self._stores[language]
+        store.history_keys = _history_keys(store.history, language)
 
     def _save_history(self, language: Language) -> None:
         """
@@ -109,11 +299,7 @@ class CardManager:
             language: The language to save history for.
         """
         history_path = self._get_history_path(language)
-
-        if language == "english":
-            history = self._english_history
-        else:
-            history = self._german_history
+        history = self._store(language).history
 
         # Convert to serializable format
         serializable_history = {
@@ -125,70 +311,114 @@ class CardManager:
             for word, entry in history.items()
         }
 
-        with open(history_path, "w", encoding="utf-8") as f:
-            json.dump(serializable_history, f, indent=2, ensure_ascii=False)
+        with tracer.span("storage.save_history", language=language, entries=len(history)) as span:
+            with open(history_path, "w", encoding="utf-8") as f:
+                json.dump(serializable_history, f, indent=2, ensure_ascii=False)
+        STORAGE_WRITE_SECONDS.observe(span.duration, language=language, operation="save_history")
 
-    def has_duplicate(
-        self, word: str, language: Language
-    ) -> tuple[bool, WordHistoryEntry | None]:
+    def _index_missing_history(self, language: Language) -> None:
         """
-        Check if a word already exists in the history.
+        Index history entries missing from the search index.
+
+        The index is maintained by `add_card`; this only fills it in for
+        history written before the index existed.
 
         Args:
-            word: The word to check.
-            language: The language to check in.
+            language: The language to check.
+        """
+        history = self._stores[language].history
+        search_index = self._index()
+        if search_index.count(language) >= len(history):
+            return
+
+        missing = list(search_index.missing_words(language, list(history)))
+        search_index.add_many(
+            IndexDocument(
+                word=word,
+                language=language,
+                added_at=history[word].added_at,
+                definition=history[word].definition,
+                collocations=[],
+                examples=[],
+            )
+            for word in missing
+        )
+
+    def _get_buffer_path(self, language: Language) -> Path:
+        """Get the path to the persisted card buffer for the specified language."""
+        return Path(self.data_dir) / get_language(language).buffer_file
+
+    def _load_buffer(self, language: Language) -> tuple[list[tuple[str, str]], int]:
+        """
+        Load the card buffer saved by `_save_buffer`.
+
+        Args:
+            language: The language to load the buffer for.
 
         Returns:
-            Tuple of (is_duplicate, history_entry). If no duplicate found,
-            is_duplicate is False and history_entry is None.
+            The buffered cards and the session's unique word count.
         """
-        # Normalize word for comparison (case-insensitive, strip whitespace)
-        normalized_word = word.lower().strip()
+        buffer_path = self._get_buffer_path(language)
+
+        if not buffer_path.exists():
+            return [], 0
+
+        try:
+            with open(buffer_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
 
-        if language == "english":
-            history = self._english_history
-        else:
-            history = self._german_history
+            cards = [(term, definition) for term, definition in data["cards"]]
+            return cards, data["unique_words"]
 
-        # Check for exact match
-        for stored_word, entry in history.items():
-            if stored_word.lower().strip() == normalized_word:
-                return True, entry
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            logger.warning("Failed to load %s buffer: %s", language, e)
+            return [], 0
 
-        return False, None
+    def _save_buffer(self, language: Language) -> None:
+        """
+        Save the card buffer to JSON if buffer persistence is enabled.
 
-    def _format_definition(self, card: Card) -> str:
+        Args:
+            language: The language to save the buffer for.
         """
-        Format the card's definition with collocations and examples.
+        if not self.persist_buffer:
+            return
 
-        Format:
-        ```
-        Definition
+        store = self._store(language)
 
-        Collocations:
-        - collocation1
-        - collocation2
+        # `dump` may run in a worker thread while cards are added on the event loop
+        with self._buffer_lock:
+            cards, unique_words = list(store.cards), store.unique_words
+            with tracer.span("storage.save_buffer", language=language, cards=len(cards)) as span:
+                with open(self._get_buffer_path(language), "w", encoding="utf-8") as f:
+                    json.dump({"cards": cards, "unique_words": unique_words}, f, ensure_ascii=False)
+        STORAGE_WRITE_SECONDS.observe(span.duration, language=language, operation="save_buffer")
 
-        Examples:
-        - example1
-        - example2
-        ```
+    def has_duplicate(
+        self, word: str, language: Language
+    ) -> tuple[bool, WordHistoryEntry | None]:
         """
-        lines = [card.definition]
+        Check if a word already exists in the history.
 
-        if card.collocations:
-            lines.append("")
-            lines.append("Collocations:")
-            for collocation in card.collocations:
-                lines.append(f"- {collocation}")
+        A word matches a stored normalized term if it is that term or its
+        lemma is ("went" and "Hunde" match "to go" and "der Hund"). Terms are
+        compared casefolded, never by their own lemma keys, so words the
+        suffix rules happen to relate do not match each other.
 
-        if card.examples:
-            lines.append("")
-            lines.append("Examples:")
-            for example in card.examples:
-                lines.append(f"- {example}")
+        Args:
+            word: The word to check.
+            language: The language to check in.
 
-        return "\n".join(lines)
+        Returns:
+            Tuple of (is_duplicate, history_entry). If no duplicate found,
+            is_duplicate is False and history_entry is None.
+        """
+        store = self._store(language)
+        keys = store.history_keys
+        stored_word = keys.get(lemma_key(word, language)) or keys.get(term_key(word, language))
+        if stored_word is None or stored_word not in store.history:
+            return False, None
+        return True, store.history[stored_word]
 
     def add_card(self, term: str, card: Card, language: Language) -> int:
         """
@@ -197,20 +427,18 @@ class CardManager:
         Args:
             term: The original target word/phrase input by the user.
             card: The Card object with normalized_term, definition, collocations, and examples.
-            language: The language buffer to add to ('english' or 'german').
+            language: The language buffer to add to.
 
         Returns:
             Number of cards added (always 1 with new format).
         """
-        cards_list = (
-            self._english_cards if language == "english" else self._german_cards
-        )
+        store = self._store(language)
 
         # Use normalized_term from the card (lemmatized form) instead of original input
         normalized_term = card.normalized_term if card.normalized_term else term
 
-        definition = self._format_definition(card)
-        cards_list.append((normalized_term, definition))
+        definition = format_card(card)
+        store.cards.append((normalized_term, definition))
 
         # Add to history (always, even if it's a duplicate - for tracking)
         history_entry = WordHistoryEntry(
@@ -219,46 +447,156 @@ class CardManager:
             definition=card.definition,
         )
 
-        if language == "english":
-            self._english_unique_words += 1
-            self._english_history[normalized_term] = history_entry
-            self._save_history("english")
-        else:
-            self._german_unique_words += 1
-            self._german_history[normalized_term] = history_entry
-            self._save_history("german")
+        # Key both the stored term and the word as typed, in case the rules
+        # do not relate the two ("running" -> "to run")
+        store.unique_words += 1
+        store.history[normalized_term] = history_entry
+        store.history_keys[term_key(normalized_term, language)] = normalized_term
+        store.history_keys.setdefault(term_key(term, language), normalized_term)
+        self._save_history(language)
+
+        self._save_buffer(language)
+
+        with tracer.span("storage.index_card", language=language):
+            self._index().add(
+                IndexDocument.from_card(normalized_term, language, history_entry.added_at, card)
+            )
 
         return 1
 
-    def get_stats(self) -> dict[str, Stats]:
+    def search(
+        self, query: str, language: Language | None = None, limit: int = 10
+    ) -> list[SearchHit]:
         """
-        Get current statistics for both languages.
+        Search the history by term, definition, collocations and examples.
+
+        Args:
+            query: Free-text query; the last word also matches as a prefix.
+            language: Restrict results to one language.
+            limit: Maximum number of results.
 
         Returns:
-            Dictionary with stats for 'english' and 'german'.
-        """
-        return {
-            "english": Stats(
-                cards_count=len(self._english_cards),
-                unique_words=self._english_unique_words,
-            ),
-            "german": Stats(
-                cards_count=len(self._german_cards),
-                unique_words=self._german_unique_words,
-            ),
-        }
+            Matching entries, best first.
+        """
+        # Loading the searched languages also indexes history written
+        # before the index existed
+        with self._using(*([language] if language else language_names())):
+            return self._index().search(query, language, limit)
+
+    def get_stats(self) -> dict[Language, Stats]:
+        """
+        Get current statistics for every registered language without loading any.
 
-    def get_history_stats(self) -> dict[str, int]:
+        Languages not in memory have an empty buffer, unless buffers are
+        persisted; then their buffer file is read.
+
+        Returns:
+            Dictionary with buffer stats per language.
+        """
+        stats = {}
+        for language in language_names():
+            store = self._stores.get(language)
+            if store is not None:
+                cards, unique_words = store.cards, store.unique_words
+            elif self.persist_buffer:
+                cards, unique_words = self._load_buffer(language)
+            else:
+                cards, unique_words = [], 0
+            stats[language] = Stats(cards_count=len(cards), unique_words=unique_words)
+        return stats
+
+    def get_history_stats(self, loaded_only: bool = False) -> dict[Language, int]:
         """
-        Get total history statistics (all words ever added).
+        Get total history statistics (all words ever added) without loading any language.
+
+        Languages not in memory report the size recorded when they were
+        unloaded; the history file of a language not loaded since startup is
+        counted once. Run it in a worker thread.
+
+        Args:
+            loaded_only: Only report languages already in memory.
 
         Returns:
             Dictionary with total word counts for each language.
         """
-        return {
-            "english": len(self._english_history),
-            "german": len(self._german_history),
-        }
+        stats = {}
+        for language in self.loaded_languages if loaded_only else language_names():
+            store = self._stores.get(language)
+            if store is not None:
+                stats[language] = len(store.history)
+                continue
+            count = self._history_counts.get(language)
+            if count is None:
+                count = self._history_counts[language] = self._count_history(language)
+            stats[language] = count
+        return stats
+
+    def export_path(self, language: Language, export_format: str = "quizlet") -> str:
+        """
+        Return the path an export of the card buffer is written to.
+
+        The Quizlet file is `<data_dir>/<language>.txt` unless configured in
+        `export_paths`; other formats are written next to it.
+        """
+        path = self.export_paths.get(language)
+        if path is None:
+            path = str(Path(self.data_dir) / get_language(language).export_file)
+        if export_format == "quizlet":
+            return path
+        return str(Path(path).with_name(f"{language}{get_exporter(export_format).extension}"))
+
+    def _export(
+        self, language: Language, records: Iterable[ExportRecord], targets: dict[str, str], operation: str
+    ) -> int:
+        """Run an export and record its duration and card counts."""
+        with tracer.span(f"storage.{operation}", language=language, formats=",".join(targets)) as span:
+            count = export_cards(records, targets)
+            span.set(cards=count)
+        STORAGE_WRITE_SECONDS.observe(span.duration, language=language, operation=operation)
+        for export_format in targets:
+            EXPORTED_CARDS.inc(count, language=language, format=export_format)
+        return count
+
+    def dump(self, language: Language, formats: Sequence[str] = ("quizlet",)) -> dict[str, str]:
+        """
+        Export the card buffer in one or more formats and clear it.
+
+        All formats are written in one pass over the buffer. Safe to call from
+        a worker thread: the buffer is swapped out first, so cards added during
+        the export stay in the new buffer, and it is restored if the export
+        fails.
+
+        Args:
+            language: Which language buffer to dump.
+            formats: Export format names (see `src.exporters.EXPORTERS`).
+
+        Returns:
+            Path per format, or an empty dict if the buffer was empty.
+
+        Raises:
+            ValueError: If a format is not registered.
+        """
+        targets = {export_format: self.export_path(language, export_format) for export_format in formats}
+        with self._using(language) as (store,):
+            cards, store.cards = store.cards, []
+            if not cards:
+                return {}
+
+            unique_words, store.unique_words = store.unique_words, 0
+            try:
+                self._export(
+                    language,
+                    (ExportRecord(term, definition) for term, definition in cards),
+                    targets,
+                    "dump",
+                )
+            except BaseException:
+                store.cards[:0] = cards
+                store.unique_words += unique_words
+                raise
+
+            self._save_buffer(language)
+        return targets
 
     def dump_txt(self, language: Language) -> str | None:
         """
@@ -270,37 +608,51 @@ class CardManager:
         Returns:
             Path to the .txt file, or None if buffer was empty.
         """
-        if language == "english":
-            cards = self._english_cards
-            path = self.english_path
-        else:
-            cards = self._german_cards
-            path = self.german_path
-
-        if not cards:
-            return None
-
-        # Write in Quizlet Custom Import format
-        with open(path, "w", encoding="utf-8") as f:
-            for i, (term, definition) in enumerate(cards):
-                # Write: Term<TAB>Definition
-                f.write(f"{term}\t{definition}")
-                # Add card separator after each card (but not after the last one)
-                if i < len(cards) - 1:
-                    f.write("\n####")
-
-        # Clear the buffer but keep the counter for session tracking
-        if language == "english":
-            self._english_cards = []
-            self._english_unique_words = 0
-        else:
-            self._german_cards = []
-            self._german_unique_words = 0
-
-        return path
+        return self.dump(language).get("quizlet")
+
+    def export_history(self, language: Language, formats: Sequence[str] = ("quizlet",)) -> dict[str, str]:
+        """
+        Export every card ever added for a language, leaving the buffer alone.
+
+        Cards are streamed from the search index in batches and written to all
+        formats in a single scan, so only one batch of formatted cards is held
+        at a time. History entries missing from the index are indexed first,
+        with their definition only. Run it in a worker thread.
+
+        Args:
+            language: Which language history to export.
+            formats: Export format names (see `src.exporters.EXPORTERS`).
+
+        Returns:
+            Path per format (`<data_dir>/<language>_history<extension>`), or
+            an empty dict if the history is empty.
+
+        Raises:
+            ValueError: If a format is not registered.
+        """
+        targets = {
+            export_format: str(Path(self.data_dir) / f"{language}_history{get_exporter(export_format).extension}")
+            for export_format in formats
+        }
+        # Every entry is exported from the index, so history written before it existed is indexed first
+        with self._using(language):
+            self._index_missing_history(language)
+            count = self._export(language, self._history_records(language), targets, "export_history")
+        if not count:
+            for path in targets.values():
+                Path(path).unlink(missing_ok=True)
+            return {}
+        return targets
+
+    def _history_records(self, language: Language) -> Iterator[ExportRecord]:
+        """Yield the indexed entries of a language with their full card."""
+        for document in self._index().iter_documents(language):
+            yield ExportRecord(
+                document.word,
+                format_definition(document.definition, document.collocations, document.examples),
+                document.added_at,
+            )
 
     def has_cards(self, language: Language) -> bool:
         """Check if there are cards in the specified language buffer."""
-        if language == "english":
-            return len(self._english_cards) > 0
-        return len(self._german_cards) > 0
+        return len(self._store(language).cards) > 0
@@ -0,0 +1,171 @@
+"""Structured-output request format and validation of LLM card responses.
+
+The strict JSON schema sent as `response_format` is built once per process
+instead of on every call, and responses are validated straight from the raw
+JSON text with `Card.model_validate_json`. Near-valid responses (an extra
+collocation, stray whitespace, output cut off after the last complete
+example) are repaired by `salvage_card` instead of costing another LLM call.
+"""
+
+import functools
+import logging
+from typing import Any
+
+from pydantic import ValidationError
+from pydantic_core import from_json
+
+from src.metrics import CARD_SALVAGES
+from src.schemas import Card
+
+logger = logging.getLogger(__name__)
+
+# Must match the MaxLen constraints of Card.collocations and Card.examples
+MAX_LIST_ITEMS = 3
+
+LIST_FIELDS = ("collocations", "examples")
+TEXT_FIELDS = ("normalized_term", "definition")
+
+
+def strict_json_schema(schema: Any) -> Any:
+    """
+    Make a pydantic JSON schema valid for structured outputs in strict mode.
+
+    Strict mode requires every property of an object to be listed as
+    required and `additionalProperties: false`, and rejects `null`
+    defaults; optional fields stay nullable through their `anyOf`.
+
+    Args:
+        schema: Schema from `model_json_schema()`, or a node of one; not modified.
+
+    Returns:
+        The strict schema.
+    """
+    if isinstance(schema, list):
+        return [strict_json_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+
+    strict = {
+        key: strict_json_schema(value)
+        for key, value in schema.items()
+        if not (key == "default" and value is None)
+    }
+    if "properties" in strict:
+        # Property names, not subschemas: keep them as they are
+        strict["properties"] = {
+            name: strict_json_schema(value) for name, value in schema["properties"].items()
+        }
+    if strict.get("type") == "object":
+        strict["required"] = list(strict.get("properties", {}))
+        strict["additionalProperties"] = False
+    return strict
+
+
+@functools.lru_cache(maxsize=None)
+def card_response_format() -> dict[str, Any]:
+    """Return the `response_format` requesting a strict `Card` JSON object."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": Card.__name__,
+            "schema": strict_json_schema(Card.model_json_schema()),
+            "strict": True,
+        },
+    }
+
+
+def parse_card(content: str | bytes, word: str) -> Card:
+    """
+    Validate an LLM response, repairing it if it is nearly valid.
+
+    Args:
+        content: Raw JSON text returned by the model.
+        word: The requested word, used to fill a missing normalized term.
+
+    Returns:
+        The validated card.
+
+    Raises:
+        ValidationError: If the response is invalid and cannot be repaired.
+    """
+    try:
+        return Card.model_validate_json(content)
+    except ValidationError as e:
+        card = salvage_card(content, word)
+        if card is None:
+            raise
+        logger.info("Salvaged card for word %s: %s", word[:50], str(e)[:200])
+        return card
+
+
+def salvage_card(content: str | bytes, word: str) -> Card | None:
+    """
+    Repair a response that failed validation.
+
+    Repairs applied:
+    - truncated JSON is parsed up to the last complete value
+    - whitespace is stripped and empty list items are dropped
+    - collocation and example lists are trimmed to three items
+    - a missing normalized term is replaced by the requested word
+    - empty fields of a non-existent word are cleared
+
+    Returns:
+        The repaired card, or None if the response cannot be repaired.
+    """
+    try:
+        data = from_json(content, allow_partial=True)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("is_exists"), bool):
+        return None
+
+    repairs: list[str] = []
+    if not _is_complete_json(content):
+        repairs.append("truncated")
+
+    for name in TEXT_FIELDS:
+        value = data.get(name)
+        if isinstance(value, str) and value != value.strip():
+            data[name] = value.strip()
+            repairs.append("whitespace")
+    for name in LIST_FIELDS:
+        value = data.get(name)
+        if not isinstance(value, list):
+            continue
+        items = [item.strip() for item in value if isinstance(item, str) and item.strip()]
+        if len(items) > MAX_LIST_ITEMS:
+            items = items[:MAX_LIST_ITEMS]
+            repairs.append("trimmed")
+        elif items != value:
+            repairs.append("whitespace")
+        data[name] = items
+
+    if data["is_exists"]:
+        if not data.get("normalized_term"):
+            data["normalized_term"] = word.strip()
+            repairs.append("normalized_term")
+    else:
+        # Only empty placeholders are cleared; real content for a word marked
+        # as non-existent is contradictory and left to a retry
+        for name in TEXT_FIELDS + LIST_FIELDS:
+            if name in data and not data[name]:
+                data[name] = None
+                repairs.append("cleared")
+
+    if not repairs:
+        return None
+    try:
+        card = Card.model_validate(data)
+    except ValidationError:
+        return None
+    for repair in dict.fromkeys(repairs):
+        CARD_SALVAGES.inc(repair=repair)
+    return card
+
+
+def _is_complete_json(content: str | bytes) -> bool:
+    try:
+        from_json(content)
+    except ValueError:
+        return False
+    return True
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field, SecretStr
 from pydantic_settings import BaseSettings
 
@@ -11,14 +13,113 @@ class Settings(BaseSettings):
         ..., description="Telegram user ID allowed to use the bot"
     )
 
+    # Multi-user settings
+    MULTI_USER_MODE: bool = Field(
+        default=False, description="Serve every user in ALLOWED_USER_IDS with separate storage"
+    )
+    ALLOWED_USER_IDS: list[int] = Field(
+        default_factory=list, description="Additional allowed users in multi-user mode (JSON list)"
+    )
+    USER_DATA_DIR: str = Field(default="data/users")
+    USER_IDLE_EVICTION_SECONDS: int = Field(
+        default=30 * 60, description="Unload a user's data after this much inactivity"
+    )
+    LLM_CONCURRENCY: int = Field(default=8, description="Concurrent LLM calls in total")
+    LLM_CONCURRENCY_PER_USER: int = Field(default=2, description="Concurrent LLM calls per user")
+
     # OpenRouter/LLM settings
     OPENROUTER_API_KEY: SecretStr = Field(..., description="OpenRouter API key")
     MODEL_ID: str = Field(default="x-ai/grok-4.1-fast", description="LLM model ID")
     OPENROUTER_BASE_URL: str = Field(default="https://openrouter.ai/api/v1")
 
+    # Prompt variant per request class: "full", "compact" or "ab" (random split)
+    PROMPT_VARIANT_INTERACTIVE: Literal["full", "compact", "ab"] = Field(default="full")
+    PROMPT_VARIANT_REGENERATE: Literal["full", "compact", "ab"] = Field(default="full")
+    PROMPT_VARIANT_BATCH: Literal["full", "compact", "ab"] = Field(default="full")
+
     # Data paths (output files in Quizlet Custom Import format .txt)
     ENGLISH_CSV_PATH: str = Field(default="data/english.txt")
     GERMAN_CSV_PATH: str = Field(default="data/german.txt")
+    EXPORT_FORMATS: list[str] = Field(
+        default=["quizlet"],
+        description="Formats sent by /dump_<language> and /export without arguments (JSON list)",
+    )
+    LANGUAGE_IDLE_SECONDS: int = Field(
+        default=30 * 60, description="Unload a language's history from memory after this much inactivity"
+    )
+
+    # Generated cards reused for repeated words and filled in bulk by precompute.py
+    CARD_CACHE_PATH: str | None = Field(
+        default="data/card_cache.sqlite3", description="SQLite card cache (disabled if empty)"
+    )
+
+    # Pending cards: "memory" (this process only) or "sqlite" (shared between processes)
+    PENDING_STORE: Literal["memory", "sqlite"] = Field(default="memory")
+    PENDING_DB_PATH: str = Field(default="data/pending.sqlite3")
+    CALLBACK_SECRET: SecretStr | None = Field(
+        default=None, description="Key for signing button payloads (derived from the bot token if unset)"
+    )
+
+    # Outgoing Telegram requests (Telegram allows ~30 messages/s overall, ~1/s per chat)
+    TELEGRAM_GLOBAL_RATE: float = Field(default=25.0, description="Requests per second over all chats")
+    TELEGRAM_CHAT_RATE: float = Field(default=1.0, description="Requests per second within one chat")
+    TELEGRAM_CHAT_BURST: int = Field(default=3, description="Requests a chat may send back to back")
+
+    # Inline mode: answered from history and the card cache only, never the LLM
+    INLINE_LATENCY_BUDGET_MS: int = Field(
+        default=80, description="Time budget for local lookups of an inline query"
+    )
+    INLINE_MAX_RESULTS: int = Field(default=10)
+    INLINE_CACHE_SECONDS: int = Field(
+        default=30, description="How long Telegram may reuse an inline answer"
+    )
+
+    # Background generation jobs
+    JOB_WORKERS: int | None = Field(
+        default=None, description="Workers generating cards in the background (default: LLM_CONCURRENCY)"
+    )
+    JOB_DEADLINE_SECONDS: int = Field(
+        default=300, description="Deadline of interactive and regenerate jobs"
+    )
+    JOB_QUEUE_PATH: str | None = Field(
+        default=None, description="JSON file keeping queued jobs across restarts (disabled if unset)"
+    )
+
+    # Degraded mode settings
+    PROVIDER_FAILURE_THRESHOLD: int = Field(
+        default=3, description="Consecutive LLM provider failures before entering degraded mode"
+    )
+    PROVIDER_COOLDOWN_SECONDS: int = Field(
+        default=30, description="Seconds before a down provider is probed again"
+    )
+
+    # Metrics settings
+    METRICS_PORT: int | None = Field(
+        default=None, description="Port for the Prometheus /metrics endpoint (disabled if unset)"
+    )
+    METRICS_HOST: str = Field(default="0.0.0.0")
+
+    # Event-loop watchdog settings
+    LOOP_WATCHDOG_ENABLED: bool = Field(
+        default=False, description="Measure event-loop lag and per-handler blocking time"
+    )
+    LOOP_STALL_THRESHOLD_MS: int = Field(
+        default=100, description="Log the loop thread's stack when the loop is blocked this long"
+    )
+    SLOW_CALLBACK_MS: int = Field(
+        default=50, description="Log single loop callbacks running at least this long"
+    )
+
+    # Memory profiling settings
+    TRACEMALLOC_FRAMES: int = Field(
+        default=0,
+        description="Trace allocations from startup with this many frames (0: only after /memstats start)",
+    )
+
+    # Tracing settings
+    TRACE_FILE_PATH: str | None = Field(
+        default=None, description="JSONL file for per-stage spans (disabled if unset)"
+    )
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,252 @@
+"""Streaming exporters writing cards as Quizlet, CSV, TSV, JSONL or Anki files.
+
+`export_cards` makes a single pass over an iterable of records and hands
+batches of `FLUSH_EVERY_RECORDS` records to each requested format, so
+several formats cost one scan of the source and at most one batch is held
+in memory however long the source is. Each format writes a batch into a
+`BufferedSink`, which writes it to disk in one call. Files are written under
+a temporary name and renamed on success, so a failed export never leaves a
+truncated file behind.
+
+Exports block on disk I/O: call them from a worker thread, not the event
+loop.
+
+Usage:
+```
+export_cards(records, {"quizlet": "data/english.txt", "csv": "data/english.csv"})
+```
+"""
+
+import csv
+import html
+import json
+import os
+from contextlib import ExitStack
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import IO, ClassVar, Iterable, Sequence
+
+# Records handed to the exporters at once; their output is written to the files after each batch
+FLUSH_EVERY_RECORDS = 1000
+
+
+@dataclass(slots=True)
+class ExportRecord:
+    """One card as written by the exporters."""
+
+    term: str
+    # Back side of the card: definition, collocations and examples
+    definition: str
+    added_at: str | None = None
+
+
+class BufferedSink:
+    """File-like object collecting text until `flush` writes it to the file in one call."""
+
+    def __init__(self, file: IO[str]) -> None:
+        """
+        Initialize the sink.
+
+        Args:
+            file: Text file opened for writing.
+        """
+        self._file = file
+        self._parts: list[str] = []
+        # Called for every written chunk, so bound directly to the list
+        self.write = self._parts.append
+
+    def flush(self) -> None:
+        """Write the collected output to the file."""
+        if self._parts:
+            self._file.write("".join(self._parts))
+            self._parts.clear()
+
+
+class Exporter:
+    """Base class of an export format; writes records one at a time to a sink."""
+
+    name: ClassVar[str]
+    extension: ClassVar[str]
+    # What the file is ready for, shown when it is sent ("Quizlet Custom Import")
+    target: ClassVar[str]
+
+    def __init__(self, sink: BufferedSink) -> None:
+        self.sink = sink
+        self.count = 0
+
+    def begin(self) -> None:
+        """Write the file header, if the format has one."""
+
+    def write(self, record: ExportRecord) -> None:
+        """Write one record."""
+        raise NotImplementedError
+
+    def write_many(self, records: Sequence[ExportRecord]) -> None:
+        """Write a batch of records; formats override it when a batch can be written faster."""
+        for record in records:
+            self.write(record)
+
+    def end(self) -> None:
+        """Write the file trailer, if the format has one."""
+
+
+EXPORTERS: dict[str, type[Exporter]] = {}
+
+
+def register_exporter(exporter: type[Exporter]) -> type[Exporter]:
+    """Class decorator adding an export format to `EXPORTERS`."""
+    if exporter.name in EXPORTERS:
+        raise ValueError(f"Export format {exporter.name!r} is already registered")
+    EXPORTERS[exporter.name] = exporter
+    return exporter
+
+
+def get_exporter(name: str) -> type[Exporter]:
+    """
+    Return the exporter of a format.
+
+    Raises:
+        ValueError: If the format is not registered.
+    """
+    try:
+        return EXPORTERS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown export format: {name!r} (available: {', '.join(EXPORTERS)})"
+        ) from None
+
+
+@register_exporter
+class QuizletExporter(Exporter):
+    """Quizlet Custom Import: tab between term and definition, `####` between cards."""
+
+    name = "quizlet"
+    extension = ".txt"
+    target = "Quizlet Custom Import"
+
+    def write(self, record: ExportRecord) -> None:
+        self.write_many((record,))
+
+    def write_many(self, records: Sequence[ExportRecord]) -> None:
+        if not records:
+            return
+        separator = "\n####" if self.count else ""
+        self.sink.write(separator + "\n####".join([f"{r.term}\t{r.definition}" for r in records]))
+        self.count += len(records)
+
+
+@register_exporter
+class CsvExporter(Exporter):
+    """Comma-separated values with a header row; multi-line fields are quoted."""
+
+    name = "csv"
+    extension = ".csv"
+    target = "spreadsheets (CSV)"
+    dialect: ClassVar[str] = "excel"
+
+    def __init__(self, sink: BufferedSink) -> None:
+        super().__init__(sink)
+        self._writer = csv.writer(sink, dialect=self.dialect)
+
+    def begin(self) -> None:
+        self._writer.writerow(("term", "definition", "added_at"))
+
+    def write(self, record: ExportRecord) -> None:
+        self._writer.writerow((record.term, record.definition, record.added_at or ""))
+        self.count += 1
+
+
+@register_exporter
+class TsvExporter(CsvExporter):
+    """Tab-separated values with a header row; multi-line fields are quoted."""
+
+    name = "tsv"
+    extension = ".tsv"
+    target = "spreadsheets (TSV)"
+    dialect = "excel-tab"
+
+
+@register_exporter
+class JsonlExporter(Exporter):
+    """One JSON object per line."""
+
+    name = "jsonl"
+    extension = ".jsonl"
+    target = "scripts (JSON Lines)"
+
+    def write(self, record: ExportRecord) -> None:
+        data = {"term": record.term, "definition": record.definition}
+        if record.added_at:
+            data["added_at"] = record.added_at
+        self.sink.write(json.dumps(data, ensure_ascii=False) + "\n")
+        self.count += 1
+
+
+@register_exporter
+class AnkiExporter(Exporter):
+    """Anki text import: tab-separated HTML fields, settings in `#` header lines."""
+
+    name = "anki"
+    extension = ".anki.txt"
+    target = "Anki import (File → Import)"
+
+    def begin(self) -> None:
+        self.sink.write("#separator:tab\n#html:true\n#columns:Front\tBack\n")
+
+    def write(self, record: ExportRecord) -> None:
+        front = html.escape(record.term, quote=False).replace("\t", " ")
+        back = html.escape(record.definition, quote=False).replace("\t", " ").replace("\n", "<br>")
+        self.sink.write(f"{front}\t{back}\n")
+        self.count += 1
+
+
+def export_cards(records: Iterable[ExportRecord], targets: dict[str, str | Path]) -> int:
+    """
+    Write records to one file per format in a single pass.
+
+    Args:
+        records: Cards to export; consumed once.
+        targets: Output path per format name.
+
+    Returns:
+        Number of records written.
+
+    Raises:
+        ValueError: If a format is not registered.
+    """
+    exporter_types = {name: get_exporter(name) for name in targets}
+    temporary = {name: f"{path}.tmp" for name, path in targets.items()}
+    count = 0
+    try:
+        with ExitStack() as stack:
+            exporters: list[Exporter] = []
+            sinks: list[BufferedSink] = []
+            for name, exporter_type in exporter_types.items():
+                # newline="" keeps line endings as written (the csv module requires it)
+                file = stack.enter_context(open(temporary[name], "w", encoding="utf-8", newline=""))
+                sink = BufferedSink(file)
+                sinks.append(sink)
+                exporters.append(exporter_type(sink))
+
+            for exporter in exporters:
+                exporter.begin()
+            source = iter(records)
+            while batch := list(islice(source, FLUSH_EVERY_RECORDS)):
+                for exporter in exporters:
+                    exporter.write_many(batch)
+                for sink in sinks:
+                    sink.flush()
+                count += len(batch)
+            for exporter in exporters:
+                exporter.end()
+            for sink in sinks:
+                sink.flush()
+    except BaseException:
+        for path in temporary.values():
+            Path(path).unlink(missing_ok=True)
+        raise
+
+    for name, path in targets.items():
+        os.replace(temporary[name], path)
+    return count
@@ -0,0 +1,335 @@
+"""Prioritized background queue for card generation jobs.
+
+Handlers submit a `CardJob` and return immediately; a pool of workers runs
+the jobs. Each user has their own queue, ordered by priority (interactive >
+regenerate); workers serve users round-robin and skip users who already have
+`per_user_limit` jobs running, so one user's burst neither occupies every
+worker nor delays other users' words. Jobs carry deadlines, can be cancelled by the card message they belong
+to, and can optionally be persisted so queued jobs survive a restart.
+Jobs that cannot run while the LLM provider is down are parked as deferred
+and resubmitted once it recovers.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from enum import IntEnum
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from src.loop_watchdog import current_handler
+from src.prompt_variants import RequestClass
+from src.schemas import Language
+from src.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+JobKey = tuple[int, int]
+
+
+class JobPriority(IntEnum):
+    """Job priority; lower values run first."""
+
+    INTERACTIVE = 0
+    REGENERATE = 1
+
+
+@dataclass
+class CardJob:
+    """A card to generate for a message (chat_id, message_id)."""
+
+    word: str
+    word_identifier: str
+    language: Language
+    user_id: int
+    chat_id: int
+    message_id: int
+    priority: JobPriority = JobPriority.INTERACTIVE
+    deadline: float | None = None
+    is_duplicate: bool = False
+    # Set once the job had to wait for the provider; the user is notified when it is done
+    deferred: bool = False
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def key(self) -> JobKey:
+        """Message the job renders into; used for cancellation."""
+        return (self.chat_id, self.message_id)
+
+    @property
+    def request_class(self) -> RequestClass:
+        """Request class used to pick the prompt variant."""
+        return {
+            JobPriority.INTERACTIVE: "interactive",
+            JobPriority.REGENERATE: "regenerate",
+        }[self.priority]
+
+
+JobRunner = Callable[[CardJob], Awaitable[None]]
+
+
+class JobQueue:
+    """
+    Worker pool executing CardJobs per user, round-robin and by priority.
+
+    `run_job` does the actual work; `on_expired` is called instead when a job
+    misses its deadline (while queued or while running).
+    """
+
+    def __init__(
+        self,
+        run_job: JobRunner,
+        on_expired: JobRunner,
+        workers: int = 8,
+        per_user_limit: int = 2,
+        persist_path: str | None = None,
+    ) -> None:
+        """
+        Initialize the queue.
+
+        Args:
+            run_job: Coroutine executing a job.
+            on_expired: Coroutine notifying the user that a job missed its deadline.
+            workers: Total number of workers (jobs running at once).
+            per_user_limit: Jobs of one user running at once.
+            persist_path: JSON file to keep queued jobs in across restarts.
+        """
+        self.run_job = run_job
+        self.on_expired = on_expired
+        self.workers = max(1, workers)
+        self.per_user_limit = max(1, per_user_limit)
+        self.persist_path = Path(persist_path) if persist_path else None
+
+        # Queued jobs per user; dict order is the round-robin order
+        self._heaps: dict[int, list[tuple[int, int, CardJob]]] = {}
+        self._running_by_user: dict[int, int] = {}
+        self._seq = itertools.count()
+        self._cond = asyncio.Condition()
+        self._queued: dict[JobKey, CardJob] = {}
+        self._running: dict[JobKey, tuple[CardJob, asyncio.Task]] = {}
+        self._deferred: dict[JobKey, CardJob] = {}
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = False
+
+    def __len__(self) -> int:
+        """Number of queued (not yet running) jobs."""
+        return len(self._queued)
+
+    @property
+    def running(self) -> int:
+        """Number of jobs currently running."""
+        return len(self._running)
+
+    @property
+    def deferred(self) -> int:
+        """Number of jobs waiting for the provider to recover."""
+        return len(self._deferred)
+
+    def is_active(self, key: JobKey) -> bool:
+        """Check whether a job for this message is queued or running."""
+        return key in self._queued or key in self._running
+
+    async def start(self) -> None:
+        """Restore persisted jobs and start the workers."""
+        for job in self._load():
+            await self.submit(job)
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self) -> None:
+        """Stop the workers; queued and running jobs stay persisted."""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def submit(self, job: CardJob) -> None:
+        """Queue a job, replacing any queued job for the same message."""
+        self.cancel(job.key)
+        self._queued[job.key] = job
+        heapq.heappush(self._heaps.setdefault(job.user_id, []), (int(job.priority), next(self._seq), job))
+        self._idle.clear()
+        self._save()
+        async with self._cond:
+            self._cond.notify_all()
+
+    def defer(self, job: CardJob) -> None:
+        """Park a job until `resume_deferred` is called; it no longer expires."""
+        job.deferred = True
+        job.deadline = None
+        self._deferred[job.key] = job
+        self._save()
+
+    async def resume_deferred(self, limit: int | None = None) -> int:
+        """
+        Resubmit deferred jobs, oldest first.
+
+        Args:
+            limit: Resubmit at most this many jobs (e.g. one to probe the provider).
+
+        Returns:
+            Number of jobs resubmitted.
+        """
+        jobs = list(self._deferred.values())[:limit]
+        for job in jobs:
+            await self.submit(job)
+        return len(jobs)
+
+    def cancel(self, key: JobKey) -> bool:
+        """
+        Cancel the queued, running or deferred job for a message.
+
+        Returns:
+            True if a job was cancelled.
+        """
+        cancelled = False
+        queued = self._queued.pop(key, None)
+        deferred = self._deferred.pop(key, None)
+        if queued is not None or deferred is not None:
+            cancelled = True
+            self._save()
+        running = self._running.get(key)
+        if running is not None:
+            running[1].cancel()
+            cancelled = True
+        self._update_idle()
+        return cancelled
+
+    async def join(self) -> None:
+        """Wait until no jobs are queued or running."""
+        await self._idle.wait()
+
+    def _update_idle(self) -> None:
+        if not self._queued and not self._running:
+            self._idle.set()
+
+    def _pop(self) -> CardJob | None:
+        """
+        Pop the next job of the next user with a free slot.
+
+        Users are visited round-robin; the first user whose best job has the
+        highest priority wins and moves to the end of the rotation. Cancelled
+        entries are dropped on the way.
+        """
+        best_user: int | None = None
+        best_priority: int | None = None
+        for user_id, heap in list(self._heaps.items()):
+            while heap and self._queued.get(heap[0][2].key) is not heap[0][2]:
+                heapq.heappop(heap)
+            if not heap:
+                del self._heaps[user_id]
+                continue
+            if self._running_by_user.get(user_id, 0) >= self.per_user_limit:
+                continue
+            if best_priority is None or heap[0][0] < best_priority:
+                best_user, best_priority = user_id, heap[0][0]
+        if best_user is None:
+            return None
+
+        heap = self._heaps.pop(best_user)
+        _, _, job = heapq.heappop(heap)
+        if heap:
+            self._heaps[best_user] = heap
+        del self._queued[job.key]
+        self._running_by_user[best_user] = self._running_by_user.get(best_user, 0) + 1
+        return job
+
+    async def _next_job(self) -> CardJob:
+        async with self._cond:
+            while True:
+                job = self._pop()
+                if job is not None:
+                    return job
+                await self._cond.wait()
+
+    async def _release(self, job: CardJob) -> None:
+        """Free the user's slot taken by `_pop` and wake workers waiting for it."""
+        remaining = self._running_by_user.get(job.user_id, 0) - 1
+        if remaining > 0:
+            self._running_by_user[job.user_id] = remaining
+        else:
+            self._running_by_user.pop(job.user_id, None)
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._next_job()
+            tracer.record(
+                "job.wait",
+                time.time() - job.created_at,
+                language=job.language,
+                priority=job.priority.name,
+            )
+
+            task = asyncio.create_task(self._execute(job))
+            self._running[job.key] = (job, task)
+            self._save()
+            try:
+                await task
+            except asyncio.CancelledError:
+                if not task.done():
+                    # The worker itself is being stopped
+                    task.cancel()
+                    raise
+                logger.info("Cancelled job for word: %s", job.word[:50])
+            except Exception:
+                logger.exception("Job failed for word: %s", job.word[:50])
+            finally:
+                if not self._stopping and self._running.get(job.key, (None,))[0] is job:
+                    del self._running[job.key]
+                    self._save()
+                self._update_idle()
+                if not self._stopping:
+                    await self._release(job)
+
+    async def _execute(self, job: CardJob) -> None:
+        """Run a job within its deadline."""
+        current_handler.set(f"job.{job.priority.name.lower()}")
+        timeout = None
+        if job.deadline is not None:
+            timeout = job.deadline - time.time()
+            if timeout <= 0:
+                await self.on_expired(job)
+                return
+        try:
+            with tracer.span("job.run", language=job.language, priority=job.priority.name):
+                await asyncio.wait_for(self.run_job(job), timeout)
+        except asyncio.TimeoutError:
+            await self.on_expired(job)
+
+    def _load(self) -> list[CardJob]:
+        """Read persisted jobs."""
+        if self.persist_path is None or not self.persist_path.exists():
+            return []
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            jobs = [CardJob(**{**entry, "priority": JobPriority(entry["priority"])}) for entry in data]
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            logger.warning("Failed to load queued jobs: %s", e)
+            return []
+        if jobs:
+            logger.info("Restored %d queued job(s)", len(jobs))
+        return jobs
+
+    def _save(self) -> None:
+        """Persist queued, running and deferred jobs, if persistence is enabled."""
+        if self.persist_path is None:
+            return
+        jobs = [job for job, _ in self._running.values()]
+        jobs += list(self._queued.values()) + list(self._deferred.values())
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.persist_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([asdict(job) for job in jobs], f, ensure_ascii=False)
+        tmp_path.replace(self.persist_path)
@@ -0,0 +1,212 @@
+"""Registry of the languages the bot builds cards for.
+
+Each language is declared once as a `LanguageSpec`: its bot commands, prompt
+files, storage file names and the normalization rules behind `lemma_key`.
+Handlers, storage and card generation look languages up here instead of
+branching on their names, so a language is added by registering a spec
+(and shipping its prompts and lemma table):
+
+```
+register_language(
+    LanguageSpec(
+        name="french",
+        label="French",
+        command="fr",
+        flag="🇫🇷",
+        example="abandonner",
+        lemmatize=lemmatize_french,
+        leading_words=frozenset({"le", "la", "les", "un", "une"}),
+    )
+)
+```
+
+Registering is cheap: prompts, lemma tables and per-user history are only
+loaded when a language is first used.
+"""
+
+import functools
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from src.lemmatizer import (
+    ENGLISH_LEADING_WORDS,
+    GERMAN_ARTICLES,
+    lemmatize_english,
+    lemmatize_german,
+)
+from src.schemas import Language
+
+PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
+
+_LETTERS = re.compile(r"[^\W\d_]+")
+
+
+@dataclass(frozen=True)
+class LanguageSpec:
+    """Everything the bot needs to know about one language."""
+
+    # Identifier used in storage, metrics and job payloads ("english")
+    name: Language
+    # Human-readable name ("English")
+    label: str
+    # Command that builds a card, without the slash ("en"); also the
+    # language filter of /search and inline queries
+    command: str
+    flag: str
+    # Example word shown in usage hints
+    example: str
+    # Lemmatizes one run of letters as typed
+    lemmatize: Callable[[str], str]
+    # Words dropped from the start of a phrase before lemmatizing
+    leading_words: frozenset[str] = frozenset()
+    # Prompt files are prompts/<prompt>.md and prompts/<prompt>_compact.md;
+    # defaults to "<name>_prompt"
+    prompt: str | None = None
+
+    @property
+    def dump_command(self) -> str:
+        """Command that exports the card buffer ("dump_english")."""
+        return f"dump_{self.name}"
+
+    @property
+    def export_file(self) -> str:
+        """File name of the Quizlet export in the data directory."""
+        return f"{self.name}.txt"
+
+    @property
+    def history_file(self) -> str:
+        """File name of the word history in the data directory."""
+        return f"{self.name}_history.json"
+
+    @property
+    def buffer_file(self) -> str:
+        """File name of the persisted card buffer in the data directory."""
+        return f"{self.name}_buffer.json"
+
+    def prompt_path(self, compact: bool = False) -> Path:
+        """Return the path of the full or compact system prompt."""
+        base = self.prompt or f"{self.name}_prompt"
+        return PROMPTS_DIR / f"{base}{'_compact' if compact else ''}.md"
+
+
+LANGUAGES: dict[Language, LanguageSpec] = {}
+_COMMANDS: dict[str, LanguageSpec] = {}
+
+
+def register_language(spec: LanguageSpec) -> LanguageSpec:
+    """
+    Add a language to the registry.
+
+    Register languages before the bot is created; its command handlers are
+    set up from the registry once.
+
+    Raises:
+        ValueError: If the name or command is already taken.
+    """
+    if spec.name in LANGUAGES:
+        raise ValueError(f"Language {spec.name!r} is already registered")
+    if spec.command in _COMMANDS:
+        raise ValueError(f"Command /{spec.command} is already used by {_COMMANDS[spec.command].name}")
+    LANGUAGES[spec.name] = spec
+    _COMMANDS[spec.command] = spec
+    return spec
+
+
+def get_language(name: Language) -> LanguageSpec:
+    """
+    Return the spec of a registered language.
+
+    Raises:
+        ValueError: If the language is not registered.
+    """
+    try:
+        return LANGUAGES[name]
+    except KeyError:
+        raise ValueError(f"Unknown language: {name!r}") from None
+
+
+def language_by_command(command: str) -> LanguageSpec | None:
+    """Return the language whose command (or /search filter) is `command`."""
+    return _COMMANDS.get(command.lower())
+
+
+def language_names() -> list[Language]:
+    """Return the names of all registered languages in registration order."""
+    return list(LANGUAGES)
+
+
+@functools.lru_cache(maxsize=65536)
+def lemma_key(text: str, language: Language) -> str:
+    """
+    Return the lookup key of a word or phrase.
+
+    Leading words of the language (articles, "to" before English verbs) are
+    dropped when more words follow, every word is lemmatized, and the result
+    is case-folded with whitespace collapsed. Non-letter characters are kept,
+    so context like "bank (river)" stays part of the key.
+
+    Args:
+        text: Word or phrase as entered or as normalized by the LLM.
+        language: Language of the text.
+
+    Returns:
+        The key; equal keys usually denote the same word, but the suffix rules
+        can relate different words, so confirm a match with `term_key`.
+    """
+    lemmatize = get_language(language).lemmatize
+    lemmatized = [_LETTERS.sub(lambda m: lemmatize(m.group()), word) for word in _words(text, language)]
+    return " ".join(lemmatized).casefold()
+
+
+@functools.lru_cache(maxsize=65536)
+def term_key(text: str, language: Language) -> str:
+    """
+    Return a normalized term (or a word as typed) for exact comparison.
+
+    Like `lemma_key` but without lemmatizing: leading words are dropped,
+    whitespace is collapsed and case is folded ("der Hund" and "Hund" give
+    "hund", "die Reise" gives "reise"). A word matches a stored normalized
+    term when its `lemma_key` or its own `term_key` equals the term's
+    `term_key`.
+    """
+    return " ".join(_words(text, language)).casefold()
+
+
+def matches_term(word: str, term: str, language: Language) -> bool:
+    """Return True if `word` (as typed) is `term` (a normalized term) or lemmatizes to it."""
+    key = term_key(term, language)
+    return key == lemma_key(word, language) or key == term_key(word, language)
+
+
+def _words(text: str, language: Language) -> list[str]:
+    """Split text into words, dropping a leading article or "to" when more words follow."""
+    words = text.split()
+    if len(words) > 1 and words[0].casefold() in get_language(language).leading_words:
+        words = words[1:]
+    return words
+
+
+register_language(
+    LanguageSpec(
+        name="english",
+        label="English",
+        command="en",
+        flag="🇬🇧",
+        example="useful",
+        lemmatize=lemmatize_english,
+        leading_words=ENGLISH_LEADING_WORDS,
+    )
+)
+register_language(
+    LanguageSpec(
+        name="german",
+        label="German",
+        command="de",
+        flag="🇩🇪",
+        example="aufgeben",
+        lemmatize=lemmatize_german,
+        leading_words=GERMAN_ARTICLES,
+    )
+)
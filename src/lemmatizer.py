@@ -0,0 +1,99 @@
+"""Local rule-based lemmatizers behind the lookup keys of words and phrases.
+
+`src.languages.lemma_key` applies these per word, so duplicate checks and
+the card cache can match "went"/"goes"/"go" or "Hunde"/"der Hund" before any
+LLM call. A word is reduced to a lemma, never to a bare stem.
+
+Each language has an exception table shipped in `src/lemmas/<language>.tsv`
+(irregular forms, and German plurals) and a few suffix rules: English plural
+and 3rd person "-s", German derivational plurals ("-ungen", "-heiten") and
+"-s" plurals of loanwords. Endings that also end singular words (German
+"-e", "-en", "-n", "-er") are not stripped, since Reise/Reis or Seite/seit
+would get the same key. Rules can still relate two different words, so
+callers confirm a match against the stored normalized term (see
+`src.languages.term_key`); a missed match only costs one LLM call.
+"""
+
+import functools
+from pathlib import Path
+
+from src.schemas import Language
+
+MIN_ENGLISH_WORD = 4
+
+ENGLISH_LEADING_WORDS = frozenset({"to", "a", "an", "the"})
+GERMAN_ARTICLES = frozenset(
+    {"der", "die", "das", "den", "dem", "des", "ein", "eine", "einen", "einem", "einer", "eines"}
+)
+
+# Plural suffixes of German derived nouns, replaced by their singular form
+GERMAN_DERIVED_PLURALS = (
+    ("schaften", "schaft"),
+    ("heiten", "heit"),
+    ("keiten", "keit"),
+    ("innen", "in"),
+    ("ungen", "ung"),
+    ("ionen", "ion"),
+    ("täten", "tät"),
+    ("nisse", "nis"),
+)
+
+# Endings that look like an English plural or 3rd person "-s" but are not
+ENGLISH_S_GUARDS = ("ss", "us", "is", "ous", "ics")
+
+@functools.lru_cache(maxsize=None)
+def load_exceptions(language: Language) -> dict[str, str]:
+    """
+    Load the exception table of a language.
+
+    Returns:
+        Mapping of each listed form (and lemma) to its lemma.
+    """
+    path = Path(__file__).parent / "lemmas" / f"{language}.tsv"
+    exceptions: dict[str, str] = {}
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            lemma, _, forms = line.partition("\t")
+            exceptions.setdefault(lemma, lemma)
+            for form in forms.split():
+                exceptions[form] = lemma
+    return exceptions
+
+
+def lemmatize_english(token: str) -> str:
+    """Lemmatize a single English word (case is ignored)."""
+    token = token.lower()
+    exceptions = load_exceptions("english")
+    if token in exceptions:
+        return exceptions[token]
+    if len(token) < MIN_ENGLISH_WORD or not token.endswith("s") or token.endswith(ENGLISH_S_GUARDS):
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith(("sses", "ches", "shes", "xes", "zes")):
+        return token[:-2]
+    return token[:-1]
+
+
+def lemmatize_german(token: str) -> str:
+    """Lemmatize a single German word as typed (capitalization marks nouns)."""
+    exceptions = load_exceptions("german")
+    if token in exceptions:
+        return exceptions[token]
+    if token.islower() and token.capitalize() in exceptions:
+        return exceptions[token.capitalize()]
+    if not token[:1].isupper():
+        # Verbs, adjectives and lowercase input: only irregular forms are mapped
+        return token
+
+    for suffix, replacement in GERMAN_DERIVED_PLURALS:
+        if token.endswith(suffix):
+            return token[: -len(suffix)] + replacement
+    if token.endswith("s") and token[-2:-1] in ("a", "o", "y"):
+        # Plurals of loanwords (Autos, Omas, Handys)
+        return token[:-1]
+    # Other plurals ("-e", "-en", "-er") come from the exception table only
+    return token
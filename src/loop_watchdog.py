@@ -0,0 +1,209 @@
+"""Event-loop lag watchdog and per-handler blocking time.
+
+Every handler and background job shares one asyncio loop, so a blocking call
+anywhere (a large synchronous JSON write, CPU-heavy formatting) stalls all
+users. When enabled, the watchdog:
+
+- samples loop lag (how late a periodic timer fires) into a histogram,
+- times every loop callback and attributes its blocking time to the bot
+  handler or job it runs for,
+- logs callbacks that ran longer than the slow-callback threshold, and
+- logs the stack of the loop thread from a helper thread while the loop is
+  stalled, which points at the blocking call itself.
+
+Usage:
+```
+watchdog = LoopWatchdog(stall_threshold=0.1, slow_callback=0.05)
+await watchdog.start()
+...
+await watchdog.stop()
+```
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from src.metrics import HANDLER_BLOCKING_SECONDS, LOOP_LAG_SECONDS, LOOP_STALLS, SLOW_CALLBACKS
+
+logger = logging.getLogger(__name__)
+
+# How often loop lag is sampled and the stall detector checks the loop
+LAG_SAMPLE_INTERVAL_SECONDS = 0.1
+
+# Name of the handler or job the current task works for, used as metric label
+current_handler: ContextVar[str] = ContextVar("current_handler", default="other")
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Sets `current_handler` to the name of the aiogram handler being run."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "handler")
+        token = current_handler.set(name.removeprefix("_handle_"))
+        try:
+            return await handler(event, data)
+        finally:
+            current_handler.reset(token)
+
+
+def describe_callback(handle: asyncio.Handle) -> str:
+    """Return the coroutine (for task steps) or function a loop callback runs."""
+    callback = handle._callback
+    task = getattr(callback, "__self__", None)
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+        return getattr(coro, "__qualname__", repr(coro))
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+class LoopWatchdog:
+    """
+    Measures event-loop lag and blocking time of the running loop.
+
+    Callback timing works by wrapping `asyncio.Handle._run` while the
+    watchdog is running; per callback it costs two clock reads and a dict
+    update, and the totals are flushed into the metric with every lag sample.
+    """
+
+    def __init__(
+        self,
+        stall_threshold: float,
+        slow_callback: float,
+        interval: float = LAG_SAMPLE_INTERVAL_SECONDS,
+    ) -> None:
+        """
+        Initialize the watchdog.
+
+        Args:
+            stall_threshold: Seconds the loop may be blocked before its stack is logged.
+            slow_callback: Seconds a single callback may run before it is logged.
+            interval: Seconds between lag samples.
+        """
+        self.stall_threshold = stall_threshold
+        self.slow_callback = slow_callback
+        self.interval = interval
+
+        self._loop_thread_id: int | None = None
+        self._heartbeat = time.monotonic()
+        self._current: asyncio.Handle | None = None
+        # Blocking time per handler since the last flush into the metric
+        self._blocking: dict[str, float] = {}
+        self._original_run: Callable[[asyncio.Handle], None] | None = None
+        self._sampler: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    async def start(self) -> None:
+        """Start sampling lag and timing callbacks of the running loop."""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._install()
+        self._sampler = asyncio.create_task(self._sample_lag())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(
+            "Loop watchdog started (stall %.0f ms, slow callback %.0f ms)",
+            self.stall_threshold * 1000,
+            self.slow_callback * 1000,
+        )
+
+    async def stop(self) -> None:
+        """Stop the watchdog and restore `asyncio.Handle._run`."""
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.cancel()
+            await asyncio.gather(self._sampler, return_exceptions=True)
+            self._sampler = None
+        self._flush()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+        self._uninstall()
+
+    def _install(self) -> None:
+        if self._original_run is not None:
+            return
+        original_run = self._original_run = asyncio.Handle._run
+        watchdog = self
+
+        def _run(handle: asyncio.Handle) -> None:
+            started = time.perf_counter()
+            watchdog._current = handle
+            try:
+                original_run(handle)
+            finally:
+                watchdog._current = None
+                watchdog._observe(handle, time.perf_counter() - started)
+
+        asyncio.Handle._run = _run
+
+    def _uninstall(self) -> None:
+        if self._original_run is not None:
+            asyncio.Handle._run = self._original_run
+            self._original_run = None
+
+    def _observe(self, handle: asyncio.Handle, elapsed: float) -> None:
+        """Attribute a callback's run time to its handler."""
+        handler = handle._context.get(current_handler, "other")
+        self._blocking[handler] = self._blocking.get(handler, 0.0) + elapsed
+        if elapsed >= self.slow_callback:
+            SLOW_CALLBACKS.inc(handler=handler)
+            logger.warning(
+                "Slow callback: %.0f ms in %s (%s)",
+                elapsed * 1000,
+                describe_callback(handle),
+                handler,
+            )
+
+    async def _sample_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - expected))
+            self._heartbeat = time.monotonic()
+            self._flush()
+
+    def _flush(self) -> None:
+        blocking, self._blocking = self._blocking, {}
+        for handler, seconds in blocking.items():
+            HANDLER_BLOCKING_SECONDS.inc(seconds, handler=handler)
+
+    def _watch(self) -> None:
+        """Stall detector running in its own thread; logs the loop thread's stack."""
+        reported_heartbeat = None
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked < self.stall_threshold or heartbeat == reported_heartbeat:
+                continue
+            # Report each stall once, while it is still in progress
+            reported_heartbeat = heartbeat
+            LOOP_STALLS.inc()
+
+            handle = self._current
+            where = "unknown callback"
+            if handle is not None:
+                handler = handle._context.get(current_handler, "other")
+                where = f"{describe_callback(handle)} ({handler})"
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            logger.warning(
+                "Event loop blocked for %.0f ms in %s:\n%s", blocked * 1000, where, stack
+            )
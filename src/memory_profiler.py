@@ -0,0 +1,185 @@
+"""Memory statistics for long-running instances.
+
+Backs the admin `/memstats` command: process RSS, live instances of the
+bot's main data types, and - while `tracemalloc` is tracing - the top
+allocation sites plus their growth since the previous report.
+
+Tracing slows allocations down noticeably, so it runs only on demand
+(`/memstats start`) or from boot with `TRACEMALLOC_FRAMES`.
+"""
+
+import gc
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+
+# Types whose live instances are counted in every report
+TRACKED_TYPES = (
+    "PendingCard",
+    "WordHistoryEntry",
+    "Card",
+    "CardManager",
+    "LanguageStore",
+    "AsyncOpenAI",
+)
+
+# Allocations by these files are profiler bookkeeping, not bot memory
+_IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<unknown>")
+
+
+@dataclass
+class AllocationSite:
+    """Memory allocated at one source line (or its growth)."""
+
+    location: str
+    size_bytes: int
+    count: int
+
+
+@dataclass
+class MemoryReport:
+    """Snapshot of the process's memory use."""
+
+    rss_bytes: int | None
+    peak_rss_bytes: int
+    object_counts: dict[str, int]
+    tracing: bool = False
+    traced_bytes: int = 0
+    traced_peak_bytes: int = 0
+    top: list[AllocationSite] = field(default_factory=list)
+    growth: list[AllocationSite] = field(default_factory=list)
+    growth_seconds: float | None = None
+
+    def format(self) -> str:
+        """Render the report as message text."""
+        rss = _format_size(self.rss_bytes) if self.rss_bytes is not None else "n/a"
+        lines = [
+            f"RSS: {rss} (peak {_format_size(self.peak_rss_bytes)})",
+            "",
+            "Live objects:",
+            *(f"  {name}: {count}" for name, count in self.object_counts.items()),
+        ]
+        if not self.tracing:
+            lines += ["", "Allocation tracing is off; start it with /memstats start."]
+            return "\n".join(lines)
+
+        lines += [
+            "",
+            f"Traced: {_format_size(self.traced_bytes)} (peak {_format_size(self.traced_peak_bytes)})",
+            "",
+            "Top allocators:",
+            *(
+                f"  {_format_size(site.size_bytes)} in {site.count} blocks: {site.location}"
+                for site in self.top
+            ),
+        ]
+        if self.growth_seconds is not None:
+            lines += ["", f"Growth in the last {self.growth_seconds:.0f} s:"]
+            lines += [
+                f"  {site.size_bytes / 1024:+.1f} KiB ({site.count:+d} blocks): {site.location}"
+                for site in self.growth
+            ] or ["  none"]
+        return "\n".join(lines)
+
+
+def _format_size(size_bytes: int) -> str:
+    if size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.1f} KiB"
+    return f"{size_bytes / (1024 * 1024):.1f} MiB"
+
+
+def current_rss_bytes() -> int | None:
+    """Return the resident set size, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes() -> int:
+    """Return the peak resident set size."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def count_objects(type_names: tuple[str, ...] = TRACKED_TYPES) -> dict[str, int]:
+    """Count live GC-tracked instances of the given type names."""
+    counts = Counter(type(obj).__name__ for obj in gc.get_objects())
+    return {name: counts.get(name, 0) for name in type_names}
+
+
+class MemoryProfiler:
+    """Takes `tracemalloc` snapshots and diffs each report against the previous one."""
+
+    def __init__(self, frames: int = 1, top: int = 10) -> None:
+        """
+        Initialize the profiler.
+
+        Args:
+            frames: Stack frames stored per allocation when tracing starts.
+            top: Number of allocation sites listed per report.
+        """
+        self.frames = max(1, frames)
+        self.top = top
+        self._previous: tracemalloc.Snapshot | None = None
+        self._previous_at = 0.0
+
+    @property
+    def tracing(self) -> bool:
+        """Whether allocations are being traced."""
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        """Start tracing allocations."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._previous = None
+
+    def stop(self) -> None:
+        """Stop tracing and drop snapshots."""
+        tracemalloc.stop()
+        self._previous = None
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in _IGNORED_FILES]
+        )
+
+    def report(self) -> MemoryReport:
+        """
+        Collect a report; CPU-heavy, run it in a worker thread.
+
+        While tracing, the snapshot is kept and the next report shows the
+        growth since this one.
+        """
+        report = MemoryReport(
+            rss_bytes=current_rss_bytes(),
+            peak_rss_bytes=peak_rss_bytes(),
+            object_counts=count_objects(),
+        )
+        if not tracemalloc.is_tracing():
+            return report
+
+        snapshot = self._snapshot()
+        now = time.monotonic()
+        report.tracing = True
+        report.traced_bytes, report.traced_peak_bytes = tracemalloc.get_traced_memory()
+        report.top = [
+            AllocationSite(str(stat.traceback[0]), stat.size, stat.count)
+            for stat in snapshot.statistics("lineno")[: self.top]
+        ]
+        if self._previous is not None:
+            diff = snapshot.compare_to(self._previous, "lineno")
+            report.growth = [
+                AllocationSite(str(stat.traceback[0]), stat.size_diff, stat.count_diff)
+                for stat in diff[: self.top]
+                if stat.size_diff > 0
+            ]
+            report.growth_seconds = now - self._previous_at
+        self._previous, self._previous_at = snapshot, now
+        return report
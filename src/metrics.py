@@ -0,0 +1,369 @@
+"""Prometheus-style metrics with an optional HTTP `/metrics` endpoint.
+
+Metrics are plain in-process counters and histograms; rendering the text
+exposition format only walks the already aggregated values, so scrapes are
+cheap and never wait on bot handlers. Metrics are updated from worker threads
+too, so every metric guards its values with a lock and scrapes render a
+snapshot taken under it.
+"""
+
+import bisect
+import logging
+import math
+import threading
+from typing import Callable, Iterable
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Buckets (seconds) for LLM calls, which take from a few hundred ms to tens of seconds
+LLM_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 60.0)
+
+# Buckets (seconds) for local disk writes
+WRITE_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Buckets (seconds) for event-loop lag, which should stay in the low milliseconds
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the exposition format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    """Render a `{name="value",...}` label set."""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value the way Prometheus expects."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for a named metric family with labels."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        """Convert keyword labels into an ordered tuple of values."""
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        """Yield exposition lines for all series of this metric."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Render HELP/TYPE headers and samples."""
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.type_name}\n"
+        return header + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the counter for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        """Return the current value for the given labels."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down.
+
+    Either set explicitly with `set`, or computed at scrape time by a callback
+    returning `{label_values: value}` (useful for sizes of live collections).
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        callback: Callable[[], dict[LabelValues, float]] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_callback(self, callback: Callable[[], dict[LabelValues, float]] | None) -> None:
+        """Compute the gauge at scrape time from `callback`."""
+        self.callback = callback
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self.callback is not None:
+            try:
+                values.update(self.callback())
+            except Exception:
+                logger.exception("Gauge callback for %s failed", self.name)
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LLM_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: [per-bucket counts (+Inf last), sum]
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation for the given labels."""
+        key = self._key(labels)
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][bucket] += 1
+            series[1][0] += value
+
+    def count(self, **labels: str) -> int:
+        """Return the number of observations for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, [total]) in self._series.items()]
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric; names must be unique."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        """Create and register a counter."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        """Create and register a gauge."""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LLM_LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        return "".join(metric.render() for metric in list(self._metrics.values()))
+
+
+# Process-wide registry and the metrics the bot exposes
+registry = MetricsRegistry()
+
+LLM_REQUEST_SECONDS = registry.histogram(
+    "vocab_llm_request_duration_seconds",
+    "Duration of a single LLM request attempt.",
+    ("model", "variant", "outcome"),
+)
+LLM_RETRIES = registry.counter(
+    "vocab_llm_retries_total",
+    "Failed LLM attempts followed by another attempt, by error class.",
+    ("error_class",),
+)
+LLM_TOKENS = registry.counter(
+    "vocab_llm_tokens_total",
+    "Tokens reported in LLM responses.",
+    ("model", "variant", "kind"),
+)
+CARD_SALVAGES = registry.counter(
+    "vocab_card_salvages_total",
+    "Near-valid LLM responses repaired instead of retried, by repair.",
+    ("repair",),
+)
+CARDS = registry.counter(
+    "vocab_cards_total",
+    "Cards by language and action (generated, accepted, declined, regenerated).",
+    ("language", "action"),
+)
+PENDING_CARDS = registry.gauge(
+    "vocab_pending_cards",
+    "Cards awaiting accept/decline/regenerate.",
+)
+HISTORY_SIZE = registry.gauge(
+    "vocab_history_size",
+    "Words in history by language, over users loaded in memory.",
+    ("language",),
+)
+PROVIDER_UP = registry.gauge(
+    "vocab_llm_provider_up",
+    "1 while the LLM provider is healthy, 0 in degraded mode.",
+)
+DEFERRED_JOBS = registry.gauge(
+    "vocab_deferred_jobs",
+    "Card jobs waiting for the LLM provider to recover.",
+)
+DEGRADED_REQUESTS = registry.counter(
+    "vocab_degraded_requests_total",
+    "Words requested in degraded mode, by result (history, queued).",
+    ("language", "result"),
+)
+ACTIVE_USERS = registry.gauge(
+    "vocab_active_users",
+    "Users whose data is currently loaded in memory.",
+)
+STORAGE_WRITE_SECONDS = registry.histogram(
+    "vocab_storage_write_duration_seconds",
+    "Duration of storage writes.",
+    ("language", "operation"),
+    buckets=WRITE_LATENCY_BUCKETS,
+)
+EXPORTED_CARDS = registry.counter(
+    "vocab_exported_cards_total",
+    "Cards written by exports, by language and format.",
+    ("language", "format"),
+)
+WORD_LOOKUPS = registry.counter(
+    "vocab_word_lookups_total",
+    "Lemma-keyed lookups of requested words, by kind (duplicate, cache) and result (hit, miss).",
+    ("language", "kind", "result"),
+)
+TELEGRAM_REQUESTS = registry.counter(
+    "vocab_telegram_requests_total",
+    "Telegram Bot API requests sent, by method.",
+    ("method",),
+)
+TELEGRAM_FLOOD_WAITS = registry.counter(
+    "vocab_telegram_flood_waits_total",
+    "Telegram 429 (retry_after) responses, by method.",
+    ("method",),
+)
+TELEGRAM_EDITS_COALESCED = registry.counter(
+    "vocab_telegram_edits_coalesced_total",
+    "Message edits merged into another pending edit of the same message.",
+)
+LOOP_LAG_SECONDS = registry.histogram(
+    "vocab_event_loop_lag_seconds",
+    "How late the event loop ran a periodic timer.",
+    buckets=LOOP_LAG_BUCKETS,
+)
+LOOP_STALLS = registry.counter(
+    "vocab_event_loop_stalls_total",
+    "Times the event loop was blocked longer than LOOP_STALL_THRESHOLD_MS.",
+)
+HANDLER_BLOCKING_SECONDS = registry.counter(
+    "vocab_handler_blocking_seconds_total",
+    "Time spent running on the event loop, by handler or job.",
+    ("handler",),
+)
+SLOW_CALLBACKS = registry.counter(
+    "vocab_slow_callbacks_total",
+    "Event-loop callbacks that ran longer than SLOW_CALLBACK_MS, by handler or job.",
+    ("handler",),
+)
+
+
+class MetricsServer:
+    """Serves `registry` at GET /metrics on its own aiohttp site."""
+
+    def __init__(self, host: str, port: int, metrics: MetricsRegistry = registry) -> None:
+        self.host = host
+        self.port = port
+        self.metrics = metrics
+        self._runner: web.AppRunner | None = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=self.metrics.render().encode("utf-8"),
+            headers={"Content-Type": CONTENT_TYPE, "X-Content-Type-Options": "nosniff"},
+        )
+
+    async def start(self) -> None:
+        """Start listening in the current event loop."""
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info("Metrics available at http://%s:%d/metrics", self.host, self.port)
+
+    async def stop(self) -> None:
+        """Stop the HTTP server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,316 @@
+"""Local OpenAI-compatible mock LLM server for offline load and latency testing.
+
+Implements the chat-completions endpoint used by `build_card` and answers with
+schema-valid `Card` JSON, so the bot can run against it without OpenRouter.
+
+Usage:
+```
+uv run python -m src.mock_llm --port 8080 --latency lognormal --latency-ms 800
+OPENROUTER_BASE_URL=http://127.0.0.1:8080/v1 uv run python main.py
+```
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass
+
+from aiohttp import web
+
+from src.schemas import Card
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+# Rough characters-per-token ratio used for the reported usage numbers
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class MockLLMConfig:
+    """Behaviour knobs for the mock server."""
+
+    latency: str = "fixed"
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_seconds: int = 1
+    malformed_rate: float = 0.0
+    not_exists_rate: float = 0.0
+    stream_chunk_size: int = 32
+    seed: int | None = None
+
+
+@dataclass
+class MockLLMStats:
+    """Counters of what the mock server has answered so far."""
+
+    requests: int = 0
+    ok: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    malformed: int = 0
+    streamed: int = 0
+
+
+def _estimate_tokens(text: str) -> int:
+    """Estimate token count for a piece of text."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _build_mock_card(word: str, exists: bool) -> Card:
+    """
+    Build a deterministic, schema-valid card for the given word.
+
+    Args:
+        word: The word sent as the user message.
+        exists: Whether to answer as if the word exists.
+
+    Returns:
+        A valid Card instance.
+    """
+    if not exists:
+        return Card(is_exists=False)
+
+    term = word.strip().lower() or "word"
+    return Card(
+        is_exists=True,
+        normalized_term=term,
+        definition=f"n. A mock definition generated for '{term}'. (Syn: placeholder, stub)",
+        collocations=[
+            f"a common _____ ({term})",
+            f"use the _____ ({term}) daily",
+        ],
+        examples=[
+            f"She mentioned the _____ ({term}) during the meeting.",
+            f"Nobody expected the _____ ({term}) to matter so much.",
+        ],
+    )
+
+
+class MockLLMServer:
+    """
+    aiohttp application emulating the OpenAI chat-completions API.
+
+    Supports structured output (`response_format=json_schema`), SSE streaming,
+    latency distributions and fault injection (5xx, 429, malformed output).
+    """
+
+    def __init__(self, config: MockLLMConfig) -> None:
+        """
+        Initialize the mock server.
+
+        Args:
+            config: Latency and fault-injection settings.
+        """
+        self.config = config
+        self.stats = MockLLMStats()
+        self._rng = random.Random(config.seed)
+
+    def build_app(self) -> web.Application:
+        """Create the aiohttp application with all routes registered."""
+        app = web.Application()
+        app.router.add_post("/chat/completions", self._handle_chat_completions)
+        app.router.add_post("/v1/chat/completions", self._handle_chat_completions)
+        app.router.add_post("/api/v1/chat/completions", self._handle_chat_completions)
+        app.router.add_get("/stats", self._handle_stats)
+        return app
+
+    def _sample_latency(self) -> float:
+        """Sample a response latency in seconds from the configured distribution."""
+        cfg = self.config
+        if cfg.latency_ms <= 0:
+            return 0.0
+
+        if cfg.latency == "uniform":
+            low = max(0.0, cfg.latency_ms - cfg.latency_jitter_ms)
+            high = cfg.latency_ms + cfg.latency_jitter_ms
+            delay_ms = self._rng.uniform(low, high)
+        elif cfg.latency == "exponential":
+            delay_ms = self._rng.expovariate(1.0 / cfg.latency_ms)
+        elif cfg.latency == "lognormal":
+            # latency_ms is the median, jitter controls the spread (sigma)
+            sigma = cfg.latency_jitter_ms / cfg.latency_ms if cfg.latency_jitter_ms else 0.5
+            delay_ms = cfg.latency_ms * self._rng.lognormvariate(0.0, sigma)
+        else:
+            delay_ms = cfg.latency_ms
+
+        return delay_ms / 1000
+
+    def _malformed_content(self, word: str) -> str:
+        """Produce output that fails `Card` validation in one of several ways."""
+        card = _build_mock_card(word, exists=True).model_dump()
+        variant = self._rng.randrange(3)
+        if variant == 0:
+            # Truncated JSON
+            text = json.dumps(card)
+            return text[: len(text) // 2]
+        if variant == 1:
+            # Too many collocations
+            card["collocations"] = card["collocations"] + ["extra _____", "one more _____"]
+            return json.dumps(card)
+        # Field populated although the word "does not exist"
+        card["is_exists"] = False
+        return json.dumps(card)
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        """Return the server counters as JSON."""
+        return web.json_response(self.stats.__dict__)
+
+    async def _handle_chat_completions(self, request: web.Request) -> web.StreamResponse:
+        """Handle POST /chat/completions."""
+        self.stats.requests += 1
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return web.json_response(
+                {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}},
+                status=400,
+            )
+
+        messages = body.get("messages") or []
+        user_messages = [m.get("content") or "" for m in messages if m.get("role") == "user"]
+        word = user_messages[-1] if user_messages else ""
+        prompt_text = "".join(str(m.get("content") or "") for m in messages)
+
+        await asyncio.sleep(self._sample_latency())
+
+        roll = self._rng.random()
+        if roll < self.config.rate_limit_rate:
+            self.stats.rate_limited += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit exceeded (mock)", "type": "rate_limit_error"}},
+                status=429,
+                headers={"Retry-After": str(self.config.retry_after_seconds)},
+            )
+        roll -= self.config.rate_limit_rate
+        if roll < self.config.error_rate:
+            self.stats.errors += 1
+            status = self._rng.choice((500, 502, 503))
+            return web.json_response(
+                {"error": {"message": f"Upstream error {status} (mock)", "type": "server_error"}},
+                status=status,
+            )
+
+        if self._rng.random() < self.config.malformed_rate:
+            self.stats.malformed += 1
+            content = self._malformed_content(word)
+        else:
+            exists = self._rng.random() >= self.config.not_exists_rate
+            content = _build_mock_card(word, exists).model_dump_json()
+
+        self.stats.ok += 1
+        model = body.get("model", "mock-model")
+        usage = {
+            "prompt_tokens": _estimate_tokens(prompt_text),
+            "completion_tokens": _estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if body.get("stream"):
+            self.stats.streamed += 1
+            return await self._stream_response(request, model, content, usage)
+
+        return web.json_response(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+        )
+
+    async def _stream_response(
+        self, request: web.Request, model: str, content: str, usage: dict[str, int]
+    ) -> web.StreamResponse:
+        """Send the completion as server-sent events in OpenAI chunk format."""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        def chunk(delta: dict, finish_reason: str | None = None, **extra) -> bytes:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+        await response.write(chunk({"role": "assistant", "content": ""}))
+        size = max(1, self.config.stream_chunk_size)
+        for start in range(0, len(content), size):
+            await response.write(chunk({"content": content[start : start + size]}))
+            await asyncio.sleep(0)
+        await response.write(chunk({}, finish_reason="stop", usage=usage))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible LLM server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean/median latency")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Spread of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 5xx responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of 429 responses")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After for 429s (s)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of invalid cards")
+    parser.add_argument("--not-exists-rate", type=float, default=0.0, help="Share of is_exists=false")
+    parser.add_argument(
+        "--stream-chunk-size", type=int, default=32, help="Characters per streamed content chunk"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the mock server until interrupted."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    args = parse_args(argv)
+    config = MockLLMConfig(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_seconds=args.retry_after,
+        malformed_rate=args.malformed_rate,
+        not_exists_rate=args.not_exists_rate,
+        stream_chunk_size=args.stream_chunk_size,
+        seed=args.seed,
+    )
+    server = MockLLMServer(config)
+    logger.info("Mock LLM listening on http://%s:%d/v1", args.host, args.port)
+    web.run_app(server.build_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
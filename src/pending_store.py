@@ -0,0 +1,190 @@
+"""Storage for cards awaiting accept/decline/regenerate.
+
+`MemoryPendingStore` keeps pending cards in the process (the original
+behaviour). `SqlitePendingStore` keeps them in a SQLite file that several
+processes can share, so any process can serve a card's callbacks and pending
+cards survive restarts.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from src.config import Settings
+from src.schemas import Card, Language
+
+PendingKey = tuple[int, int]
+
+
+@dataclass
+class PendingCard:
+    """Card awaiting user action (accept/decline/regenerate)."""
+
+    word_identifier: str
+    card: Card
+    language: Language
+    chat_id: int
+    message_id: int
+    user_id: int
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    is_duplicate: bool = False
+
+    @property
+    def key(self) -> PendingKey:
+        """Store key; message IDs are only unique within a chat."""
+        return (self.chat_id, self.message_id)
+
+    def to_json(self) -> str:
+        """Serialize to a JSON string."""
+        data = asdict(self)
+        data["card"] = self.card.model_dump()
+        return json.dumps(data, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, payload: str) -> "PendingCard":
+        """Deserialize from a string produced by `to_json`."""
+        data = json.loads(payload)
+        data["card"] = Card.model_validate(data["card"])
+        # Written by older versions, never read
+        data.pop("duplicate_entry", None)
+        return cls(**data)
+
+
+class PendingStore(ABC):
+    """Interface of pending-card storage."""
+
+    @abstractmethod
+    async def get(self, key: PendingKey) -> PendingCard | None:
+        """Return the pending card for a (chat_id, message_id) key."""
+
+    @abstractmethod
+    async def put(self, pending: PendingCard) -> None:
+        """Insert or replace a pending card."""
+
+    @abstractmethod
+    async def take(self, key: PendingKey) -> PendingCard | None:
+        """
+        Atomically remove and return a pending card.
+
+        Only one caller gets the card, so a double-clicked Accept (possibly
+        handled by two processes) adds it once.
+        """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of pending cards."""
+
+    def close(self) -> None:
+        """Release resources held by the store."""
+
+
+class MemoryPendingStore(PendingStore):
+    """Pending cards kept in a dict inside the process."""
+
+    def __init__(self) -> None:
+        self._cards: dict[PendingKey, PendingCard] = {}
+
+    async def get(self, key: PendingKey) -> PendingCard | None:
+        return self._cards.get(key)
+
+    async def put(self, pending: PendingCard) -> None:
+        self._cards[pending.key] = pending
+
+    async def take(self, key: PendingKey) -> PendingCard | None:
+        return self._cards.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+
+class SqlitePendingStore(PendingStore):
+    """
+    Pending cards kept in a SQLite database shared between processes.
+
+    Queries run in a worker thread so disk I/O never blocks the event loop;
+    WAL mode lets readers and a writer from other processes work concurrently.
+    The size is counted after each write, in the same worker thread, so
+    `len()` (read by the metrics endpoint) never queries the database.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open (and create if needed) the database.
+
+        Args:
+            path: Path of the SQLite file.
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pending_cards (
+                chat_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (chat_id, message_id)
+            )
+            """
+        )
+        self._count = self._count_rows()
+
+    def _count_rows(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM pending_cards").fetchone()[0]
+
+    def _get(self, key: PendingKey) -> PendingCard | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM pending_cards WHERE chat_id = ? AND message_id = ?", key
+            ).fetchone()
+        return PendingCard.from_json(row[0]) if row else None
+
+    def _put(self, pending: PendingCard) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pending_cards (chat_id, message_id, payload, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (*pending.key, pending.to_json(), pending.created_at),
+            )
+            self._count = self._count_rows()
+
+    def _take(self, key: PendingKey) -> PendingCard | None:
+        with self._lock:
+            row = self._conn.execute(
+                "DELETE FROM pending_cards WHERE chat_id = ? AND message_id = ? RETURNING payload",
+                key,
+            ).fetchone()
+            self._count = self._count_rows()
+        return PendingCard.from_json(row[0]) if row else None
+
+    async def get(self, key: PendingKey) -> PendingCard | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, pending: PendingCard) -> None:
+        await asyncio.to_thread(self._put, pending)
+
+    async def take(self, key: PendingKey) -> PendingCard | None:
+        return await asyncio.to_thread(self._take, key)
+
+    def __len__(self) -> int:
+        """Pending cards as of this process's last write (other processes' writes show up then)."""
+        return self._count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_pending_store(settings: Settings) -> PendingStore:
+    """Create the pending store selected by `PENDING_STORE`."""
+    if settings.PENDING_STORE == "sqlite":
+        return SqlitePendingStore(settings.PENDING_DB_PATH)
+    return MemoryPendingStore()
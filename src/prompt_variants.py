@@ -0,0 +1,123 @@
+"""Prompt variants per request class and their A/B statistics.
+
+Each language has a full prompt (`prompts/<language>_prompt.md`) and a compact
+one (`prompts/<language>_prompt_compact.md`). Settings choose a variant for
+each request class, or `ab` to split calls randomly between both variants.
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Literal
+
+from src.config import Settings
+from src.tracing import LatencyHistogram
+
+PromptVariant = Literal["full", "compact"]
+RequestClass = Literal["interactive", "regenerate", "batch"]
+
+PROMPT_VARIANTS: tuple[PromptVariant, ...] = ("full", "compact")
+AB_TEST = "ab"
+
+
+def select_variant(settings: Settings, request_class: RequestClass) -> PromptVariant:
+    """
+    Pick the prompt variant for a request.
+
+    Args:
+        settings: Application settings with per-class variant choices.
+        request_class: Kind of request ('interactive', 'regenerate' or 'batch').
+
+    Returns:
+        The prompt variant to use for this call.
+    """
+    configured = {
+        "interactive": settings.PROMPT_VARIANT_INTERACTIVE,
+        "regenerate": settings.PROMPT_VARIANT_REGENERATE,
+        "batch": settings.PROMPT_VARIANT_BATCH,
+    }[request_class]
+    if configured == AB_TEST:
+        return random.choice(PROMPT_VARIANTS)
+    return configured
+
+
+@dataclass
+class VariantStats:
+    """Aggregated outcomes of `build_card` calls for one variant and request class."""
+
+    calls: int = 0
+    failed_calls: int = 0
+    attempts: int = 0
+    validation_failures: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    @property
+    def validation_failure_rate(self) -> float:
+        """Share of attempts rejected by Card validation."""
+        return self.validation_failures / self.attempts if self.attempts else 0.0
+
+    @property
+    def avg_prompt_tokens(self) -> float:
+        """Average prompt tokens per call."""
+        return self.prompt_tokens / self.calls if self.calls else 0.0
+
+    @property
+    def avg_completion_tokens(self) -> float:
+        """Average completion tokens per call."""
+        return self.completion_tokens / self.calls if self.calls else 0.0
+
+
+class PromptVariantStats:
+    """Per (variant, request class) statistics for comparing prompt variants."""
+
+    def __init__(self) -> None:
+        self._stats: dict[tuple[PromptVariant, RequestClass], VariantStats] = {}
+
+    def record_call(
+        self,
+        variant: PromptVariant,
+        request_class: RequestClass,
+        duration: float,
+        attempts: int,
+        validation_failures: int,
+        prompt_tokens: int,
+        completion_tokens: int,
+        succeeded: bool,
+    ) -> None:
+        """
+        Record one finished `build_card` call.
+
+        Args:
+            variant: Prompt variant used.
+            request_class: Kind of request.
+            duration: Total call time in seconds, including retries.
+            attempts: Number of LLM attempts made.
+            validation_failures: Attempts that failed Card validation.
+            prompt_tokens: Prompt tokens summed over attempts.
+            completion_tokens: Completion tokens summed over attempts.
+            succeeded: Whether a card was returned.
+        """
+        stats = self._stats.get((variant, request_class))
+        if stats is None:
+            stats = self._stats[(variant, request_class)] = VariantStats()
+        stats.calls += 1
+        stats.failed_calls += 0 if succeeded else 1
+        stats.attempts += attempts
+        stats.validation_failures += validation_failures
+        stats.prompt_tokens += prompt_tokens
+        stats.completion_tokens += completion_tokens
+        stats.latency.record(duration)
+
+    def items(self) -> list[tuple[PromptVariant, RequestClass, VariantStats]]:
+        """Return all recorded stats sorted by request class and variant."""
+        return [
+            (variant, request_class, stats)
+            for (variant, request_class), stats in sorted(
+                self._stats.items(), key=lambda item: (item[0][1], item[0][0])
+            )
+        ]
+
+
+# Process-wide statistics updated by build_card
+prompt_stats = PromptVariantStats()
@@ -0,0 +1,97 @@
+"""Health of the LLM provider, shared by every card generation in the process.
+
+A circuit breaker over LLM calls: after `failure_threshold` consecutive
+provider failures (timeouts, connection errors, 5xx) the provider is marked
+down and calls fail fast with `ProviderUnavailableError` instead of burning
+through retries. Once `cooldown_seconds` have passed a single probe call is
+let through; its success marks the provider healthy again.
+
+While the provider is not healthy the bot runs in degraded mode: known words
+are answered from the cache or history and unknown words are deferred until
+the provider recovers.
+"""
+
+import logging
+import time
+from typing import Literal
+
+logger = logging.getLogger(__name__)
+
+ProviderState = Literal["healthy", "down", "probing"]
+
+
+class ProviderHealth:
+    """Circuit breaker tracking consecutive LLM provider failures."""
+
+    def __init__(self, failure_threshold: int = 3, cooldown_seconds: float = 30.0) -> None:
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures after which the provider is down.
+            cooldown_seconds: Time before a down provider is probed again.
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state: ProviderState = "healthy"
+        self._failures = 0
+        self._changed_at = time.monotonic()
+
+    def configure(self, failure_threshold: int, cooldown_seconds: float) -> None:
+        """Apply settings to the process-wide breaker."""
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+
+    @property
+    def degraded(self) -> bool:
+        """Whether the provider is down or being probed."""
+        return self.state != "healthy"
+
+    def retry_after(self) -> float:
+        """Seconds until a down provider may be probed (0 if it may be called now)."""
+        if self.state == "healthy":
+            return 0.0
+        return max(0.0, self._changed_at + self.cooldown_seconds - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """
+        Check whether an LLM call may be made now.
+
+        When the cooldown of a down provider has passed, the first caller
+        becomes the probe; a probe that never reports back is replaced after
+        another cooldown.
+        """
+        if self.state == "healthy":
+            return True
+        if self.retry_after() > 0:
+            return False
+        self._set_state("probing")
+        return True
+
+    def record_success(self) -> None:
+        """Record a call the provider answered (even with invalid output)."""
+        self._failures = 0
+        if self.state != "healthy":
+            logger.warning("LLM provider recovered")
+            self._set_state("healthy")
+
+    def record_failure(self) -> None:
+        """Record a timeout, connection error or 5xx response."""
+        self._failures += 1
+        if self.state == "probing" or (
+            self.state == "healthy" and self._failures >= self.failure_threshold
+        ):
+            logger.warning(
+                "LLM provider unavailable after %d failure(s), degrading for %.0f s",
+                self._failures,
+                self.cooldown_seconds,
+            )
+            self._set_state("down")
+
+    def _set_state(self, state: ProviderState) -> None:
+        self.state = state
+        self._changed_at = time.monotonic()
+
+
+# Process-wide instance used by build_card and the bot
+provider_health = ProviderHealth()
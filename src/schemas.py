@@ -1,10 +1,10 @@
-from typing import Annotated, List, Literal
+from typing import Annotated, List
 
 from annotated_types import Ge, Le, MaxLen, MinLen
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, model_validator
 
-# Type alias for language
-Language = Literal["english", "german"]
+# Name of a language registered in src.languages ("english", "german", ...)
+Language = str
 
 
 class Card(BaseModel):
@@ -43,14 +43,13 @@ class Card(BaseModel):
         description="2-3 example sentences where the target word is replaced by '_____'. Example: 'He was too _____ to carry out his political program.' Only populated if is_exists=True.",
     )
 
-    @field_validator("normalized_term", "definition", "collocations", "examples", mode="after")
-    @classmethod
-    def validate_card_fields(cls, v: str | List[str] | None, info) -> str | List[str] | None:
+    @model_validator(mode="after")
+    def validate_card_fields(self) -> "Card":
         """If is_exists is True, all fields must be populated. If False, all must be None."""
-        if info.data.get("is_exists"):
-            if v is None:
-                raise ValueError("Field must be populated when is_exists=True")
-        else:
-            if v is not None:
-                raise ValueError("Field must be None when is_exists=False")
-        return v
+        values = (self.normalized_term, self.definition, self.collocations, self.examples)
+        if self.is_exists:
+            if any(v is None for v in values):
+                raise ValueError("All fields must be populated when is_exists=True")
+        elif any(v is not None for v in values):
+            raise ValueError("All fields must be None when is_exists=False")
+        return self
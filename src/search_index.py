@@ -0,0 +1,411 @@
+"""Persistent inverted index for full-text search over card history.
+
+Postings live in SQLite, ordered by token, so exact and prefix lookups touch
+only the matching tokens; the index is updated as cards are added and never
+rebuilt at startup.
+"""
+
+import heapq
+import itertools
+import json
+import math
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from src.schemas import Card, Language
+
+# Relative weight of a match in each field of a card
+FIELD_WEIGHTS = {"term": 5.0, "definition": 2.0, "collocations": 1.0, "examples": 1.0}
+FIELD_IDS = {name: index for index, name in enumerate(FIELD_WEIGHTS)}
+_FIELD_WEIGHT_BY_ID = list(FIELD_WEIGHTS.values())
+
+# Query terms shorter than this only match whole tokens
+MIN_PREFIX_LENGTH = 2
+
+# Prefix matches score lower than whole-token matches
+PREFIX_MATCH_FACTOR = 0.5
+
+# Most frequent tokens a prefix expands to
+MAX_PREFIX_EXPANSIONS = 50
+
+# Postings read per token of the most selective query term, best first
+MAX_CANDIDATES = 1000
+
+# Letters and digits only; gap markers ("_____") are not indexed
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into case-folded tokens."""
+    return _TOKEN.findall(text.casefold())
+
+
+@dataclass
+class SearchHit:
+    """A history entry matching a search query."""
+
+    word: str
+    language: Language
+    definition: str
+    added_at: str
+    score: float
+    collocations: list[str] = field(default_factory=list)
+    examples: list[str] = field(default_factory=list)
+
+    def to_card(self) -> Card:
+        """
+        Rebuild the card of the entry.
+
+        Entries indexed from old history have no collocations or examples, so
+        the card is constructed without validation.
+        """
+        return Card.model_construct(
+            is_exists=True,
+            normalized_term=self.word,
+            definition=self.definition,
+            collocations=self.collocations,
+            examples=self.examples,
+        )
+
+
+@dataclass
+class IndexDocument:
+    """Text of one history entry, split into indexed fields."""
+
+    word: str
+    language: Language
+    added_at: str
+    definition: str
+    collocations: list[str]
+    examples: list[str]
+
+    @classmethod
+    def from_card(cls, word: str, language: Language, added_at: str, card: Card) -> "IndexDocument":
+        """Build a document from a generated card."""
+        return cls(
+            word=word,
+            language=language,
+            added_at=added_at,
+            definition=card.definition or "",
+            collocations=card.collocations or [],
+            examples=card.examples or [],
+        )
+
+    def postings(self) -> dict[tuple[str, int], int]:
+        """Return term frequencies keyed by (token, field id)."""
+        fields = {
+            "term": [self.word],
+            "definition": [self.definition],
+            "collocations": self.collocations,
+            "examples": self.examples,
+        }
+        counts: dict[tuple[str, int], int] = {}
+        for name, texts in fields.items():
+            field_id = FIELD_IDS[name]
+            for text in texts:
+                for token in tokenize(text):
+                    counts[(token, field_id)] = counts.get((token, field_id), 0) + 1
+        return counts
+
+
+class SearchIndex:
+    """
+    Inverted index over cards of both languages, stored in SQLite.
+
+    Ranking is TF-IDF over weighted fields: a term match counts five times a
+    collocation or example match, and rare tokens weigh more than common ones.
+    All query terms must match; the last term also matches as a prefix, so
+    results update while a word is still being typed.
+
+    Postings are stored with their precomputed impact and indexed by
+    (token, impact), so a query reads candidates from its rarest term, at most
+    `MAX_CANDIDATES` of them best-first, and only checks the other terms for
+    those candidates. Query cost therefore does not grow with history size,
+    even for tokens that occur in every card.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open (and create if needed) the index database.
+
+        Args:
+            path: Path of the SQLite file.
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id INTEGER PRIMARY KEY,
+                language TEXT NOT NULL,
+                word TEXT NOT NULL,
+                added_at TEXT NOT NULL,
+                definition TEXT NOT NULL,
+                collocations TEXT NOT NULL DEFAULT '[]',
+                examples TEXT NOT NULL DEFAULT '[]',
+                UNIQUE (language, word)
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                token TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                impact REAL NOT NULL,
+                PRIMARY KEY (token, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_by_impact ON postings (token, impact DESC);
+            CREATE INDEX IF NOT EXISTS postings_by_doc ON postings (doc_id);
+            CREATE TABLE IF NOT EXISTS tokens (
+                token TEXT PRIMARY KEY,
+                df INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+        self._documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._documents
+
+    def count(self, language: Language) -> int:
+        """Number of indexed entries for a language."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM documents WHERE language = ?", (language,)
+            ).fetchone()[0]
+
+    def missing_words(
+        self, language: Language, words: Iterable[str], batch_size: int = 500
+    ) -> Iterator[str]:
+        """
+        Yield the given words that are not indexed for a language.
+
+        Words are looked up in batches of `batch_size`, so only one batch of
+        indexed words is held at a time.
+        """
+        words = iter(words)
+        while batch := list(itertools.islice(words, batch_size)):
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT word FROM documents WHERE language = ? "
+                    f"AND word IN ({','.join('?' * len(batch))})",
+                    (language, *batch),
+                ).fetchall()
+            indexed = {row[0] for row in rows}
+            yield from (word for word in batch if word not in indexed)
+
+    def iter_documents(self, language: Language, batch_size: int = 500) -> Iterator[IndexDocument]:
+        """
+        Yield the entries of a language in the order they were indexed.
+
+        Entries are read in batches of `batch_size`, and the lock is only held
+        while a batch is read, so streaming a large history neither holds it
+        in memory nor blocks concurrent searches.
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT doc_id, word, added_at, definition, collocations, examples FROM documents "
+                    "WHERE language = ? AND doc_id > ? ORDER BY doc_id LIMIT ?",
+                    (language, last_id, batch_size),
+                ).fetchall()
+            for doc_id, word, added_at, definition, collocations, examples in rows:
+                yield IndexDocument(
+                    word=word,
+                    language=language,
+                    added_at=added_at,
+                    definition=definition,
+                    collocations=json.loads(collocations),
+                    examples=json.loads(examples),
+                )
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    def add(self, document: IndexDocument) -> None:
+        """Index an entry, replacing an earlier entry for the same word."""
+        self.add_many([document])
+
+    def add_many(self, documents: Iterable[IndexDocument]) -> None:
+        """Index several entries in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                added = sum(self._add(document) for document in documents)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._documents += added
+
+    def _add(self, document: IndexDocument) -> int:
+        """Index one entry; returns the change in the number of documents."""
+        added = 1
+        row = self._conn.execute(
+            "SELECT doc_id FROM documents WHERE language = ? AND word = ?",
+            (document.language, document.word),
+        ).fetchone()
+        if row:
+            self._conn.execute(
+                "UPDATE tokens SET df = df - 1 "
+                "WHERE token IN (SELECT token FROM postings WHERE doc_id = ?)",
+                row,
+            )
+            self._conn.execute("DELETE FROM postings WHERE doc_id = ?", row)
+            self._conn.execute("DELETE FROM documents WHERE doc_id = ?", row)
+            added = 0
+
+        doc_id = self._conn.execute(
+            "INSERT INTO documents (language, word, added_at, definition, collocations, examples) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                document.language,
+                document.word,
+                document.added_at,
+                document.definition,
+                json.dumps(document.collocations, ensure_ascii=False),
+                json.dumps(document.examples, ensure_ascii=False),
+            ),
+        ).lastrowid
+
+        impacts: dict[str, float] = {}
+        for (token, field_id), tf in document.postings().items():
+            impacts[token] = impacts.get(token, 0.0) + _FIELD_WEIGHT_BY_ID[field_id] * (1 + math.log(tf))
+        self._conn.executemany(
+            "INSERT INTO postings (token, doc_id, impact) VALUES (?, ?, ?)",
+            [(token, doc_id, impact) for token, impact in impacts.items()],
+        )
+        self._conn.executemany(
+            "INSERT INTO tokens (token, df) VALUES (?, 1) ON CONFLICT (token) DO UPDATE SET df = df + 1",
+            [(token,) for token in impacts],
+        )
+        return added
+
+    def _expand(self, term: str, prefix: bool) -> list[tuple[str, int]]:
+        """Return the (token, df) pairs a query term matches."""
+        if prefix and len(term) >= MIN_PREFIX_LENGTH:
+            # Every token starting with `term` sorts between `term` and `term + U+10FFFF`
+            return self._conn.execute(
+                "SELECT token, df FROM tokens WHERE token >= ? AND token < ? AND df > 0 "
+                "ORDER BY df DESC LIMIT ?",
+                (term, term + "\U0010ffff", MAX_PREFIX_EXPANSIONS),
+            ).fetchall()
+        return self._conn.execute(
+            "SELECT token, df FROM tokens WHERE token = ? AND df > 0", (term,)
+        ).fetchall()
+
+    def _token_weight(self, term: str, token: str, df: int) -> float:
+        """IDF of a matched token, reduced for prefix matches."""
+        idf = math.log(1 + max(1, self._documents) / max(1, df))
+        return idf if token == term else idf * PREFIX_MATCH_FACTOR
+
+    def search(
+        self, query: str, language: Language | None = None, limit: int = 10
+    ) -> list[SearchHit]:
+        """
+        Find the entries best matching a query.
+
+        Args:
+            query: Free-text query.
+            language: Restrict results to one language.
+            limit: Maximum number of hits.
+
+        Returns:
+            Hits ordered by descending score.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            expansions: list[dict[str, float]] = []
+            matched_documents: list[int] = []
+            for position, term in enumerate(terms):
+                tokens = self._expand(term, prefix=position == len(terms) - 1)
+                if not tokens:
+                    return []
+                expansions.append({token: self._token_weight(term, token, df) for token, df in tokens})
+                matched_documents.append(sum(df for _, df in tokens))
+
+            # Candidates come from the term matching the fewest documents
+            driver = matched_documents.index(min(matched_documents))
+
+            # The language filter applies before the cut, so candidates of
+            # other languages never take the places of matching ones
+            if language is None:
+                candidate_query = (
+                    "SELECT doc_id, impact FROM postings WHERE token = ? ORDER BY impact DESC LIMIT ?"
+                )
+                filters: tuple[str, ...] = ()
+            else:
+                candidate_query = (
+                    "SELECT p.doc_id, p.impact FROM postings AS p "
+                    "JOIN documents AS d ON d.doc_id = p.doc_id "
+                    "WHERE p.token = ? AND d.language = ? ORDER BY p.impact DESC LIMIT ?"
+                )
+                filters = (language,)
+            scores: dict[int, float] = {}
+            for token, weight in expansions[driver].items():
+                for doc_id, impact in self._conn.execute(
+                    candidate_query, (token, *filters, MAX_CANDIDATES)
+                ):
+                    scores[doc_id] = scores.get(doc_id, 0.0) + impact * weight
+
+            # Every other term must match the candidate too
+            for position, weights in enumerate(expansions):
+                if position == driver or not scores:
+                    continue
+                term_scores: dict[int, float] = {}
+                candidates = list(scores)
+                for start in range(0, len(candidates), 500):
+                    batch = candidates[start:start + 500]
+                    rows = self._conn.execute(
+                        f"SELECT token, doc_id, impact FROM postings "
+                        f"WHERE token IN ({','.join('?' * len(weights))}) "
+                        f"AND doc_id IN ({','.join('?' * len(batch))})",
+                        [*weights, *batch],
+                    )
+                    for token, doc_id, impact in rows:
+                        term_scores[doc_id] = term_scores.get(doc_id, 0.0) + impact * weights[token]
+                scores = {
+                    doc_id: score + term_scores[doc_id]
+                    for doc_id, score in scores.items()
+                    if doc_id in term_scores
+                }
+
+            return self._hits(scores, limit)
+
+    def _hits(self, scores: dict[int, float], limit: int) -> list[SearchHit]:
+        """Load the best-scoring documents (called with the lock held)."""
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        if not best:
+            return []
+        rows = self._conn.execute(
+            f"SELECT doc_id, word, language, definition, added_at, collocations, examples FROM documents "
+            f"WHERE doc_id IN ({','.join('?' * len(best))})",
+            [doc_id for doc_id, _ in best],
+        ).fetchall()
+        by_id = {row[0]: row for row in rows}
+        return [
+            SearchHit(
+                word=row[1],
+                language=row[2],
+                definition=row[3],
+                added_at=row[4],
+                score=score,
+                collocations=json.loads(row[5]),
+                examples=json.loads(row[6]),
+            )
+            for doc_id, score in best
+            if (row := by_id.get(doc_id)) is not None
+        ]
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
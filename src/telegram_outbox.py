@@ -0,0 +1,266 @@
+"""Outbound Telegram scheduling: rate limits, flood-wait retries and edit merging.
+
+`RateLimitMiddleware` sits on the bot session, so every Bot API call that
+sends or edits a message waits for a global and a per-chat token bucket and
+is retried after a 429 for the `retry_after` Telegram asks for. Other calls
+(getUpdates, answerCallbackQuery, answerInlineQuery) pass straight through:
+they are not subject to the message limits, and delaying them would stall
+polling and leave buttons spinning. `TelegramOutbox` sits above it and turns the
+edits the card flow makes into as few requests as possible: a text change and
+a keyboard change become one `editMessageText`, and edits issued while an
+earlier edit of the same message is still in flight are merged into one.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import InlineKeyboardMarkup
+
+from src.metrics import TELEGRAM_EDITS_COALESCED, TELEGRAM_FLOOD_WAITS, TELEGRAM_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Flood waits retried per request before the error is raised to the caller
+MAX_FLOOD_RETRIES = 3
+
+# Bot API methods (aiogram class names) counted against the message rate limits
+RATE_LIMITED_PREFIXES = ("Send", "Edit", "Copy", "Forward")
+
+# Idle per-chat buckets are dropped once there are more than this many
+MAX_CHAT_BUCKETS = 10_000
+
+
+class _Unset:
+    """Marker for an edit field that was not given."""
+
+    def __repr__(self) -> str:
+        return "UNSET"
+
+
+UNSET: Any = _Unset()
+
+
+@dataclass
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second up to `burst`."""
+
+    rate: float
+    burst: float
+    tokens: float = 0.0
+    updated: float = field(default_factory=time.monotonic)
+    paused_until: float = 0.0
+
+    def __post_init__(self) -> None:
+        self.tokens = self.burst
+
+    def reserve(self, now: float) -> float:
+        """Take a token and return how long to wait before using it."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.paused_until - now)
+
+    def is_idle(self, now: float) -> bool:
+        """Whether the bucket is full again, i.e. equivalent to a new one."""
+        return now >= self.paused_until and self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class RateLimiter:
+    """Global and per-chat token buckets shared by all outgoing requests."""
+
+    def __init__(self, global_rate: float, chat_rate: float, chat_burst: float) -> None:
+        """
+        Initialize the limiter.
+
+        Args:
+            global_rate: Requests per second over all chats.
+            chat_rate: Requests per second within one chat.
+            chat_burst: Requests a chat may send back to back.
+        """
+        self._global = TokenBucket(rate=global_rate, burst=max(1.0, global_rate))
+        self._chat_rate = chat_rate
+        self._chat_burst = max(1.0, chat_burst)
+        self._chats: dict[Any, TokenBucket] = {}
+
+    def _chat(self, chat_id: Any) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_CHAT_BUCKETS:
+                now = time.monotonic()
+                self._chats = {key: b for key, b in self._chats.items() if not b.is_idle(now)}
+            bucket = TokenBucket(rate=self._chat_rate, burst=self._chat_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    async def acquire(self, chat_id: Any | None) -> float:
+        """
+        Wait until a request to `chat_id` (None for chat-less calls) may be sent.
+
+        Returns:
+            Seconds waited.
+        """
+        now = time.monotonic()
+        wait = self._global.reserve(now)
+        if chat_id is not None:
+            wait = max(wait, self._chat(chat_id).reserve(now))
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, chat_id: Any | None, seconds: float) -> None:
+        """Hold requests to a chat (or all requests) for `seconds`."""
+        bucket = self._global if chat_id is None else self._chat(chat_id)
+        bucket.paused_until = max(bucket.paused_until, time.monotonic() + seconds)
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """Applies `RateLimiter` to calls sending or editing messages and retries their flood waits."""
+
+    def __init__(self, limiter: RateLimiter) -> None:
+        self.limiter = limiter
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        method_name = type(method).__name__
+        if not method_name.startswith(RATE_LIMITED_PREFIXES):
+            TELEGRAM_REQUESTS.inc(method=method_name)
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None)
+        for attempt in range(MAX_FLOOD_RETRIES + 1):
+            await self.limiter.acquire(chat_id)
+            TELEGRAM_REQUESTS.inc(method=method_name)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                TELEGRAM_FLOOD_WAITS.inc(method=method_name)
+                if attempt == MAX_FLOOD_RETRIES:
+                    raise
+                logger.warning(
+                    "Flood wait on %s (chat %s): retrying after %d s", method_name, chat_id, e.retry_after
+                )
+                # Flood limits are per chat for messages to a chat, per bot otherwise
+                self.limiter.pause(chat_id, e.retry_after)
+
+
+@dataclass
+class _PendingEdit:
+    """An edit of one message not yet sent; later edits are merged into it."""
+
+    future: asyncio.Future
+    text: Any = UNSET
+    reply_markup: Any = UNSET
+
+
+class TelegramOutbox:
+    """
+    Merges and coalesces edits to the same message.
+
+    Each message has at most one edit in flight. Edits requested meanwhile are
+    merged into a single pending edit (latest text and keyboard win) that is
+    sent once the in-flight one completes, and every caller waits for the
+    request that carries its change.
+    """
+
+    def __init__(self, bot: Bot) -> None:
+        """
+        Initialize the outbox.
+
+        Args:
+            bot: Bot used to send the requests.
+        """
+        self.bot = bot
+        self._pending: dict[tuple[int, int], _PendingEdit] = {}
+        self._locks: dict[tuple[int, int], asyncio.Lock] = {}
+        self._lock_users: dict[tuple[int, int], int] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def edit(
+        self,
+        chat_id: int,
+        message_id: int,
+        text: Any = UNSET,
+        reply_markup: InlineKeyboardMarkup | None | Any = UNSET,
+    ) -> None:
+        """
+        Edit a message's text and/or inline keyboard.
+
+        As in the Bot API, a text edit without `reply_markup` removes the
+        keyboard; an edit with only `reply_markup` keeps the text.
+
+        Args:
+            chat_id: Chat of the message.
+            message_id: Message to edit.
+            text: New text, if it changes.
+            reply_markup: New keyboard (None removes it), if it changes.
+        """
+        key = (chat_id, message_id)
+        edit = self._pending.get(key)
+        if edit is None:
+            edit = _PendingEdit(future=asyncio.get_running_loop().create_future())
+            # Callers may be cancelled; the error is theirs to see, not the loop's
+            edit.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._pending[key] = edit
+            task = asyncio.create_task(self._flush(key, edit))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            TELEGRAM_EDITS_COALESCED.inc()
+
+        if text is not UNSET:
+            edit.text = text
+            edit.reply_markup = None if reply_markup is UNSET else reply_markup
+        elif reply_markup is not UNSET:
+            edit.reply_markup = reply_markup
+
+        await asyncio.shield(edit.future)
+
+    async def _flush(self, key: tuple[int, int], edit: _PendingEdit) -> None:
+        """Send a pending edit once the previous edit of the message is done."""
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._lock_users[key] = self._lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                # From here on, new edits start a new pending edit
+                if self._pending.get(key) is edit:
+                    del self._pending[key]
+                try:
+                    await self._send(key, edit)
+                except Exception as e:
+                    edit.future.set_exception(e)
+                else:
+                    edit.future.set_result(None)
+        finally:
+            self._lock_users[key] -= 1
+            if not self._lock_users[key]:
+                del self._lock_users[key]
+                del self._locks[key]
+
+    async def _send(self, key: tuple[int, int], edit: _PendingEdit) -> None:
+        chat_id, message_id = key
+        try:
+            if edit.text is not UNSET:
+                await self.bot.edit_message_text(
+                    edit.text, chat_id=chat_id, message_id=message_id, reply_markup=edit.reply_markup
+                )
+            elif edit.reply_markup is not UNSET:
+                await self.bot.edit_message_reply_markup(
+                    chat_id=chat_id, message_id=message_id, reply_markup=edit.reply_markup
+                )
+        except TelegramBadRequest as e:
+            # Merged edits may end up identical to the current message
+            if "message is not modified" not in str(e):
+                raise
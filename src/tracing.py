@@ -0,0 +1,326 @@
+"""Lightweight per-stage latency tracing with in-process histograms.
+
+Spans are recorded into HDR-style log-linear histograms bucketed by time window,
+so percentiles over recent windows are cheap to query. Optionally every span is
+also appended to a local JSONL trace file.
+
+Usage:
+```
+with tracer.span("llm.attempt", language="english", attempt=1):
+    ...
+```
+"""
+
+import contextvars
+import itertools
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any
+
+logger = logging.getLogger(__name__)
+
+# Histogram precision: 2**SUB_BUCKET_BITS linear sub-buckets per power of two (~1.5% error)
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_MASK = (1 << SUB_BUCKET_BITS) - 1
+
+# Windowed histograms keep one slot per WINDOW_SLOT_SECONDS, for up to MAX_WINDOW_SECONDS
+WINDOW_SLOT_SECONDS = 60
+MAX_WINDOW_SECONDS = 24 * 60 * 60
+
+# Trace file lines are buffered and flushed in batches to keep writes off the hot path
+TRACE_FLUSH_EVERY = 64
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar(
+    "current_span", default=None
+)
+_span_ids = itertools.count(1)
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of durations stored in microseconds.
+
+    Values below 2**SUB_BUCKET_BITS are exact; larger values are grouped into
+    buckets whose width is ~1/64 of their magnitude, like HdrHistogram.
+    """
+
+    __slots__ = ("_counts", "count", "total_us", "max_us")
+
+    def __init__(self) -> None:
+        self._counts: dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    @staticmethod
+    def _index(value_us: int) -> int:
+        """Map a value to its bucket index."""
+        shift = max(0, value_us.bit_length() - SUB_BUCKET_BITS)
+        return (shift << SUB_BUCKET_BITS) | (value_us >> shift)
+
+    @staticmethod
+    def _value(index: int) -> int:
+        """Return the midpoint value of a bucket."""
+        shift = index >> SUB_BUCKET_BITS
+        lower = (index & SUB_BUCKET_MASK) << shift
+        return lower + ((1 << shift) >> 1)
+
+    def record(self, seconds: float) -> None:
+        """Record a duration given in seconds."""
+        value_us = max(0, int(seconds * 1_000_000))
+        index = self._index(value_us)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add all samples of another histogram into this one."""
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, pct: float) -> float:
+        """
+        Return the given percentile in milliseconds.
+
+        Args:
+            pct: Percentile in range 0-100.
+        """
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= target:
+                return min(self._value(index), self.max_us) / 1000
+        return self.max_us / 1000
+
+    @property
+    def mean_ms(self) -> float:
+        """Mean duration in milliseconds."""
+        return self.total_us / self.count / 1000 if self.count else 0.0
+
+
+class WindowedHistogram:
+    """Ring of per-slot histograms for querying percentiles over recent windows."""
+
+    def __init__(self, slot_seconds: int = WINDOW_SLOT_SECONDS, max_seconds: int = MAX_WINDOW_SECONDS) -> None:
+        self.slot_seconds = slot_seconds
+        self._slots: deque[tuple[int, LatencyHistogram]] = deque(
+            maxlen=max(1, max_seconds // slot_seconds)
+        )
+
+    def record(self, seconds: float, now: float | None = None) -> None:
+        """Record a duration into the slot for the current time."""
+        slot_start = int((now if now is not None else time.time()) // self.slot_seconds)
+        if not self._slots or self._slots[-1][0] != slot_start:
+            self._slots.append((slot_start, LatencyHistogram()))
+        self._slots[-1][1].record(seconds)
+
+    def window(self, seconds: float, now: float | None = None) -> LatencyHistogram:
+        """Merge all slots that fall inside the last `seconds`."""
+        oldest = int(((now if now is not None else time.time()) - seconds) // self.slot_seconds)
+        merged = LatencyHistogram()
+        for slot_start, histogram in reversed(self._slots):
+            if slot_start < oldest:
+                break
+            merged.merge(histogram)
+        return merged
+
+
+@dataclass
+class StageSummary:
+    """Percentiles of one stage over a window."""
+
+    stage: str
+    language: str | None
+    count: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+class Span:
+    """A timed stage. Use via `Tracer.span`."""
+
+    __slots__ = (
+        "tracer",
+        "stage",
+        "language",
+        "attrs",
+        "span_id",
+        "parent_id",
+        "trace_id",
+        "duration",
+        "_start",
+        "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", stage: str, language: str | None, attrs: dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.stage = stage
+        self.language = language
+        self.attrs = attrs
+        self.span_id = next(_span_ids)
+        self.parent_id: int | None = None
+        self.trace_id = self.span_id
+        self.duration = 0.0
+        self._start = 0.0
+        self._token: contextvars.Token | None = None
+
+    def set(self, **attrs: Any) -> None:
+        """Attach extra attributes (e.g. outcome) to the span."""
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        parent = _current_span.get()
+        if parent is not None:
+            self.parent_id = parent.span_id
+            self.trace_id = parent.trace_id
+            if self.language is None:
+                self.language = parent.language
+        self._token = _current_span.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attrs.setdefault("error", exc_type.__name__)
+        self.tracer._finish(self, self.duration)
+
+
+class Tracer:
+    """
+    Collects spans into windowed histograms and an optional JSONL trace file.
+
+    Spans also finish in worker threads (storage, exports), so histograms and
+    the trace file are only touched with `_lock` held.
+    """
+
+    def __init__(self) -> None:
+        self._histograms: dict[tuple[str, str | None], WindowedHistogram] = {}
+        self._trace_file: IO[str] | None = None
+        self._pending_lines = 0
+        self._lock = threading.Lock()
+
+    def configure(self, trace_path: str | None) -> None:
+        """
+        Enable or disable JSONL export.
+
+        Args:
+            trace_path: Path of the trace file, or None to disable export.
+        """
+        self.close()
+        if trace_path:
+            Path(trace_path).parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                self._trace_file = open(trace_path, "a", encoding="utf-8", buffering=1 << 16)
+            logger.info("Writing traces to %s", trace_path)
+
+    def close(self) -> None:
+        """Flush and close the trace file."""
+        with self._lock:
+            if self._trace_file is not None:
+                self._trace_file.close()
+                self._trace_file = None
+                self._pending_lines = 0
+
+    def span(self, stage: str, language: str | None = None, **attrs: Any) -> Span:
+        """
+        Create a span context manager for a stage.
+
+        Args:
+            stage: Stage name, e.g. "llm.attempt" or "telegram.SendMessage".
+            language: Language the work belongs to; inherited from the parent span if omitted.
+            **attrs: Extra attributes written to the trace file.
+        """
+        return Span(self, stage, language, attrs)
+
+    def record(self, stage: str, seconds: float, language: str | None = None, **attrs: Any) -> None:
+        """Record a duration measured outside a span (e.g. time spent in a queue)."""
+        span = Span(self, stage, language, attrs)
+        span.duration = seconds
+        self._finish(span, seconds)
+
+    def _finish(self, span: Span, duration: float) -> None:
+        """Record a finished span."""
+        now = time.time()
+        with self._lock:
+            for key in ((span.stage, None), (span.stage, span.language)):
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = WindowedHistogram()
+                histogram.record(duration, now)
+                if span.language is None:
+                    break
+            if self._trace_file is not None:
+                self._write_trace(span, duration, now)
+
+    def _write_trace(self, span: Span, duration: float, now: float) -> None:
+        """Append a span to the trace file (called with `_lock` held)."""
+        record = {
+            "ts": now,
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "stage": span.stage,
+            "language": span.language,
+            "duration_ms": round(duration * 1000, 3),
+        }
+        if span.attrs:
+            record["attrs"] = span.attrs
+        self._trace_file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._pending_lines += 1
+        if self._pending_lines >= TRACE_FLUSH_EVERY:
+            self._trace_file.flush()
+            self._pending_lines = 0
+
+    def summary(self, window_seconds: float, by_language: bool = True) -> list[StageSummary]:
+        """
+        Percentiles per stage (and per language) over the last `window_seconds`.
+
+        Returns:
+            Summaries sorted by stage name, stages without samples omitted.
+        """
+        now = time.time()
+        # Merge the windows under the lock, compute percentiles outside it
+        with self._lock:
+            windows = [
+                (stage, language, windowed.window(window_seconds, now))
+                for (stage, language), windowed in self._histograms.items()
+                if language is None or by_language
+            ]
+        summaries = []
+        for stage, language, histogram in sorted(windows, key=lambda item: (item[0], item[1] or "")):
+            if not histogram.count:
+                continue
+            summaries.append(
+                StageSummary(
+                    stage=stage,
+                    language=language,
+                    count=histogram.count,
+                    p50_ms=histogram.percentile(50),
+                    p95_ms=histogram.percentile(95),
+                    p99_ms=histogram.percentile(99),
+                    max_ms=histogram.max_us / 1000,
+                )
+            )
+        return summaries
+
+
+# Process-wide tracer used by all modules
+tracer = Tracer()
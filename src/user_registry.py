@@ -0,0 +1,178 @@
+"""Per-user storage and LLM fairness for multi-user mode.
+
+In single-user mode every request is served by one `CardManager` using the
+configured data paths. In multi-user mode each allowed user gets a lazily
+created `CardManager` whose files live in a sharded directory
+(`<USER_DATA_DIR>/<shard>/<user_id>/`), and idle managers are evicted so
+memory scales with active users rather than total users. Within a manager,
+languages nobody used for `LANGUAGE_IDLE_SECONDS` are unloaded the same way.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator
+
+from src.card_manager import CardManager
+from src.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Number of shard directories user data is spread over
+SHARD_COUNT = 256
+
+# How often the eviction loop looks for idle users
+EVICTION_INTERVAL_SECONDS = 60
+
+
+@dataclass
+class UserSession:
+    """In-memory state of one active user."""
+
+    user_id: int
+    card_manager: CardManager
+    llm_slots: asyncio.Semaphore
+    last_used: float = field(default_factory=time.monotonic)
+    in_flight: int = 0
+
+
+class UserRegistry:
+    """
+    Hands out per-user CardManagers and LLM concurrency slots.
+
+    LLM calls take a per-user slot before a global one, so a single user can
+    occupy at most `LLM_CONCURRENCY_PER_USER` of the `LLM_CONCURRENCY` global
+    slots and a heavy batch cannot starve other users.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        """
+        Initialize the registry.
+
+        Args:
+            settings: Application settings.
+        """
+        self.settings = settings
+        self.multi_user = settings.MULTI_USER_MODE
+        self._allowed = {settings.ALLOWED_USER_ID}
+        if self.multi_user:
+            self._allowed.update(settings.ALLOWED_USER_IDS)
+
+        self._sessions: dict[int, UserSession] = {}
+        self._global_slots = asyncio.Semaphore(settings.LLM_CONCURRENCY)
+        self._shared_manager: CardManager | None = None
+        if not self.multi_user:
+            self._shared_manager = CardManager(
+                data_dir=str(Path(settings.ENGLISH_CSV_PATH).parent),
+                export_paths={
+                    "english": settings.ENGLISH_CSV_PATH,
+                    "german": settings.GERMAN_CSV_PATH,
+                },
+            )
+
+    def is_allowed(self, user_id: int) -> bool:
+        """Check whether the user may use the bot."""
+        return user_id in self._allowed
+
+    def is_admin(self, user_id: int) -> bool:
+        """Check whether the user is the bot owner (`ALLOWED_USER_ID`)."""
+        return user_id == self.settings.ALLOWED_USER_ID
+
+    def user_dir(self, user_id: int) -> Path:
+        """Return the sharded data directory of a user."""
+        shard = f"{user_id % SHARD_COUNT:02x}"
+        return Path(self.settings.USER_DATA_DIR) / shard / str(user_id)
+
+    def _session(self, user_id: int) -> UserSession:
+        """Return the session of a user, creating it on first use."""
+        session = self._sessions.get(user_id)
+        if session is None:
+            if self.multi_user:
+                manager = CardManager(data_dir=str(self.user_dir(user_id)), persist_buffer=True)
+            else:
+                manager = self._shared_manager
+            session = UserSession(
+                user_id=user_id,
+                card_manager=manager,
+                llm_slots=asyncio.Semaphore(self.settings.LLM_CONCURRENCY_PER_USER),
+            )
+            self._sessions[user_id] = session
+            logger.info("Loaded session for user %d", user_id)
+        session.last_used = time.monotonic()
+        return session
+
+    def card_manager(self, user_id: int) -> CardManager:
+        """Return the CardManager holding the given user's cards."""
+        return self._session(user_id).card_manager
+
+    def active_managers(self) -> list[CardManager]:
+        """Return the CardManagers currently held in memory."""
+        if not self.multi_user:
+            return [self._shared_manager]
+        return [session.card_manager for session in self._sessions.values()]
+
+    @property
+    def active_users(self) -> int:
+        """Number of users with a session in memory."""
+        return len(self._sessions)
+
+    @asynccontextmanager
+    async def llm_slot(self, user_id: int) -> AsyncIterator[None]:
+        """Hold a per-user and a global LLM slot for the duration of a call."""
+        session = self._session(user_id)
+        session.in_flight += 1
+        try:
+            async with session.llm_slots, self._global_slots:
+                yield
+        finally:
+            session.in_flight -= 1
+            session.last_used = time.monotonic()
+
+    def evict_idle(self, now: float | None = None) -> int:
+        """
+        Drop sessions idle for longer than `USER_IDLE_EVICTION_SECONDS`.
+
+        Sessions with LLM calls in flight are kept. Buffers and history are on
+        disk, so an evicted user is transparently reloaded on the next request.
+
+        Returns:
+            Number of evicted sessions.
+        """
+        now = now if now is not None else time.monotonic()
+        cutoff = now - self.settings.USER_IDLE_EVICTION_SECONDS
+        idle = [
+            user_id
+            for user_id, session in self._sessions.items()
+            if session.last_used < cutoff and session.in_flight == 0
+        ]
+        for user_id in idle:
+            del self._sessions[user_id]
+        if idle:
+            logger.info("Evicted %d idle user session(s)", len(idle))
+        return len(idle)
+
+    def unload_idle_languages(self) -> int:
+        """
+        Unload languages idle for longer than `LANGUAGE_IDLE_SECONDS` from active managers.
+
+        Returns:
+            Number of unloaded languages.
+        """
+        unloaded = sum(
+            manager.unload_idle(self.settings.LANGUAGE_IDLE_SECONDS)
+            for manager in self.active_managers()
+        )
+        if unloaded:
+            logger.info("Unloaded %d idle language(s)", unloaded)
+        return unloaded
+
+    async def run_eviction(self) -> None:
+        """Periodically evict idle sessions (multi-user mode) and idle languages."""
+        while True:
+            await asyncio.sleep(EVICTION_INTERVAL_SECONDS)
+            if self.multi_user:
+                self.evict_idle()
+            self.unload_idle_languages()